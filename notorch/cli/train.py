@@ -7,6 +7,7 @@ from omegaconf import DictConfig
 from rich import print
 
 from notorch.data.dataset import NotorchDataset
+from notorch.data.prefetch import PrefetchLoader
 from notorch.lightning_models.model import NotorchModel
 from notorch.types import TargetTransformConfig, TaskTransformConfig
 from notorch.cli.utils.resolvers import register_resolvers
@@ -61,6 +62,10 @@ def train(cfg: DictConfig):
 
     trainer = L.Trainer(accelerator="cpu")
     train_loader = train.to_dataloader(batch_size=64)
+    if cfg.get("prefetch") is not None:
+        # e.g., `prefetch: {num_batches: 4, device: cuda, pin_memory: true}`
+        prefetch_kwargs = hydra.utils.instantiate(cfg.prefetch, _convert_="object")
+        train_loader = PrefetchLoader(train_loader, **prefetch_kwargs)
     trainer.fit(model, train_loader)
 
     # print(dataset)
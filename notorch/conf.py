@@ -5,6 +5,8 @@
 
 INPUT_KEY_PREFIX = "inputs"
 TARGET_KEY_PREFIX = "targets"
+INDEX_KEY = "index"
+SAMPLE_WEIGHTS_KEY = "sample_weights"
 
 REPR_INDENT = 2 * " "
 
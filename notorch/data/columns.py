@@ -0,0 +1,68 @@
+from collections.abc import Iterable, Iterator, Sequence
+from dataclasses import dataclass
+
+import numpy as np
+from numpy.typing import NDArray
+import pandas as pd
+
+type Column = NDArray | StringColumn
+
+
+@dataclass(repr=False, eq=False)
+class StringColumn(Sequence[str]):
+    """A :class:`StringColumn` stores a column of strings as a single, contiguous UTF-8 buffer and
+    an array of offsets into it.
+
+    Unlike an ``object`` array or a list of strings, a :class:`StringColumn` holds no per-row Python
+    objects, so reading a row does not write to the reference count of a shared object. This
+    prevents forked :class:`~torch.utils.data.DataLoader` workers from duplicating the pages of the
+    column via copy-on-write.
+    """
+
+    data: NDArray[np.uint8]
+    """a byte array containing the concatenated, UTF-8 encoded strings"""
+    offsets: NDArray[np.int64]
+    """an array of shape ``n + 1`` such that the ``i``-th string is stored in
+    ``data[offsets[i]:offsets[i+1]]``"""
+
+    @classmethod
+    def from_strings(cls, strings: Iterable[str]) -> "StringColumn":
+        encoded = [s.encode() for s in strings]
+        offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+        np.cumsum([len(b) for b in encoded], out=offsets[1:])
+        data = np.frombuffer(b"".join(encoded), dtype=np.uint8)
+
+        return cls(data, offsets)
+
+    @property
+    def nbytes(self) -> int:
+        return self.data.nbytes + self.offsets.nbytes
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def __getitem__(self, idx: int) -> str:
+        if idx < 0:
+            idx += len(self)
+        start, end = self.offsets[idx], self.offsets[idx + 1]
+
+        return self.data[start:end].tobytes().decode()
+
+    def __iter__(self) -> Iterator[str]:
+        for i in range(len(self)):
+            yield self[i]
+
+    def tolist(self) -> list[str]:
+        return list(self)
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}(size={len(self)}, nbytes={self.nbytes})"
+
+
+def build_column(values: pd.Series) -> Column:
+    """Build a compact column from the input series. Columns of strings are stored as a
+    :class:`StringColumn` and all others as a :class:`~numpy.ndarray`."""
+    if pd.api.types.is_string_dtype(values) and values.map(type).eq(str).all():
+        return StringColumn.from_strings(values)
+
+    return values.to_numpy()
@@ -1,62 +1,80 @@
-from collections.abc import Collection, Mapping
-from copy import copy
+from collections.abc import Collection, Mapping, Sequence
+from dataclasses import dataclass
 import textwrap
+from typing import Self
 
+import numpy as np
+from numpy.typing import ArrayLike, NDArray
 import pandas as pd
 from rich.pretty import pretty_repr
 from tensordict import TensorDict
 import torch
+from torch import Tensor
 from torch.utils.data import DataLoader, Dataset
 
-from notorch.conf import INPUT_KEY_PREFIX, REPR_INDENT, TARGET_KEY_PREFIX
+from notorch.conf import INDEX_KEY, INPUT_KEY_PREFIX, REPR_INDENT, TARGET_KEY_PREFIX
+from notorch.data.columns import Column, StringColumn, build_column
+from notorch.data.featurize import Backend, featurize
 from notorch.data.managers import DatabaseManager, TransformManager
+from notorch.data.models.graph import Graph
 from notorch.nn.transforms import build as build_task_transforms
+from notorch.samplers import BudgetBatchSampler
+from notorch.transforms.base import Transform
+from notorch.transforms.cache import CacheInfo, LRUCache
 from notorch.types import DatabaseConfig, TargetConfig, TaskTransformConfig
+from notorch.utils.shared import SharedArray, share
 
 
-class NotorchDataset(Dataset[dict]):
+@dataclass
+class _GraphSize:
+    """Get the number of nodes and edges in the graph output by the wrapped transform."""
+
+    transform: Transform
+
+    def __call__(self, input) -> tuple[int, int]:
+        G: Graph = self.transform(input)
+
+        return G.num_nodes, G.num_edges
+
+
+class _NotorchDatasetBase:
+    """The shared configuration and collation logic of map-style and iterable datasets."""
+
     def __init__(
         self,
-        df: pd.DataFrame,
         transforms: Mapping[str, TaskTransformConfig],
         target_groups: Mapping[str, TargetConfig],
         databases: Mapping[str, DatabaseConfig] | None = None,
     ):
-        databases = {
-            name: DatabaseManager(**kwargs) for name, kwargs in (databases or dict()).items()
-        }
-
-        self.df = df
         self.transforms = {name: TransformManager(**kwargs) for name, kwargs in transforms.items()}
         self.target_groups = target_groups
-        self.databases = databases
-
-        # transform_columns = list(set(transform.in_key for transform in self.transforms.values()))
-        # db_columns = list(set(db.in_key for db in self.databases.values()))
-        # columns = transform_columns + db_columns
-        self.records = self.df.to_dict("records")
-        self.targets = {
-            name: torch.as_tensor(self.df[config["columns"]].values).to(torch.float)
-            for name, config in self.target_groups.items()
+        self.databases = {
+            name: DatabaseManager(**kwargs) for name, kwargs in (databases or dict()).items()
         }
 
-    def __len__(self) -> int:
-        return len(self.records)
+    @property
+    def in_keys(self) -> list[str]:
+        """The unique input keys of all transforms and databases."""
+        managers = [*self.transforms.values(), *self.databases.values()]
 
-    def __getitem__(self, idx: int) -> dict:
-        sample = copy(self.records[idx])
+        return list(dict.fromkeys(manager.in_key for manager in managers))
 
-        for name, db in self.databases.items():
+    def update(self, sample: dict) -> dict:
+        """Apply each database and then each transform to the input sample."""
+        for db in self.databases.values():
             sample = db.update(sample)
         for transform in self.transforms.values():
             sample = transform.update(sample)
-        for name, targets in self.targets.items():
-            sample[name] = targets[idx]
 
         return sample
 
-    def collate(self, samples: Collection[dict]) -> TensorDict:
-        batch = TensorDict({}, batch_size=len(samples))
+    def collate(self, samples: Collection[dict] | TensorDict) -> TensorDict:
+        if isinstance(samples, TensorDict):
+            # the batch was already collated by `__getitems__()`
+            return samples
+
+        # graph inputs have no leading batch dimension, so the batch itself can't have one either
+        batch = TensorDict({}, batch_size=[])
 
         for transform in self.transforms.values():
             batch[f"{INPUT_KEY_PREFIX}.{transform.out_key}"] = transform.collate(samples)
@@ -66,12 +84,307 @@ class NotorchDataset(Dataset[dict]):
             batch[f"{TARGET_KEY_PREFIX}.{name}"] = torch.stack(
                 [sample[name] for sample in samples], dim=0
             )
+        if all(INDEX_KEY in sample for sample in samples):
+            batch[INDEX_KEY] = torch.as_tensor([sample[INDEX_KEY] for sample in samples])
 
         return batch
 
     def to_dataloader(self, **kwargs) -> DataLoader:
         return DataLoader(self, collate_fn=self.collate, **kwargs)
 
+    def cache_info(self) -> dict[str, CacheInfo]:
+        """Get the :class:`CacheInfo` of each transform wrapped by an :class:`LRUCache`."""
+        return {
+            name: transform.transform.cache_info()
+            for name, transform in self.transforms.items()
+            if isinstance(transform.transform, LRUCache)
+        }
+
+
+class NotorchDataset(_NotorchDatasetBase, Dataset[dict]):
+    def __init__(
+        self,
+        df: pd.DataFrame,
+        transforms: Mapping[str, TaskTransformConfig],
+        target_groups: Mapping[str, TargetConfig],
+        databases: Mapping[str, DatabaseConfig] | None = None,
+        prefeaturize: bool = False,
+        num_workers: int | None = None,
+        chunksize: int = 1024,
+        backend: Backend = "process",
+        shared: bool = False,
+    ):
+        super().__init__(transforms, target_groups, databases)
+
+        self.columns: dict[str, Column] = {
+            key: build_column(df[key]) for key in self.in_keys if key in df.columns
+        }
+        self.size = len(df)
+        self.targets = {
+            name: torch.as_tensor(df[config["columns"]].values).to(torch.float)
+            for name, config in self.target_groups.items()
+        }
+        self.features: dict[str, list | Tensor] = {}
+        self.sizes: dict[str, NDArray] = {}
+        self._shared: dict[str, SharedArray] = {}
+
+        if prefeaturize:
+            self.prefeaturize(num_workers, chunksize, backend)
+        if shared:
+            self.share_memory_()
+
+    def prefeaturize(
+        self, num_workers: int | None = None, chunksize: int = 1024, backend: Backend = "process"
+    ) -> None:
+        """Eagerly apply each transform to the entire dataset in parallel so that
+        :meth:`__getitem__` only needs to look up the precomputed outputs.
+
+        Only transforms whose input is either a column of :attr:`df` or the output of a preceding
+        transform are featurized. Any remaining transforms are applied lazily. See
+        :func:`~notorch.data.featurize.featurize` for details on the parameters.
+        """
+        outputs = {}
+        for name, transform in self.transforms.items():
+            if transform.in_key in outputs:
+                inputs = outputs[transform.in_key]
+            elif transform.in_key in self.columns:
+                inputs = self.columns[transform.in_key].tolist()
+            else:
+                continue
+
+            self.features[name] = featurize(
+                transform.transform, inputs, num_workers, chunksize, backend, f"Featurizing {name}"
+            )
+            outputs[transform.out_key] = self.features[name]
+
+    def size_index(
+        self,
+        name: str | None = None,
+        num_workers: int | None = None,
+        chunksize: int = 1024,
+        backend: Backend = "process",
+    ) -> NDArray:
+        """Get the number of nodes and edges in each graph output by the given transform.
+
+        The index is computed once, from the prefeaturized graphs if they are available or by
+        featurizing the dataset otherwise, and then stored in :attr:`sizes`. See
+        :func:`~notorch.data.featurize.featurize` for details on the remaining parameters.
+
+        Parameters
+        ----------
+        name : str | None, default=None
+            the name of a transform that outputs a :class:`~notorch.data.models.graph.Graph`. If
+            ``None``, use the only such transform.
+
+        Returns
+        -------
+        NDArray
+            an array of shape ``n x 2`` containing the number of nodes and edges in each graph
+
+        Raises
+        ------
+        ValueError
+            if :attr:`name` is ``None`` and there is not exactly one graph transform or if the
+            input of the transform is not a column of the dataset
+        """
+        if name is None:
+            sample = self[0] if len(self) > 0 else {}
+            names = [
+                name
+                for name, transform in self.transforms.items()
+                if isinstance(sample.get(transform.out_key), Graph)
+            ]
+            if len(names) != 1:
+                raise ValueError(
+                    f"arg 'name' must be supplied when there isn't exactly one graph transform! "
+                    f"got graph transforms: {names}"
+                )
+            name = names[0]
+        if name in self.sizes:
+            return self.sizes[name]
+
+        transform = self.transforms[name]
+        if name in self.features:
+            sizes = [(G.num_nodes, G.num_edges) for G in self.features[name]]
+        elif transform.in_key in self.columns:
+            sizes = featurize(
+                _GraphSize(transform.transform),
+                self.columns[transform.in_key].tolist(),
+                num_workers,
+                chunksize,
+                backend,
+                f"Indexing {name}",
+            )
+        else:
+            raise ValueError(
+                f"The input of transform '{name}' is not a column of the dataset! "
+                f"got: '{transform.in_key}'"
+            )
+        self.sizes[name] = np.array(sizes, dtype=np.int64).reshape(-1, 2)
+
+        return self.sizes[name]
+
+    def to_dataloader(
+        self,
+        max_nodes: int | None = None,
+        max_edges: int | None = None,
+        sizes: str | ArrayLike | None = None,
+        seed: int | None = None,
+        **kwargs,
+    ) -> DataLoader:
+        """Build a :class:`~torch.utils.data.DataLoader` over this dataset.
+
+        If either :attr:`max_nodes` or :attr:`max_edges` is given, batches are packed up to the
+        given budget(s) with a :class:`~notorch.samplers.BudgetBatchSampler`. In that case, the
+        ``shuffle`` and ``drop_last`` keyword arguments are passed to the sampler.
+
+        Parameters
+        ----------
+        max_nodes : int | None, default=None
+            the maximum total number of nodes in a batch
+        max_edges : int | None, default=None
+            the maximum total number of edges in a batch
+        sizes : str | ArrayLike | None, default=None
+            either the precomputed size of each sample or the name of the graph transform to
+            index via :meth:`size_index`. If ``None``, index the only graph transform.
+        seed : int | None, default=None
+            the random seed to use for shuffling batches
+        **kwargs
+            additional keyword arguments to supply to the :class:`~torch.utils.data.DataLoader`
+        """
+        if max_nodes is None and max_edges is None:
+            return super().to_dataloader(**kwargs)
+
+        if sizes is None or isinstance(sizes, str):
+            sizes = self.size_index(sizes)
+        batch_sampler = BudgetBatchSampler(
+            sizes,
+            max_nodes,
+            max_edges,
+            kwargs.pop("shuffle", False),
+            seed,
+            kwargs.pop("drop_last", False),
+        )
+
+        return super().to_dataloader(batch_sampler=batch_sampler, **kwargs)
+
+    def share_memory_(self) -> Self:
+        """Move the data of this dataset to shared memory so that every
+        :class:`~torch.utils.data.DataLoader` worker and every distributed rank on the same node
+        attaches to a single copy. See :func:`~notorch.utils.shared.share` for details.
+
+        This shares the input columns, the targets, any featurized outputs that are tensors of a
+        uniform shape, and the data of any database that defines a ``share_memory_()`` method.
+        Columns with ``object`` dtype and any other featurized outputs (e.g., graphs) remain local
+        to each process.
+        """
+        for key, column in self.columns.items():
+            if isinstance(column, StringColumn):
+                data = share(column.data, f"{key}.data")
+                offsets = share(column.offsets, f"{key}.offsets")
+                self.columns[key] = StringColumn(data, offsets)
+            elif not column.dtype.hasobject:
+                self.columns[key] = share(column, key)
+        for name, targets in self.targets.items():
+            key = f"targets.{name}"
+            self._shared[key] = share(targets.numpy(), key)
+            self.targets[name] = torch.from_numpy(self._shared[key])
+        for name, sizes in self.sizes.items():
+            self.sizes[name] = share(sizes, f"sizes.{name}")
+        for name, features in self.features.items():
+            if not all(isinstance(x, Tensor) for x in features):
+                continue
+            if len({x.shape for x in features}) > 1:
+                continue
+            key = f"features.{name}"
+            self._shared[key] = share(torch.stack(list(features)).numpy(), key)
+            self.features[name] = torch.from_numpy(self._shared[key])
+        for db in self.databases.values():
+            if hasattr(db.database, "share_memory_"):
+                db.database.share_memory_()
+
+        return self
+
+    def __getstate__(self) -> dict:
+        state = self.__dict__.copy()
+        # send shared tensors as the arrays backing them so that they are pickled by reference
+        for attr in ["targets", "features"]:
+            state[attr] = {
+                name: self._shared.get(f"{attr}.{name}", value)
+                for name, value in state[attr].items()
+            }
+
+        return state
+
+    def __setstate__(self, state: dict):
+        for attr in ["targets", "features"]:
+            state[attr] = {
+                name: torch.from_numpy(value) if isinstance(value, SharedArray) else value
+                for name, value in state[attr].items()
+            }
+
+        self.__dict__.update(state)
+
+    def __len__(self) -> int:
+        return self.size
+
+    def __getitem__(self, idx: int) -> dict:
+        sample = {key: column[idx] for key, column in self.columns.items()}
+
+        for name, db in self.databases.items():
+            sample = db.update(sample)
+        for name, transform in self.transforms.items():
+            if name in self.features:
+                sample[transform.out_key] = self.features[name][idx]
+            else:
+                sample = transform.update(sample)
+        for name, targets in self.targets.items():
+            sample[name] = targets[idx]
+        sample[INDEX_KEY] = idx
+
+        return sample
+
+    def __getitems__(self, idxs: Sequence[int]) -> TensorDict:
+        """Get the collated batch of the input indices.
+
+        Target groups are gathered with a single index into their respective tensors and each
+        database and transform featurizes the batch in one call via
+        :meth:`~notorch.data.managers.Manager.apply_batch`. If any transform depends on the output
+        of another transform or a database, this falls back to collating the individual samples.
+        """
+        if not self.batchable:
+            return self.collate([self[idx] for idx in idxs])
+
+        samples = [{key: column[idx] for key, column in self.columns.items()} for idx in idxs]
+        batch = TensorDict({}, batch_size=[])
+
+        for name, transform in self.transforms.items():
+            key = f"{INPUT_KEY_PREFIX}.{transform.out_key}"
+            if name in self.features:
+                features = self.features[name]
+                if isinstance(features, Tensor) and hasattr(transform.transform, "gather"):
+                    batch[key] = transform.transform.gather(features, idxs)
+                else:
+                    batch[key] = transform.transform.collate([features[i] for i in idxs])
+            else:
+                batch[key] = transform.apply_batch(samples)
+        for db in self.databases.values():
+            batch[f"{INPUT_KEY_PREFIX}.{db.out_key}"] = db.apply_batch(samples)
+        idxs = torch.as_tensor(idxs, dtype=torch.long)
+        for name, targets in self.targets.items():
+            batch[f"{TARGET_KEY_PREFIX}.{name}"] = targets[idxs]
+        batch[INDEX_KEY] = idxs
+
+        return batch
+
+    @property
+    def batchable(self) -> bool:
+        """Can a batch be featurized directly from the stored columns?"""
+        return all(
+            name in self.features or transform.in_key in self.columns
+            for name, transform in self.transforms.items()
+        )
+
     def build_task_transform_configs(self) -> dict[str, TaskTransformConfig]:
         """Build a mapping from target group name to its respective :class:`TaskTransformConfig`."""
         return {
@@ -90,7 +403,7 @@ class NotorchDataset(Dataset[dict]):
 
     def __repr__(self) -> str:
         prettify = lambda obj: pretty_repr(obj, indent_size=2, max_length=4)  # noqa: E731
-        df_repr = f"(records): {prettify(self.records)}"
+        columns_repr = f"(columns): {prettify(list(self.columns))}"
         transform_repr = "\n".join(
             [
                 "(transforms): {",
@@ -119,7 +432,7 @@ class NotorchDataset(Dataset[dict]):
         return "\n".join(
             [
                 f"{type(self).__name__}(",
-                textwrap.indent(df_repr, REPR_INDENT),
+                textwrap.indent(columns_repr, REPR_INDENT),
                 textwrap.indent(transform_repr, REPR_INDENT),
                 textwrap.indent(databases_repr, REPR_INDENT),
                 textwrap.indent(target_groups_repr, REPR_INDENT),
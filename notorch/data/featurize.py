@@ -0,0 +1,121 @@
+from collections import deque
+from collections.abc import Iterator, Sequence
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor
+import math
+import os
+import pickle
+from typing import Literal
+
+from rich.progress import track
+
+from notorch.exceptions import InvalidChoiceError
+from notorch.transforms.base import Transform
+
+type Backend = Literal["process", "thread"]
+
+_TRANSFORM: Transform | None = None
+
+
+def _init_worker(transform: Transform):
+    global _TRANSFORM
+
+    _TRANSFORM = transform
+
+
+def _featurize_chunk(inputs: Sequence) -> bytes:
+    # pickle outputs here so that tensors are serialized by value rather than sent
+    # as one shared memory handle per tensor by `ForkingPickler`
+    return pickle.dumps([_TRANSFORM(input) for input in inputs], protocol=5)
+
+
+def _apply_chunk(transform: Transform, inputs: Sequence) -> list:
+    return [transform(input) for input in inputs]
+
+
+def featurize[S, T](
+    transform: Transform[S, T, ...],
+    inputs: Sequence[S],
+    num_workers: int | None = None,
+    chunksize: int = 1024,
+    backend: Backend = "process",
+    description: str = "Featurizing",
+) -> list[T]:
+    """Apply the input transform to each input in parallel.
+
+    Parameters
+    ----------
+    transform : Transform
+        the transform to apply
+    inputs : Sequence
+        the inputs to transform
+    num_workers : int | None, default=None
+        the number of workers to use. If ``None``, use all available CPUs. If 0, transform the
+        inputs serially in the current process.
+    chunksize : int, default=1024
+        the number of inputs to send to a worker at a time
+    backend : {"process", "thread"}, default="process"
+        the type of pool to use. A thread pool avoids the cost of serializing outputs back to the
+        main process, but it only yields a speedup for transforms that release the GIL.
+    description : str, default="Featurizing"
+        the description to use in the progress bar
+
+    Returns
+    -------
+    list[T]
+        the transformed inputs, in the same order as :attr:`inputs`
+    """
+    chunks = ifeaturize(transform, inputs, num_workers, chunksize, backend, description)
+
+    return [output for chunk in chunks for output in chunk]
+
+
+def ifeaturize[S, T](
+    transform: Transform[S, T, ...],
+    inputs: Sequence[S],
+    num_workers: int | None = None,
+    chunksize: int = 1024,
+    backend: Backend = "process",
+    description: str = "Featurizing",
+) -> Iterator[list[T]]:
+    """Like :func:`featurize`, but yield the transformed inputs one chunk at a time, in order, so
+    that the outputs can be consumed (e.g., written to disk) while the remaining chunks are being
+    transformed.
+
+    At most ``2 * num_workers`` chunks are in flight at once, so the memory held by pending
+    outputs stays bounded when the consumer is slower than the workers."""
+    num_workers = os.cpu_count() if num_workers is None else num_workers
+    num_chunks = math.ceil(len(inputs) / chunksize)
+    chunks = (inputs[i : i + chunksize] for i in range(0, len(inputs), chunksize))
+
+    if num_workers == 0:
+        for chunk in track(chunks, description, total=num_chunks):
+            yield _apply_chunk(transform, chunk)
+
+        return
+
+    pool: Executor
+    match backend:
+        case "process":
+            pool = ProcessPoolExecutor(num_workers, initializer=_init_worker, initargs=(transform,))
+        case "thread":
+            pool = ThreadPoolExecutor(num_workers)
+        case _:
+            raise InvalidChoiceError(backend, ("process", "thread"))
+
+    def submit(chunk: Sequence) -> Future:
+        if backend == "process":
+            return pool.submit(_featurize_chunk, chunk)
+
+        return pool.submit(_apply_chunk, transform, chunk)
+
+    def outputs() -> Iterator[list[T]]:
+        futures = deque(submit(chunk) for _, chunk in zip(range(2 * num_workers), chunks))
+        while futures:
+            output = futures.popleft().result()
+            if (chunk := next(chunks, None)) is not None:
+                futures.append(submit(chunk))
+
+            yield pickle.loads(output) if backend == "process" else output
+
+    with pool:
+        yield from track(outputs(), description, total=num_chunks)
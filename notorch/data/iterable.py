@@ -0,0 +1,293 @@
+from collections.abc import Iterator, Mapping
+import io
+from os import PathLike
+from pathlib import Path
+
+import numpy as np
+from numpy.typing import NDArray
+import pandas as pd
+import torch
+import torch.distributed as dist
+from torch.utils.data import IterableDataset, get_worker_info
+
+from notorch.data.dataset import _NotorchDatasetBase
+from notorch.exceptions import InvalidChoiceError
+from notorch.types import DatabaseConfig, TargetConfig, TaskTransformConfig
+
+CSV_SUFFIXES = (".csv",)
+PARQUET_SUFFIXES = (".parquet", ".pq")
+NEWLINE = ord("\n")
+
+
+def index_csv(
+    path: PathLike, chunksize: int, blocksize: int = 2**26
+) -> tuple[NDArray[np.int64], NDArray[np.int64]]:
+    """Split the rows of a CSV file into chunks without parsing it.
+
+    The file is scanned for newlines one block at a time, so this only assumes that each row is
+    a single line, i.e., that no quoted field contains a line break.
+
+    Parameters
+    ----------
+    path : PathLike
+        the path to the CSV file, which must have a header row
+    chunksize : int
+        the number of rows in each chunk
+    blocksize : int, default=2**26
+        the number of bytes to scan at a time
+
+    Returns
+    -------
+    offsets : NDArray[np.int64]
+        an array of shape ``c + 1`` containing the byte offset of the first row of each of the
+        ``c`` chunks and the size of the file
+    sizes : NDArray[np.int64]
+        an array of shape ``c`` containing the number of rows in each chunk
+    """
+    with open(path, "rb") as f:
+        pos = len(f.readline())
+        offsets = [pos]
+        num_rows = 0
+        last = NEWLINE
+        while block := f.read(blocksize):
+            ends = np.flatnonzero(np.frombuffer(block, np.uint8) == NEWLINE)
+            # the local index of the first newline that ends the last row of a chunk
+            start = (-num_rows - 1) % chunksize
+            offsets.extend((pos + ends[start::chunksize] + 1).tolist())
+            num_rows += len(ends)
+            pos += len(block)
+            last = block[-1]
+
+    if last != NEWLINE:
+        num_rows += 1
+    if offsets[-1] != pos:
+        offsets.append(pos)
+    sizes = np.full(len(offsets) - 1, chunksize, dtype=np.int64)
+    if len(sizes) > 0:
+        sizes[-1] = num_rows - chunksize * (len(sizes) - 1)
+
+    return np.array(offsets, dtype=np.int64), sizes
+
+
+class NotorchIterableDataset(_NotorchDatasetBase, IterableDataset[dict]):
+    """A :class:`NotorchIterableDataset` streams samples from a CSV or Parquet file that is too
+    large to be loaded into memory as a :class:`~pandas.DataFrame`.
+
+    The file is split into chunks, which are the row groups of a Parquet file or blocks of
+    :attr:`chunksize` rows of a CSV file, and only the columns required by the :attr:`transforms`,
+    :attr:`databases`, and :attr:`target_groups` are loaded. A CSV file is split once at
+    initialization via :func:`index_csv`, which scans the file for line breaks without parsing it,
+    so every chunk can be read on its own by seeking to its byte offset.
+
+    In each epoch, the chunks are concatenated (in a random order if :attr:`shuffle` is ``True``)
+    and the resulting sequence of rows is divided into contiguous, equally sized ranges, one for
+    each distributed rank, and each range is further divided between the
+    :class:`~torch.utils.data.DataLoader` workers of that rank. Every shard therefore reads only
+    the chunks overlapping its own range, and every rank yields exactly :meth:`__len__` samples
+    regardless of the format of the file, as required by DDP. If the number of rows isn't evenly
+    divisible by the number of ranks, the sequence is either padded by wrapping around to its start
+    or truncated, depending on :attr:`drop_last`.
+
+    .. note::
+        The epoch must be set via :meth:`set_epoch` for the order of the samples to change between
+        epochs, e.g., by adding a :class:`~notorch.lightning_models.callbacks.SetEpoch` callback
+        to the :class:`~lightning.pytorch.Trainer`. The epoch only reaches the workers when they're
+        started, so this has no effect with ``persistent_workers=True``.
+
+    Parameters
+    ----------
+    path : PathLike
+        the path to a CSV or Parquet file
+    transforms : Mapping[str, TransformConfig]
+        see :class:`~notorch.data.dataset.NotorchDataset`
+    target_groups : Mapping[str, TargetConfig]
+        see :class:`~notorch.data.dataset.NotorchDataset`
+    databases : Mapping[str, DatabaseConfig] | None, default=None
+        see :class:`~notorch.data.dataset.NotorchDataset`
+    chunksize : int, default=65536
+        the number of rows in each chunk of a CSV file
+    shuffle : bool, default=False
+        whether to shuffle the samples. The order of the chunks is shuffled and the samples of each
+        shard are then shuffled through a buffer of size :attr:`buffer_size`.
+    buffer_size : int, default=16384
+        the maximum number of (unfeaturized) rows to hold in the shuffle buffer
+    seed : int, default=0
+        the random seed to use for shuffling. The seed of each epoch is derived from this and the
+        value set via :meth:`set_epoch`.
+    drop_last : bool, default=False
+        whether to drop the trailing rows of the file that can't be evenly divided between the
+        distributed ranks rather than padding the last rank with rows from the start of the file
+    rank : int | None, default=None
+        the distributed rank of this process. If ``None``, it will be inferred from the default
+        process group, if it is initialized, or 0 otherwise.
+    world_size : int | None, default=None
+        the total number of distributed ranks. If ``None``, it will be inferred like :attr:`rank`.
+    """
+
+    def __init__(
+        self,
+        path: PathLike,
+        transforms: Mapping[str, TaskTransformConfig],
+        target_groups: Mapping[str, TargetConfig],
+        databases: Mapping[str, DatabaseConfig] | None = None,
+        chunksize: int = 65536,
+        shuffle: bool = False,
+        buffer_size: int = 16384,
+        seed: int = 0,
+        drop_last: bool = False,
+        rank: int | None = None,
+        world_size: int | None = None,
+    ):
+        super().__init__(transforms, target_groups, databases)
+
+        self.path = Path(path)
+        if self.path.suffix not in CSV_SUFFIXES + PARQUET_SUFFIXES:
+            raise InvalidChoiceError(self.path.suffix, CSV_SUFFIXES + PARQUET_SUFFIXES)
+
+        self.chunksize = chunksize
+        self.shuffle = shuffle
+        self.buffer_size = buffer_size
+        self.seed = seed
+        self.drop_last = drop_last
+        self.rank = rank
+        self.world_size = world_size
+        self.epoch = 0
+
+        if self.path.suffix in CSV_SUFFIXES:
+            self.file_columns = pd.read_csv(self.path, nrows=0).columns.tolist()
+            self.offsets, self.chunk_sizes = index_csv(self.path, self.chunksize)
+        else:
+            import pyarrow.parquet as pq
+
+            metadata = pq.read_metadata(self.path)
+            self.file_columns = metadata.schema.to_arrow_schema().names
+            self.offsets = None
+            self.chunk_sizes = np.array(
+                [metadata.row_group(i).num_rows for i in range(metadata.num_row_groups)],
+                dtype=np.int64,
+            )
+
+        target_columns = [c for config in self.target_groups.values() for c in config["columns"]]
+        self.usecols = [
+            c for c in dict.fromkeys([*self.in_keys, *target_columns]) if c in self.file_columns
+        ]
+
+    @property
+    def num_rows(self) -> int:
+        """The number of rows in the file."""
+        return int(self.chunk_sizes.sum())
+
+    def set_epoch(self, epoch: int) -> None:
+        """Set the epoch, which changes the shuffling order when :attr:`shuffle` is ``True``."""
+        self.epoch = epoch
+
+    def _rank_info(self) -> tuple[int, int]:
+        """Get the distributed rank of this process and the total number of ranks."""
+        if dist.is_available() and dist.is_initialized():
+            rank = dist.get_rank() if self.rank is None else self.rank
+            world_size = dist.get_world_size() if self.world_size is None else self.world_size
+        else:
+            rank = self.rank or 0
+            world_size = self.world_size or 1
+
+        return rank, world_size
+
+    def __len__(self) -> int:
+        """The number of samples yielded by the dataset in each distributed rank."""
+        _, world_size = self._rank_info()
+        if self.drop_last:
+            return self.num_rows // world_size
+
+        return -(-self.num_rows // world_size)
+
+    def _shard_range(self) -> tuple[int, int]:
+        """Get the range of positions in the sequence of rows of this epoch that belong to this
+        shard. Positions past the end of the sequence wrap around to its start."""
+        rank, _ = self._rank_info()
+        worker_info = get_worker_info()
+        if worker_info is None:
+            worker_id, num_workers = 0, 1
+        else:
+            worker_id, num_workers = worker_info.id, worker_info.num_workers
+
+        n = len(self)
+        start = rank * n + n * worker_id // num_workers
+        end = rank * n + n * (worker_id + 1) // num_workers
+
+        return start, end
+
+    def _read_chunk(self, i: int) -> pd.DataFrame:
+        """Read the ``i``-th chunk of the file."""
+        if self.path.suffix in CSV_SUFFIXES:
+            start, end = self.offsets[i], self.offsets[i + 1]
+            with open(self.path, "rb") as f:
+                f.seek(start)
+                data = f.read(end - start)
+
+            return pd.read_csv(
+                io.BytesIO(data), header=None, names=self.file_columns, usecols=self.usecols
+            )
+
+        import pyarrow.parquet as pq
+
+        return pq.ParquetFile(self.path).read_row_group(i, columns=self.usecols).to_pandas()
+
+    def _iter_chunks(self, start: int, end: int) -> Iterator[pd.DataFrame]:
+        """Iterate over the rows at the input range of positions in the sequence of rows of this
+        epoch, one (partial) chunk at a time."""
+        chunks = np.arange(len(self.chunk_sizes))
+        if self.shuffle:
+            chunks = np.random.default_rng([self.seed, self.epoch]).permutation(chunks)
+        bounds = np.cumsum([0, *self.chunk_sizes[chunks]])
+        num_rows = bounds[-1]
+
+        pos = start
+        while pos < end:
+            i = np.searchsorted(bounds, pos % num_rows, side="right") - 1
+            local_start = pos % num_rows - bounds[i]
+            local_end = min(bounds[i + 1] - bounds[i], local_start + end - pos)
+            pos += local_end - local_start
+
+            yield self._read_chunk(chunks[i]).iloc[local_start:local_end]
+
+    def _iter_rows(self, start: int, end: int) -> Iterator[dict]:
+        for chunk in self._iter_chunks(start, end):
+            columns = {key: chunk[key].to_numpy() for key in self.in_keys if key in chunk.columns}
+            targets = {
+                name: torch.as_tensor(chunk[config["columns"]].values).to(torch.float)
+                for name, config in self.target_groups.items()
+            }
+
+            for i in range(len(chunk)):
+                sample = {key: column[i] for key, column in columns.items()}
+                for name, T in targets.items():
+                    # clone so that buffered samples don't keep entire chunks alive
+                    sample[name] = T[i].clone()
+
+                yield sample
+
+    def __iter__(self) -> Iterator[dict]:
+        start, end = self._shard_range()
+        rows = self._iter_rows(start, end)
+
+        if not self.shuffle:
+            for sample in rows:
+                yield self.update(sample)
+
+            return
+
+        rg = np.random.default_rng([self.seed, self.epoch, start])
+        buffer = []
+        for sample in rows:
+            if len(buffer) < self.buffer_size:
+                buffer.append(sample)
+                continue
+
+            j = rg.integers(len(buffer))
+            buffer[j], sample = sample, buffer[j]
+
+            yield self.update(sample)
+
+        rg.shuffle(buffer)
+        for sample in buffer:
+            yield self.update(sample)
@@ -1,4 +1,4 @@
-from collections.abc import Collection
+from collections.abc import Collection, Sequence
 from dataclasses import dataclass
 import textwrap
 from typing import Protocol
@@ -16,6 +16,7 @@ class Manager(Protocol):
 
     def update(self, sample: dict) -> dict: ...
     def collate(self, samples: Collection[dict]): ...
+    def apply_batch(self, samples: Sequence[dict]): ...
 
 
 @dataclass
@@ -52,6 +53,10 @@ class TransformManager(Manager):
 
         return self.transform.collate(inputs)
 
+    def apply_batch(self, samples: Sequence[dict]):
+        """Transform and collate the inputs of a batch of samples in one step."""
+        return self.transform.transform_batch([sample[self.in_key] for sample in samples])
+
     def __repr__(self) -> str:
         text = "\n".join(
             [
@@ -86,6 +91,10 @@ class DatabaseManager(Manager):
 
         return self.database.collate(inputs)
 
+    def apply_batch(self, samples: Sequence[dict]):
+        """Read and collate the values for a batch of samples in one step."""
+        return self.database.get_batch([sample[self.in_key] for sample in samples])
+
     def __repr__(self) -> str:
         text = "\n".join(
             [
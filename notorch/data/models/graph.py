@@ -1,18 +1,21 @@
-from dataclasses import InitVar, dataclass, field
-import textwrap
 from typing import Iterable, Self
 
 from jaxtyping import Float, Int
+from tensordict import tensorclass
 import torch
 from torch import Tensor
-from torch.types import Device
+from torch.nn import functional as F
 
-from notorch.conf import REPR_INDENT
 
-
-@dataclass(repr=False, eq=False)
+@tensorclass
 class Graph:
-    """A :class:`Graph` represents the feature representation of graph."""
+    """A :class:`Graph` represents the feature representation of graph.
+
+    A :class:`Graph` is a :func:`~tensordict.tensorclass`, so it supports the same bulk operations
+    as a :class:`~tensordict.TensorDict` (e.g., ``to()``, ``pin_memory()``, ``share_memory_()``,
+    ``memmap_()``, and ``apply()``), both on its own and when placed inside one. Its tensors have
+    no common leading dimension, so its ``batch_size`` is always empty.
+    """
 
     V: Int[Tensor, "V t_v"]
     """a tensor of shape ``|V| x t_v`` containing the vertex types of the graph"""
@@ -23,11 +26,6 @@ class Graph:
     rev_index: Int[Tensor, "E"]
     """a tensor of shape ``E`` that maps from an edge index to the index of the source of the
     reverse edge in :attr:`edge_index` attribute."""
-    device_: InitVar[Device] = field(default=None, kw_only=True)
-
-    def __post_init__(self, device_: Device):
-        self.__device = device_
-        self.to(device_)
 
     @property
     def num_nodes(self) -> int:
@@ -37,20 +35,6 @@ class Graph:
     def num_edges(self) -> int:
         return len(self.E)
 
-    @property
-    def device(self) -> Device:
-        return self.__device
-
-    def to(self, device: Device) -> Self:
-        self.__device = device
-
-        self.V = self.V.to(device)
-        self.E = self.E.to(device)
-        self.edge_index = self.edge_index.to(device)
-        self.rev_index = self.rev_index.to(device)
-
-        return self
-
     @property
     def A(self) -> Int[Tensor, "V V"]:
         """The dense adjacency matrix."""
@@ -145,25 +129,8 @@ class Graph:
 
         return (node_ids, edge_ids)
 
-    def __repr__(self) -> str:
-        lines = (
-            [f"{self.__class__.__name__}("]
-            + [textwrap.indent(line, REPR_INDENT) for line in self._build_field_info()]
-            + [")"]
-        )
-
-        return "\n".join(lines)
-
-    def _build_field_info(self) -> list[str]:
-        return [
-            f"V: Tensor(shape={self.V.shape})",
-            f"E: Tensor(shape={self.E.shape})",
-            f"device={self.__device}",
-            "",
-        ]
 
-
-@dataclass(repr=False, eq=False, kw_only=True)
+@tensorclass
 class BatchedGraph(Graph):
     """A :class:`BatchedMolGraph` represents a batch of individual :class:`Graph`s."""
 
@@ -173,74 +140,80 @@ class BatchedGraph(Graph):
     batch_edge_index: Int[Tensor, "E"]
     """A tensor of shape ``E`` containing the index of the parent :class:`Graph` of each edge the
     batched graph."""
-    size: InitVar[int | None] = None
-    """The number of graphs, if known. Otherwise, will be estimated via
+    node_ptr: Int[Tensor, "b+1"] | None = None
+    """A tensor of shape ``b + 1`` containing CSR-style offsets such that the nodes of the ``i``-th
+    graph are ``node_ptr[i]:node_ptr[i+1]``. If ``None``, will be computed from
+    :attr:`batch_node_index`"""
+    edge_ptr: Int[Tensor, "b+1"] | None = None
+    """A tensor of shape ``b + 1`` containing CSR-style offsets such that the edges of the ``i``-th
+    graph are ``edge_ptr[i]:edge_ptr[i+1]``. If ``None``, will be computed from
+    :attr:`batch_edge_index`. In that case, the number of graphs will be estimated via
     :code:`batch_node_index.max() + 1`"""
 
-    def __post_init__(self, device_: torch.device | str | int | None, size: int | None):
-        super().__post_init__(device_)
-
-        self.__size = self.batch_node_index.max() + 1 if size is None else size
+    def __post_init__(self):
+        if self.node_ptr is None:
+            counts = torch.bincount(self.batch_node_index)
+            self.node_ptr = F.pad(counts.cumsum(0), [1, 0])
+        if self.edge_ptr is None:
+            counts = torch.bincount(self.batch_edge_index, minlength=len(self))
+            self.edge_ptr = F.pad(counts.cumsum(0), [1, 0])
 
     @classmethod
-    def from_graphs(cls, Gs: Iterable[Graph]):
-        Vs = []
-        Es = []
-        edge_indices = []
-        rev_indices = []
-        batch_node_indices = []
-        batch_edge_indices = []
-        offset = 0
-
-        for i, G in enumerate(Gs):
-            Vs.append(G.V)
-            Es.append(G.E)
-            edge_indices.append(G.edge_index + offset)
-            rev_indices.append(G.rev_index + offset)
-            batch_node_indices.extend([i] * len(G.V))
-            batch_edge_indices.extend([i] * len(G.E))
-
-            offset += len(G.V)
-
-        V = torch.cat(Vs, dim=0)
-        E = torch.cat(Es, dim=0)
-        edge_index = torch.cat(edge_indices, dim=1).long()
-        rev_index = torch.cat(rev_indices, dim=0).long()
-        batch_node_index = torch.tensor(batch_node_indices, dtype=torch.long)
-        batch_edge_index = torch.tensor(batch_edge_indices, dtype=torch.long)
-        size = i + 1
+    def from_graphs(cls, Gs: Iterable[Graph], out: Self | None = None) -> Self:
+        """Collate the input graphs into a single :class:`BatchedGraph`.
+
+        Parameters
+        ----------
+        Gs : Iterable[Graph]
+            the graphs to collate
+        out : BatchedGraph | None, default=None
+            a previously collated batch whose node, edge, and index tensors will be overwritten in
+            place (and resized, if necessary) rather than allocating new ones. The input batch
+            must no longer be in use.
+
+        Returns
+        -------
+        BatchedGraph
+            the batched graph. If :attr:`out` was supplied, its tensors will share storage with
+            those of the returned batch.
+        """
+        Gs = list(Gs)
+
+        num_nodes = torch.tensor([G.num_nodes for G in Gs])
+        num_edges = torch.tensor([G.num_edges for G in Gs])
+        node_ptr = F.pad(num_nodes.cumsum(0), [1, 0])
+        edge_ptr = F.pad(num_edges.cumsum(0), [1, 0])
+        batch_index = torch.arange(len(Gs))
+        batch_node_index = batch_index.repeat_interleave(num_nodes)
+        batch_edge_index = batch_index.repeat_interleave(num_edges)
+
+        if out is None:
+            outs = dict(V=None, E=None, edge_index=None, rev_index=None)
+        else:
+            # empty the output tensors (keeping their storage) so that `cat()` may resize them
+            outs = {
+                key: getattr(out, key).resize_(0) for key in ["V", "E", "edge_index", "rev_index"]
+            }
+
+        V = torch.cat([G.V for G in Gs], dim=0, out=outs["V"])
+        E = torch.cat([G.E for G in Gs], dim=0, out=outs["E"])
+        edge_index = torch.cat([G.edge_index.long() for G in Gs], dim=1, out=outs["edge_index"])
+        rev_index = torch.cat([G.rev_index.long() for G in Gs], dim=0, out=outs["rev_index"])
+        edge_index += node_ptr[batch_edge_index]
+        rev_index += edge_ptr[batch_edge_index]
 
         return cls(
             V,
             E,
             edge_index,
             rev_index,
-            device_=G.device,
             batch_node_index=batch_node_index,
             batch_edge_index=batch_edge_index,
-            size=size,
+            node_ptr=node_ptr,
+            edge_ptr=edge_ptr,
+            device=Gs[0].device,
         )
 
     def __len__(self) -> int:
         """The number of individual :class:`Graph`s in this batch"""
-        return self.__size
-
-    def to(self, device: Device) -> Self:
-        self.__device = device
-
-        self.V = self.V.to(device)
-        self.E = self.E.to(device)
-        self.edge_index = self.edge_index.to(device)
-        self.rev_index = self.rev_index.to(device)
-        self.batch_node_index = self.batch_node_index.to(device)
-        self.batch_edge_index = self.batch_edge_index.to(device)
-
-        return self
-
-    def _build_field_info(self) -> list[str]:
-        return [
-            f"V: Tensor(shape={self.V.shape})",
-            f"E: Tensor(shape={self.E.shape})",
-            f"device={self.__device}",
-            f"batch_size={len(self)}" "",
-        ]
+        return len(self.node_ptr) - 1
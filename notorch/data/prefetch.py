@@ -0,0 +1,171 @@
+from collections.abc import Callable, Iterable, Iterator
+import queue
+import threading
+import time
+from typing import Any, NamedTuple
+
+from tensordict import TensorDict
+import torch
+from torch.types import Device
+
+_SENTINEL = object()
+
+
+class PrefetchInfo(NamedTuple):
+    num_batches: int
+    """the number of batches consumed"""
+    queue_depth: float
+    """the mean number of ready batches in the queue when a batch was requested"""
+    stall_time: float
+    """the total time (in seconds) spent waiting for a batch to be ready"""
+
+    @property
+    def mean_stall_time(self) -> float:
+        return self.stall_time / self.num_batches if self.num_batches > 0 else 0.0
+
+
+class PrefetchLoader:
+    """A :class:`PrefetchLoader` prepares the next batches of a loader in a background thread.
+
+    When a :class:`~torch.utils.data.DataLoader` is run with ``num_workers=0``, collation (e.g.,
+    :meth:`~notorch.data.dataset.NotorchDataset.collate`) runs serially with the training step.
+    Wrapping the loader in a :class:`PrefetchLoader` overlaps the two: a background thread
+    iterates over the loader, applies the optional batch-level :attr:`transform`, moves each batch
+    to the target :attr:`device`, and places up to :attr:`num_batches` ready batches into a
+    queue. Most of the work in collation and featurization happens in native code that releases
+    the GIL, so this overlaps well with the (mostly native) training step.
+
+    Any attribute not defined here (e.g., ``dataset`` or ``sampler``) is looked up on the wrapped
+    loader.
+
+    Parameters
+    ----------
+    loader : Iterable[TensorDict]
+        the loader to wrap
+    num_batches : int, default=2
+        the maximum number of batches to prepare ahead of time
+    device : Device | None, default=None
+        the device to which each batch will be moved. If ``None``, batches are not moved.
+    transform : Callable[[TensorDict], TensorDict] | None, default=None
+        a function to apply to each batch in the background thread before moving it to the device
+    pin_memory : bool, default=False
+        whether to pin each batch before moving it to a CUDA device. This allows the transfer to
+        proceed asynchronously on a separate CUDA stream.
+    """
+
+    def __init__(
+        self,
+        loader: Iterable[TensorDict],
+        num_batches: int = 2,
+        device: Device | None = None,
+        transform: Callable[[TensorDict], TensorDict] | None = None,
+        pin_memory: bool = False,
+    ):
+        if num_batches < 1:
+            raise ValueError(f"arg 'num_batches' must be >= 1! got: {num_batches}")
+
+        self.loader = loader
+        self.num_batches = num_batches
+        self.device = None if device is None else torch.device(device)
+        self.transform = transform
+        self.pin_memory = pin_memory
+
+        self.__num_consumed = 0
+        self.__total_depth = 0
+        self.__stall_time = 0.0
+
+    def __getattr__(self, name: str) -> Any:
+        if name == "loader":
+            raise AttributeError(name)
+
+        return getattr(self.loader, name)
+
+    def __len__(self) -> int:
+        return len(self.loader)
+
+    def prefetch_info(self) -> PrefetchInfo:
+        """Get the :class:`PrefetchInfo` of the batches consumed since the last call to
+        :meth:`prefetch_clear`."""
+        n = self.__num_consumed
+
+        return PrefetchInfo(n, self.__total_depth / n if n > 0 else 0.0, self.__stall_time)
+
+    def prefetch_clear(self) -> None:
+        """Reset the prefetch statistics."""
+        self.__num_consumed = 0
+        self.__total_depth = 0
+        self.__stall_time = 0.0
+
+    def _prepare(self, batch: TensorDict, stream: torch.cuda.Stream | None) -> TensorDict:
+        if self.transform is not None:
+            batch = self.transform(batch)
+        if self.device is None:
+            return batch
+
+        if stream is None:
+            return batch.to(self.device)
+
+        if self.pin_memory:
+            batch = batch.pin_memory()
+        with torch.cuda.stream(stream):
+            batch = batch.to(self.device, non_blocking=self.pin_memory)
+        stream.synchronize()
+
+        return batch
+
+    def _produce(self, q: queue.Queue, stop: threading.Event):
+        stream = (
+            torch.cuda.Stream(self.device)
+            if self.device is not None and self.device.type == "cuda"
+            else None
+        )
+
+        def put(item) -> bool:
+            while not stop.is_set():
+                try:
+                    q.put(item, timeout=0.1)
+                    return True
+                except queue.Full:
+                    continue
+
+            return False
+
+        try:
+            for batch in self.loader:
+                if not put(self._prepare(batch, stream)):
+                    return
+        except BaseException as e:
+            put(e)
+            return
+
+        put(_SENTINEL)
+
+    def __iter__(self) -> Iterator[TensorDict]:
+        q = queue.Queue(maxsize=self.num_batches)
+        stop = threading.Event()
+        thread = threading.Thread(target=self._produce, args=(q, stop), daemon=True)
+        thread.start()
+
+        try:
+            while True:
+                depth = q.qsize()
+                start = time.perf_counter()
+                item = q.get()
+                if item is _SENTINEL:
+                    break
+                if isinstance(item, BaseException):
+                    raise item
+
+                self.__stall_time += time.perf_counter() - start
+                self.__total_depth += depth
+                self.__num_consumed += 1
+
+                if self.device is not None and self.device.type == "cuda":
+                    # the batch was allocated on the prefetch stream, so mark it as in use by the
+                    # current stream to keep the allocator from reusing its memory too early
+                    item.record_stream(torch.cuda.current_stream(self.device))
+
+                yield item
+        finally:
+            stop.set()
+            thread.join()
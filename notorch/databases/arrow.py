@@ -0,0 +1,212 @@
+from collections.abc import Iterator, Sequence
+from dataclasses import dataclass, field
+import os
+from os import PathLike
+from pathlib import Path
+from typing import Self
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.ipc as ipc
+import pyarrow.parquet as pq
+from torch import Tensor
+
+from notorch.databases.base import Database
+from notorch.utils.mixins import CollateNDArrayMixin
+
+PARQUET_SUFFIXES = (".parquet", ".pq")
+IPC_SUFFIX = ".arrow"
+
+
+def parquet_to_ipc(
+    path: PathLike, ipc_path: PathLike | None = None, batch_size: int = 65536
+) -> Path:
+    """Convert a Parquet file to an uncompressed Arrow IPC file that can be memory-mapped.
+
+    The table is streamed one record batch at a time, so the file may be larger than memory. The
+    conversion is skipped if the IPC file already exists and is newer than the Parquet file.
+
+    Parameters
+    ----------
+    path : PathLike
+        the path to the Parquet file
+    ipc_path : PathLike | None, default=None
+        the path at which to write the IPC file. If ``None``, use :attr:`path` with the suffix
+        ``.arrow``.
+    batch_size : int, default=65536
+        the maximum number of rows in each record batch of the IPC file
+
+    Returns
+    -------
+    Path
+        the path to the IPC file
+    """
+    path = Path(path)
+    ipc_path = path.with_suffix(IPC_SUFFIX) if ipc_path is None else Path(ipc_path)
+    if ipc_path.exists() and ipc_path.stat().st_mtime >= path.stat().st_mtime:
+        return ipc_path
+
+    pf = pq.ParquetFile(path)
+    tmp_path = ipc_path.with_suffix(f".{os.getpid()}.tmp")
+    with pa.OSFile(str(tmp_path), "wb") as sink, ipc.new_file(sink, pf.schema_arrow) as writer:
+        for batch in pf.iter_batches(batch_size):
+            writer.write_batch(batch)
+    os.replace(tmp_path, ipc_path)
+
+    return ipc_path
+
+
+def _column_width(type: pa.DataType) -> int:
+    """Get the number of features in each row of a column of the input type."""
+    if pa.types.is_fixed_size_list(type):
+        return type.list_size * _column_width(type.value_type)
+    if pa.types.is_integer(type) or pa.types.is_floating(type):
+        return 1
+
+    raise TypeError(
+        f"unsupported column type: `{type}`! "
+        "Only numeric columns and (nested) fixed-size lists of numbers can be memory-mapped."
+    )
+
+
+def _leaf_type(type: pa.DataType) -> np.dtype:
+    """Get the dtype of the numbers in a column of the input type."""
+    while pa.types.is_fixed_size_list(type):
+        type = type.value_type
+
+    return np.dtype(type.to_pandas_dtype())
+
+
+def _to_numpy(column: pa.Array, width: int) -> np.ndarray:
+    """Get a zero-copy view of a column as an array of shape ``n x width``."""
+    if column.null_count > 0:
+        raise ValueError(f"column contains {column.null_count} null values!")
+    while pa.types.is_fixed_size_list(column.type):
+        column = column.flatten()
+
+    return column.to_numpy(zero_copy_only=True).reshape(-1, width)
+
+
+@dataclass
+class ArrowDatabase(CollateNDArrayMixin, Database[int, np.ndarray, Tensor]):
+    """An :class:`ArrowDatabase` reads the rows of a table stored in a memory-mapped Arrow IPC file.
+
+    The value of each row is the concatenation of the projected :attr:`columns`, each of which may
+    either be a numeric column, which contributes one feature, or a fixed-size list of numbers
+    (e.g., a fingerprint or embedding), which contributes one feature per item. Opening the
+    database only reads the schema and the record batch boundaries of the file, so the time to
+    load it is independent of the size of the table, and a batch of rows is gathered from the
+    mapped file into the collated output tensor without ever materializing the table in memory.
+
+    The file is mapped lazily in each process that accesses it (e.g., each
+    :class:`~torch.utils.data.DataLoader` worker) and unmapped when the database is pickled.
+
+    Parameters
+    ----------
+    path : PathLike
+        the path to either an uncompressed Arrow IPC file or a Parquet file. A Parquet file is
+        converted once to an IPC file via :func:`parquet_to_ipc`, and the existing IPC file is
+        reused afterwards.
+    columns : Sequence[str] | None, default=None
+        the columns to read. If ``None``, read every column in the table.
+    ipc_path : PathLike | None, default=None
+        the path of the converted IPC file if :attr:`path` is a Parquet file. See
+        :func:`parquet_to_ipc` for details.
+    """
+
+    path: PathLike
+    columns: Sequence[str] | None = None
+    ipc_path: PathLike | None = field(default=None, repr=False)
+
+    widths: list[int] = field(init=False, repr=False)
+    offsets: np.ndarray = field(init=False, repr=False)
+    shape: tuple[int, ...] = field(init=False)
+    dtype: np.dtype = field(init=False, repr=False)
+    _arrays: list[list[np.ndarray]] | None = field(init=False, default=None, repr=False)
+    _pid: int | None = field(init=False, default=None, repr=False)
+
+    def __post_init__(self):
+        self.path = Path(self.path)
+        if self.path.suffix in PARQUET_SUFFIXES:
+            self.ipc_path = parquet_to_ipc(self.path, self.ipc_path)
+        else:
+            self.ipc_path = self.path
+
+        with pa.memory_map(str(self.ipc_path), "r") as source:
+            reader = ipc.open_file(source)
+            schema = reader.schema
+            self.columns = schema.names if self.columns is None else list(self.columns)
+            self.widths = [_column_width(schema.field(name).type) for name in self.columns]
+            sizes = [reader.get_batch(i).num_rows for i in range(reader.num_record_batches)]
+
+        self.offsets = np.cumsum([0, *sizes])
+        self.shape = (int(self.offsets[-1]), sum(self.widths))
+        self.dtype = np.result_type(*[_leaf_type(schema.field(c).type) for c in self.columns])
+
+    @property
+    def arrays(self) -> list[list[np.ndarray]]:
+        """zero-copy views of each projected column (of shape ``n_i x width``) of each record
+        batch in the file, mapped lazily so that each worker process receives its own map."""
+        if self._arrays is None or self._pid != os.getpid():
+            with pa.memory_map(str(self.ipc_path), "r") as source:
+                reader = ipc.open_file(source)
+                batches = [reader.get_batch(i) for i in range(reader.num_record_batches)]
+            self._arrays = [
+                [_to_numpy(b.column(name), w) for name, w in zip(self.columns, self.widths)]
+                for b in batches
+            ]
+            self._pid = os.getpid()
+
+        return self._arrays
+
+    def __len__(self) -> int:
+        return self.shape[0]
+
+    def __getitem__(self, idx: int) -> np.ndarray:
+        if not -len(self) <= idx < len(self):
+            raise IndexError(f"index {idx} is out of range for database of size {len(self)}!")
+
+        idx = idx % len(self)
+        i = np.searchsorted(self.offsets, idx, side="right") - 1
+
+        return np.concatenate([X[idx - self.offsets[i]] for X in self.arrays[i]])
+
+    def __iter__(self) -> Iterator[int]:
+        return iter(range(len(self)))
+
+    def get_batch(self, idxs: Sequence[int]) -> Tensor:
+        if len(self.arrays) == 1 and len(self.columns) == 1:
+            return self.gather(self.arrays[0][0], idxs)
+
+        idxs = np.array(idxs, dtype=np.int64, ndmin=1)
+        if len(idxs) > 0 and not (-len(self) <= idxs.min() and idxs.max() < len(self)):
+            raise IndexError(f"index out of range for database of size {len(self)}!")
+        idxs[idxs < 0] += len(self)
+
+        out = self._collate_buffer((len(idxs), self.shape[1]))
+        out_np = out.numpy()
+        batch_idxs = np.searchsorted(self.offsets, idxs, side="right") - 1
+        order = np.argsort(batch_idxs, kind="stable")
+        uniq_batch_idxs, starts = np.unique(batch_idxs[order], return_index=True)
+        bounds = np.cumsum([0, *self.widths])
+
+        for i, rows in zip(uniq_batch_idxs, np.split(order, starts[1:])):
+            local_idxs = idxs[rows] - self.offsets[i]
+            for X, start, stop in zip(self.arrays[i], bounds[:-1], bounds[1:]):
+                out_np[rows, start:stop] = X[local_idxs]
+
+        return out
+
+    def __getstate__(self) -> dict:
+        state = super().__getstate__()
+        state["_arrays"] = None
+        state["_pid"] = None
+
+        return state
+
+    def __enter__(self) -> Self:
+        return self
+
+    def __exit__(self, *exc):
+        self._arrays = None
+        self._pid = None
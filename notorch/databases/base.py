@@ -1,5 +1,5 @@
 from abc import abstractmethod
-from collections.abc import Collection, Mapping
+from collections.abc import Collection, Mapping, Sequence
 
 # from contextlib import AbstractContextManager
 
@@ -15,3 +15,11 @@ class Database[KT, VT, VT_batched](Mapping[KT, VT]):
 
     @abstractmethod
     def collate(self, values: Collection[VT]) -> VT_batched: ...
+
+    def get_batch(self, keys: Sequence[KT]) -> VT_batched:
+        """Get the collated values of the input keys.
+
+        By default, this is equivalent to calling :meth:`collate` on the value of each key.
+        Subclasses that support vectorized reads should override this.
+        """
+        return self.collate([self[key] for key in keys])
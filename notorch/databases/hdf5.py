@@ -1,25 +1,80 @@
-from collections.abc import Iterator
+from collections.abc import Iterator, Sequence
 from dataclasses import dataclass, field
+import os
 from os import PathLike
 from typing import Final, Self
 
 import h5py
 import numpy as np
+from numpy.typing import ArrayLike
 from torch import Tensor
 
 from notorch.databases.base import Database
-from notorch.exceptions import ClosedDatabaseError
 from notorch.utils.mixins import CollateNDArrayMixin
+from notorch.utils.quantize import Precision, Quantizer, quantize_array
+from notorch.utils.shared import share
+
+
+def save_hdf5(
+    path: PathLike, dataset: str, X: ArrayLike, precision: Precision | None = None, **kwargs
+) -> None:
+    """Save the input array to a dataset of an HDF5 file, optionally quantizing it.
+
+    Parameters
+    ----------
+    path : PathLike
+        the path to the file, which will be created if it doesn't exist
+    dataset : str
+        the name of the dataset
+    X : ArrayLike
+        the array to save
+    precision : {"float16", "bfloat16", "int8"} | None, default=None
+        the precision in which to store the array. If ``None``, store the array as-is. The
+        quantization metadata is stored in the attributes of the dataset and loaded automatically
+        by :class:`HDF5Database` and :class:`HDF5DatabaseOnDisk`.
+    **kwargs
+        additional keyword arguments to supply to :meth:`h5py.Group.create_dataset` (e.g.,
+        ``chunks``)
+    """
+    X, quantizer = quantize_array(np.asarray(X), None, precision)
+    with h5py.File(path, "a") as h5f:
+        dset = h5f.create_dataset(dataset, data=X, **kwargs)
+        if quantizer is not None:
+            # HDF5 attributes can't hold numpy unicode arrays
+            dset.attrs.update(quantizer.to_metadata() | {"precision": quantizer.precision})
 
 
 @dataclass
 class HDF5Database(CollateNDArrayMixin, Database[int, np.ndarray, Tensor]):
+    """An :class:`HDF5Database` loads an HDF5 dataset into memory.
+
+    Parameters
+    ----------
+    path : PathLike
+        the path to the HDF5 file
+    dataset : str
+        the name of the dataset inside the file
+    precision : {"float16", "bfloat16", "int8"} | None, default=None
+        the precision in which to hold the dataset in memory, which is dequantized to
+        :attr:`collate_dtype` when it's read. If ``None``, use the precision in which the
+        dataset is stored. A dataset that was quantized by :func:`save_hdf5` is always loaded in
+        its stored precision, so this is only needed to quantize a full-precision dataset when
+        it's loaded.
+    """
+
     path: Final[PathLike]
     dataset: Final[str]
+    precision: Precision | None = None
+
+    quantizer: Quantizer | None = field(init=False, default=None, repr=False)
 
     def __post_init__(self):
         with h5py.File(self.path) as h5f:
-            self.X = h5f[self.dataset][:]
+            X = h5f[self.dataset]
+            quantizer = Quantizer.from_metadata(X.attrs)
+            X = X[:]
+
+        self.X, self.quantizer = quantize_array(X, quantizer, self.precision)
 
     @property
     def shape(self) -> tuple[int, ...]:
@@ -29,47 +84,143 @@ class HDF5Database(CollateNDArrayMixin, Database[int, np.ndarray, Tensor]):
         return len(self.X)
 
     def __getitem__(self, idx: int) -> np.ndarray:
-        return self.X[idx]
+        return self._dequantize_row(self.X[idx])
 
-    def __iter__(self) -> Iterator[int]:
-        return iter(self.X)
+    def __iter__(self) -> Iterator[np.ndarray]:
+        return (self[i] for i in range(len(self)))
+
+    def get_batch(self, idxs: Sequence[int]) -> Tensor:
+        return self.gather(self.X, idxs)
+
+    def share_memory_(self) -> Self:
+        """Move the in-memory data of this database to shared memory. See
+        :func:`~notorch.utils.shared.share` for details."""
+        if not isinstance(self.X, np.memmap):
+            self.X = share(self.X, type(self).__name__.lower())
+
+        return self
 
 
 @dataclass
-class __HDF5DatabaseOnDisk(HDF5Database):
+class HDF5DatabaseOnDisk(CollateNDArrayMixin, Database[int, np.ndarray, Tensor]):
+    """An :class:`HDF5DatabaseOnDisk` reads the rows of an HDF5 dataset from disk on demand, so the
+    dataset may be larger than memory.
+
+    The file is opened lazily in each process that accesses it (e.g., each
+    :class:`~torch.utils.data.DataLoader` worker) and closed when the database is pickled. A batch
+    of rows is read via :meth:`get_batch` by sorting the unique indices of the batch and reading
+    each run of nearby indices as a single contiguous hyperslab rather than reading one row at a
+    time.
+
+    Parameters
+    ----------
+    path : PathLike
+        the path to the HDF5 file
+    dataset : str
+        the name of the dataset inside the file
+    rdcc_nbytes : int, default=2**24
+        the size (in bytes) of the raw data chunk cache of the file. This should be large enough
+        to hold every chunk touched by a batch.
+    rdcc_nslots : int | None, default=None
+        the number of chunk slots in the cache. If ``None``, use the default of :mod:`h5py`
+    rdcc_w0 : float | None, default=None
+        the chunk preemption policy of the cache. If ``None``, use the default of :mod:`h5py`
+    max_gap : int | None, default=None
+        the largest gap (in rows) between two sorted indices of a batch that will be read as part
+        of the same hyperslab. If ``None``, use the number of rows in a chunk of the dataset, as
+        those rows are read from disk regardless, or 0 if the dataset isn't chunked.
+
+
+    .. note::
+        A dataset that was quantized by :func:`save_hdf5` is read in its stored precision and
+        dequantized to :attr:`collate_dtype` by :meth:`get_batch` and :meth:`__getitem__`.
+    """
+
     path: Final[PathLike]
     dataset: Final[str]
-
-    shape: Final[tuple[int, ...]] = field(init=False, repr=True)
-    h5f: h5py.File | None = field(init=False, default=None, repr=False)
-    dataset: h5py.Dataset | None = field(init=False, default=None, repr=False)
+    rdcc_nbytes: int = 2**24
+    rdcc_nslots: int | None = None
+    rdcc_w0: float | None = None
+    max_gap: int | None = None
+
+    shape: tuple[int, ...] = field(init=False)
+    dtype: np.dtype = field(init=False, repr=False)
+    chunks: tuple[int, ...] | None = field(init=False, repr=False)
+    quantizer: Quantizer | None = field(init=False, default=None, repr=False)
+    _h5f: h5py.File | None = field(init=False, default=None, repr=False)
+    _pid: int | None = field(init=False, default=None, repr=False)
 
     def __post_init__(self):
-        with h5py.File(self.path) as h5f:
-            self.shape = h5f[self.dataset].shape
+        with h5py.File(self.path, "r") as h5f:
+            X = h5f[self.dataset]
+            self.shape, self.dtype, self.chunks = X.shape, X.dtype, X.chunks
+            self.quantizer = Quantizer.from_metadata(X.attrs)
+
+        if self.max_gap is None:
+            self.max_gap = 0 if self.chunks is None else self.chunks[0]
+
+    @property
+    def X(self) -> h5py.Dataset:
+        """the dataset in the file, opened lazily so that each worker process receives its own
+        file handle."""
+        if self._h5f is None or self._pid != os.getpid():
+            kwargs = dict(rdcc_nslots=self.rdcc_nslots, rdcc_w0=self.rdcc_w0)
+            kwargs = {k: v for k, v in kwargs.items() if v is not None}
+            self._h5f = h5py.File(self.path, "r", rdcc_nbytes=self.rdcc_nbytes, **kwargs)
+            self._pid = os.getpid()
+
+        return self._h5f[self.dataset]
 
     def __len__(self) -> int:
         return self.shape[0]
 
     def __getitem__(self, idx: int) -> np.ndarray:
-        try:
-            return self.dataset[idx]
-        except TypeError as e:
-            raise ClosedDatabaseError(type(self)) from e
+        return self._dequantize_row(self.X[idx])
 
-    def __enter__(self) -> Self:
-        self.h5f = h5py.File(self.path, "r")
-        self.dataset = self.h5f[self.dataset]
+    def __iter__(self) -> Iterator[int]:
+        return iter(range(len(self)))
+
+    def get_batch(self, idxs: Sequence[int]) -> Tensor:
+        return self._collate_stored(self.read_batch(idxs))
+
+    def read_batch(self, idxs: Sequence[int]) -> np.ndarray:
+        """Read the rows at the input indices into a new array in their storage format without
+        collating them."""
+        idxs = np.asarray(idxs, dtype=np.int64).reshape(-1)
+        if len(idxs) == 0:
+            return np.empty((0, *self.shape[1:]), self.dtype)
+
+        idxs = np.where(idxs < 0, idxs + len(self), idxs)
+        uniq_idxs, inverse = np.unique(idxs, return_inverse=True)
 
+        X = self.X
+        out = np.empty((len(uniq_idxs), *self.shape[1:]), self.dtype)
+        splits = np.flatnonzero(np.diff(uniq_idxs) > self.max_gap + 1) + 1
+        for i, j in zip([0, *splits], [*splits, len(uniq_idxs)]):
+            start, stop = uniq_idxs[i], uniq_idxs[j - 1] + 1
+            if stop - start == j - i:
+                X.read_direct(out, np.s_[start:stop], np.s_[i:j])
+            else:
+                out[i:j] = X[start:stop][uniq_idxs[i:j] - start]
+
+        return out[inverse]
+
+    def close(self) -> None:
+        if self._h5f is not None and self._pid == os.getpid():
+            self._h5f.close()
+
+        self._h5f = None
+        self._pid = None
+
+    def __enter__(self) -> Self:
         return self
 
     def __exit__(self, *exc):
-        if self.h5f is not None:
-            self.h5f.close()
+        self.close()
 
-        self.h5f = None
-        self.dataset = None
+    def __getstate__(self) -> dict:
+        state = super().__getstate__()
+        state["_h5f"] = None
+        state["_pid"] = None
 
-    def __iter__(self) -> Iterator[int]:
-        with self:
-            return iter(range(len(self)))
+        return state
@@ -0,0 +1,205 @@
+from collections.abc import Collection, Iterator, Sequence
+from dataclasses import dataclass, field
+from os import PathLike
+from pathlib import Path
+from typing import Self
+
+import numpy as np
+from numpy.typing import ArrayLike, NDArray
+import pandas as pd
+
+from notorch.databases.base import Database
+
+HASHES_NAME = "hashes.npy"
+ROWS_NAME = "rows.npy"
+COLLISIONS_NAME = "collisions.npz"
+COLLISION = -1
+"""the row stored for a hash that is shared by more than one key"""
+
+
+def hash_keys(keys: ArrayLike) -> NDArray[np.uint64]:
+    """Calculate the stable 64-bit hash of each of the input string keys."""
+    return pd.util.hash_array(np.asarray(keys, dtype=object), categorize=False)
+
+
+@dataclass
+class KeyIndex:
+    """A :class:`KeyIndex` is a compact on-disk index from string keys (e.g., canonical SMILES or
+    InChIKeys) to integer rows.
+
+    The index stores the sorted 64-bit hashes of its keys alongside the row of each hash, so a
+    batch of keys is looked up with a single :func:`numpy.searchsorted` in :math:`O(\\log n)`
+    time per key. Both arrays are memory-mapped (and remapped rather than copied when the index is
+    pickled), so every process (e.g., each :class:`~torch.utils.data.DataLoader` worker) shares the
+    same pages rather than holding its own copy of the keys. The few keys whose hashes collide are
+    stored explicitly in a separate table that is loaded into memory.
+
+    .. note::
+        The keys themselves aren't stored, so looking up a key that isn't in the index will only
+        raise a :class:`KeyError` if its hash isn't either. With 64-bit hashes, this has a
+        probability of roughly :math:`n / 2^{64}` for an index of :math:`n` keys.
+
+    Parameters
+    ----------
+    path : PathLike
+        the directory containing the index, as written by :meth:`build`
+    """
+
+    path: PathLike
+
+    hashes: NDArray[np.uint64] = field(init=False, repr=False)
+    rows: NDArray[np.int64] = field(init=False, repr=False)
+    collisions: dict[str, int] = field(init=False, repr=False)
+
+    def __post_init__(self):
+        self.path = Path(self.path)
+        self.hashes = np.load(self.path / HASHES_NAME, mmap_mode="r")
+        self.rows = np.load(self.path / ROWS_NAME, mmap_mode="r")
+        with np.load(self.path / COLLISIONS_NAME) as npz:
+            self.collisions = dict(zip(npz["keys"].tolist(), npz["rows"].tolist()))
+
+    @classmethod
+    def build(cls, keys: Sequence[str], path: PathLike, rows: ArrayLike | None = None) -> Self:
+        """Build an index from the input keys and write it to the given directory.
+
+        Parameters
+        ----------
+        keys : Sequence[str]
+            the unique keys to index
+        path : PathLike
+            the directory in which to write the index
+        rows : ArrayLike | None, default=None
+            the row of each key. If ``None``, the ``i``-th key maps to row ``i``.
+
+        Returns
+        -------
+        KeyIndex
+            the new index
+
+        Raises
+        ------
+        ValueError
+            if any key appears more than once or if the number of rows doesn't match the number of
+            keys
+        """
+        keys = np.asarray(keys, dtype=object)
+        rows = np.arange(len(keys)) if rows is None else np.asarray(rows)
+        if rows.shape != keys.shape:
+            raise ValueError(
+                f"arg 'rows' must have one row per key! got: {len(rows)} rows for {len(keys)} keys"
+            )
+
+        hashes = hash_keys(keys)
+        order = np.argsort(hashes, kind="stable")
+        hashes, rows, keys = hashes[order], rows[order].astype(np.int64), keys[order]
+
+        is_first = np.ones(len(hashes), bool)
+        is_first[1:] = hashes[1:] != hashes[:-1]
+        group_sizes = np.diff(np.flatnonzero(np.append(is_first, True)))
+        is_shared = np.repeat(group_sizes > 1, group_sizes)
+
+        shared_keys = keys[is_shared].tolist()
+        if len(set(shared_keys)) < len(shared_keys):
+            duplicates = sorted({k for k in shared_keys if shared_keys.count(k) > 1})
+            raise ValueError(f"arg 'keys' must be unique! got duplicates: {duplicates[:10]}")
+
+        unique_rows = rows[is_first]
+        unique_rows[(group_sizes > 1)] = COLLISION
+
+        path = Path(path)
+        path.mkdir(parents=True, exist_ok=True)
+        np.save(path / HASHES_NAME, hashes[is_first])
+        np.save(path / ROWS_NAME, unique_rows)
+        np.savez(
+            path / COLLISIONS_NAME, keys=np.array(shared_keys, dtype=str), rows=rows[is_shared]
+        )
+
+        return cls(path)
+
+    def __len__(self) -> int:
+        return len(self.hashes) - np.count_nonzero(self.rows == COLLISION) + len(self.collisions)
+
+    def __contains__(self, key: str) -> bool:
+        try:
+            self.lookup([key])
+        except KeyError:
+            return False
+
+        return True
+
+    def __getitem__(self, key: str) -> int:
+        return int(self.lookup([key])[0])
+
+    def lookup(self, keys: Sequence[str]) -> NDArray[np.int64]:
+        """Get the row of each of the input keys.
+
+        Raises
+        ------
+        KeyError
+            if any of the keys isn't in the index
+        """
+        keys = np.asarray(keys, dtype=object).reshape(-1)
+        hashes = hash_keys(keys)
+        idxs = np.searchsorted(self.hashes, hashes).clip(max=max(len(self.hashes) - 1, 0))
+        found = self.hashes[idxs] == hashes if len(self.hashes) > 0 else np.zeros(len(keys), bool)
+        if not found.all():
+            raise KeyError(keys[~found][0])
+
+        rows = self.rows[idxs]
+        for i in np.flatnonzero(rows == COLLISION):
+            try:
+                rows[i] = self.collisions[keys[i]]
+            except KeyError:
+                raise KeyError(keys[i]) from None
+
+        return rows
+
+    def __getstate__(self) -> dict:
+        return {"path": self.path}
+
+    def __setstate__(self, state: dict):
+        self.__dict__.update(state)
+        self.__post_init__()
+
+
+@dataclass
+class KeyedDatabase[VT, VT_batched](Database[str, VT, VT_batched]):
+    """A :class:`KeyedDatabase` looks up the values of string keys in an integer-indexed database.
+
+    This allows a dataset to join its inputs against a store keyed by, e.g., canonical SMILES
+    without having to precompute the row of each input. A batch of keys is resolved to rows with a
+    single vectorized :meth:`KeyIndex.lookup` and then read with one call to the wrapped
+    database's :meth:`~notorch.databases.base.Database.get_batch`.
+
+    Parameters
+    ----------
+    database : Database[int, VT, VT_batched]
+        the database containing the values
+    index : KeyIndex | PathLike
+        the index mapping each key to its row in :attr:`database` (or the directory containing it)
+    """
+
+    database: Database[int, VT, VT_batched]
+    index: KeyIndex | PathLike
+
+    def __post_init__(self):
+        if not isinstance(self.index, KeyIndex):
+            self.index = KeyIndex(self.index)
+
+    def __len__(self) -> int:
+        return len(self.index)
+
+    def __contains__(self, key: object) -> bool:
+        return isinstance(key, str) and key in self.index
+
+    def __getitem__(self, key: str) -> VT:
+        return self.database[self.index[key]]
+
+    def __iter__(self) -> Iterator[str]:
+        raise TypeError(f"`{type(self).__name__}` doesn't store its keys and can't be iterated!")
+
+    def collate(self, values: Collection[VT]) -> VT_batched:
+        return self.database.collate(values)
+
+    def get_batch(self, keys: Sequence[str]) -> VT_batched:
+        return self.database.get_batch(self.index.lookup(keys))
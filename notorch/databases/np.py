@@ -1,27 +1,308 @@
-from collections.abc import Iterator
+from collections.abc import Iterator, Mapping, Sequence
 from dataclasses import InitVar, dataclass, field
+import hashlib
+import os
 from os import PathLike
-from typing import Final
+from pathlib import Path
+import re
+import struct
+from typing import IO, Final, Self
+import zipfile
 
 import numpy as np
+from numpy.lib import format as npformat
 from numpy.lib.npyio import NpzFile
+from numpy.typing import ArrayLike
 from torch import Tensor
 
 from notorch.databases.base import Database
+from notorch.exceptions import InvalidChoiceError
 from notorch.utils.mixins import CollateNDArrayMixin
+from notorch.utils.quantize import Precision, Quantizer, quantize_array
+from notorch.utils.shared import SHARED_DIR, attach, cleanup_at_exit, share
+
+MMAP_MODES = ("r", "c")
+_LOCAL_HEADER = struct.Struct("<4s22xHH")
+_READ_HEADER = {(1, 0): npformat.read_array_header_1_0, (2, 0): npformat.read_array_header_2_0}
+_CHUNK_NBYTES = 2**24
+QUANT_SEP = ":"
+"""the separator between a key and the name of its quantization metadata in an archive"""
+QUANT_SUFFIX = ".quant.npz"
+
+
+def _read_npy_header(f: IO[bytes]) -> tuple[tuple[int, ...], bool, np.dtype] | None:
+    """Read the header of the ``.npy`` file at the current position of the input file, or return
+    ``None`` if the format version isn't supported."""
+    read_header = _READ_HEADER.get(npformat.read_magic(f))
+
+    return None if read_header is None else read_header(f)
+
+
+def _map_stored(f: IO[bytes], path: PathLike, info: zipfile.ZipInfo, mmap_mode: str):
+    """Memory-map an uncompressed member of a zip archive in place, or return ``None`` if it can't
+    be mapped."""
+    f.seek(info.header_offset)
+    signature, name_len, extra_len = _LOCAL_HEADER.unpack(f.read(_LOCAL_HEADER.size))
+    if signature != b"PK\x03\x04":
+        raise zipfile.BadZipFile(f"bad local file header for member '{info.filename}'!")
+
+    f.seek(info.header_offset + _LOCAL_HEADER.size + name_len + extra_len)
+    header = _read_npy_header(f)
+    if header is None or header[2].hasobject:
+        return None
+
+    shape, fortran_order, dtype = header
+    if np.prod(shape) == 0:
+        return np.empty(shape, dtype, order="F" if fortran_order else "C")
+
+    return np.memmap(path, dtype, mmap_mode, f.tell(), shape, order="F" if fortran_order else "C")
+
+
+def _spill_compressed(zf: zipfile.ZipFile, path: PathLike, info: zipfile.ZipInfo):
+    """Decompress a member of a zip archive in chunks into a file in shared memory and attach to
+    it, or return ``None`` if it can't be mapped.
+
+    The file is named after the archive and the CRC of the member, so processes that open the same
+    member (e.g., spawned workers or other distributed ranks) attach to the existing file instead
+    of decompressing it again. The file is deleted once every process that opened the member has
+    exited.
+    """
+    path = Path(path).absolute()
+    h = hashlib.blake2b(f"{path}:{info.filename}:{info.CRC}".encode(), digest_size=16)
+    stem = re.sub(r"[^\w.-]", "_", f"{path.stem}-{Path(info.filename).stem}")
+    spill_path = SHARED_DIR / f"{stem}-{h.hexdigest()}.npy"
+
+    cleanup_at_exit(spill_path)
+    if not spill_path.exists():
+        with zf.open(info) as member:
+            header = _read_npy_header(member)
+            if header is None or header[2].hasobject:
+                return None
+
+            shape, fortran_order, dtype = header
+            SHARED_DIR.mkdir(parents=True, exist_ok=True)
+            tmp_path = spill_path.with_suffix(f".{os.getpid()}.tmp")
+            out = npformat.open_memmap(tmp_path, "w+", dtype, shape, fortran_order)
+            with memoryview(out.reshape(-1, order="A").view(np.uint8)) as buf:
+                for i in range(0, len(buf), _CHUNK_NBYTES):
+                    chunk = buf[i : i + _CHUNK_NBYTES]
+                    while len(chunk) > 0:
+                        n = member.readinto(chunk)
+                        if n == 0:
+                            raise EOFError(f"member '{info.filename}' ended unexpectedly!")
+                        chunk = chunk[n:]
+            out.flush()
+            del out
+        # identical contents are written by concurrent writers, so whichever rename wins is fine
+        os.replace(tmp_path, spill_path)
+
+    return attach(spill_path)
+
+
+def _read_members(
+    zf: zipfile.ZipFile,
+    f: IO[bytes],
+    path: PathLike,
+    keys: Sequence[str],
+    mmap_mode: str | None = None,
+) -> dict[str, np.ndarray]:
+    arrays = {}
+    for key in keys:
+        info = zf.getinfo(f"{key}.npy")
+        X = None
+        if mmap_mode is not None and info.compress_type == zipfile.ZIP_STORED:
+            X = _map_stored(f, path, info, mmap_mode)
+        elif mmap_mode is not None:
+            X = _spill_compressed(zf, path, info)
+        if X is None:
+            with zf.open(info) as member:
+                X = npformat.read_array(member)
+        arrays[key] = X
+
+    return arrays
+
+
+def _read_quantizer(
+    zf: zipfile.ZipFile, f: IO[bytes], path: PathLike, names: Sequence[str], key: str
+) -> Quantizer | None:
+    """Read the quantizer of the array stored under the input key, if it has one."""
+    prefix = f"{key}{QUANT_SEP}"
+    meta_keys = [name for name in names if name.startswith(prefix)]
+    metadata = _read_members(zf, f, path, meta_keys)
+
+    return Quantizer.from_metadata({k.removeprefix(prefix): v for k, v in metadata.items()})
+
+
+def load_members(
+    path: PathLike, keys: Sequence[str], mmap_mode: str | None = None
+) -> dict[str, np.ndarray]:
+    """Load the arrays stored under the input keys of an ``.npz`` archive, opening it only once.
+
+    Parameters
+    ----------
+    path : PathLike
+        the path to the archive
+    keys : Sequence[str]
+        the keys of the arrays to load
+    mmap_mode : {"r", "c"} | None, default=None
+        If ``None``, decompress each array into memory. Otherwise, memory-map each array with the
+        given mode:
+
+        - a stored (i.e., uncompressed, as written by :func:`numpy.savez`) member is mapped in
+          place with no copy.
+        - a compressed member (as written by :func:`numpy.savez_compressed`) is decompressed in
+          chunks into a file in :data:`~notorch.utils.shared.SHARED_DIR`, which is then mapped
+          copy-on-write. The full array is never held in private memory, and every process shares
+          the same decompressed copy.
+
+        Arrays of objects can't be mapped and are always loaded into memory.
+
+    Returns
+    -------
+    dict[str, np.ndarray]
+        a mapping from each key to its array
+    """
+    if mmap_mode is not None and mmap_mode not in MMAP_MODES:
+        raise InvalidChoiceError(mmap_mode, MMAP_MODES)
+
+    with zipfile.ZipFile(path) as zf, open(path, "rb") as f:
+        return _read_members(zf, f, path, keys, mmap_mode)
+
+
+def save_npz(
+    path: PathLike,
+    arrays: Mapping[str, ArrayLike],
+    precision: Precision | None = None,
+    compressed: bool = False,
+) -> None:
+    """Save the input arrays to an ``.npz`` archive, optionally quantizing each one.
+
+    Parameters
+    ----------
+    path : PathLike
+        the path to the archive
+    arrays : Mapping[str, ArrayLike]
+        a mapping from each key to its array
+    precision : {"float16", "bfloat16", "int8"} | None, default=None
+        the precision in which to store each array. If ``None``, store each array as-is. The
+        quantization metadata of each key is stored in the archive alongside it and loaded
+        automatically by :class:`NPZDatabase`.
+    compressed : bool, default=False
+        whether to compress the archive. Members of an uncompressed archive can be memory-mapped
+        in place.
+    """
+    members = {}
+    for key, X in arrays.items():
+        if QUANT_SEP in key:
+            raise ValueError(f"arg 'arrays' must not contain keys with '{QUANT_SEP}'! got: {key}")
+        X, quantizer = quantize_array(np.asarray(X), None, precision)
+        members[key] = X
+        if quantizer is not None:
+            metadata = quantizer.to_metadata()
+            members |= {f"{key}{QUANT_SEP}{k}": v for k, v in metadata.items()}
+
+    (np.savez_compressed if compressed else np.savez)(path, **members)
+
+
+def save_npy(path: PathLike, X: ArrayLike, precision: Precision | None = None) -> None:
+    """Save the input array to an ``.npy`` file, optionally quantizing it.
+
+    The quantization metadata is stored in a sidecar archive named ``<path>.quant.npz``, which is
+    loaded automatically by :class:`NPYDatabase`.
+    """
+    X, quantizer = quantize_array(np.asarray(X), None, precision)
+    np.save(path, X)
+
+    quant_path = Path(f"{path}{QUANT_SUFFIX}")
+    if quantizer is not None:
+        np.savez(quant_path, **quantizer.to_metadata())
+    else:
+        quant_path.unlink(missing_ok=True)
 
 
 @dataclass
 class NPZDatabase(CollateNDArrayMixin, Database[int, np.ndarray, Tensor]):
+    """A :class:`NPZDatabase` contains the array stored under a given key of an ``.npz`` archive.
+
+    Parameters
+    ----------
+    path : PathLike
+        the path to the archive
+    key : str
+        the key of the array in the archive
+    mmap_mode : {"r", "c"} | None, default=None
+        the mode with which to memory-map the array. If ``None``, the array is loaded into memory.
+        See :func:`load_members` for details. A mapped array is remapped rather than copied when
+        the database is pickled (e.g., when it's sent to a spawned
+        :class:`~torch.utils.data.DataLoader` worker).
+    precision : {"float16", "bfloat16", "int8"} | None, default=None
+        the precision in which to hold the array in memory, which is dequantized to
+        :attr:`collate_dtype` when it's read. If ``None``, use the precision in which the array
+        is stored. An array that was quantized by :func:`save_npz` is always loaded in its stored
+        precision, so this is only needed to quantize a full-precision array when it's loaded.
+    """
+
     path: Final[PathLike]
     key: Final[str]
+    mmap_mode: str | None = None
+    precision: Precision | None = None
+    # the array and quantizer already read by :meth:`from_keys`, to avoid reopening the archive
+    _loaded: InitVar[tuple[np.ndarray, Quantizer | None] | None] = field(default=None, kw_only=True)
 
     npz: NpzFile | None = field(init=False, default=None, repr=False)
     X: np.ndarray | None = field(init=False, default=None, repr=False)
+    quantizer: Quantizer | None = field(init=False, default=None, repr=False)
+
+    def __post_init__(self, _loaded: tuple[np.ndarray, Quantizer | None] | None):
+        X, quantizer = self._load() if _loaded is None else _loaded
+        self.X, self.quantizer = quantize_array(X, quantizer, self.precision)
+
+    @classmethod
+    def from_keys(
+        cls, path: PathLike, keys: Sequence[str] | None = None, mmap_mode: str | None = None
+    ) -> dict[str, Self]:
+        """Build a database for each of the input keys of an archive, opening it only once.
+
+        Parameters
+        ----------
+        path : PathLike
+            the path to the archive
+        keys : Sequence[str] | None, default=None
+            the keys for which to build databases. If ``None``, use every key in the archive.
+        mmap_mode : {"r", "c"} | None, default=None
+            see :class:`NPZDatabase`
+
+        Returns
+        -------
+        dict[str, NPZDatabase]
+            a mapping from each key to its database
+        """
+        if mmap_mode is not None and mmap_mode not in MMAP_MODES:
+            raise InvalidChoiceError(mmap_mode, MMAP_MODES)
 
-    def __post_init__(self):
-        with np.load(self.path) as npz:
-            self.X = npz[self.key]
+        with zipfile.ZipFile(path) as zf, open(path, "rb") as f:
+            names = [name.removesuffix(".npy") for name in zf.namelist()]
+            if keys is None:
+                keys = [name for name in names if QUANT_SEP not in name]
+            arrays = _read_members(zf, f, path, keys, mmap_mode)
+            quantizers = {key: _read_quantizer(zf, f, path, names, key) for key in keys}
+
+        return {
+            key: cls(path, key, mmap_mode, _loaded=(X, quantizers[key]))
+            for key, X in arrays.items()
+        }
+
+    def _load(self) -> tuple[np.ndarray, Quantizer | None]:
+        """Load the array and its quantizer, if it has one."""
+        if self.mmap_mode is not None and self.mmap_mode not in MMAP_MODES:
+            raise InvalidChoiceError(self.mmap_mode, MMAP_MODES)
+
+        with zipfile.ZipFile(self.path) as zf, open(self.path, "rb") as f:
+            names = [name.removesuffix(".npy") for name in zf.namelist()]
+            X = _read_members(zf, f, self.path, [self.key], self.mmap_mode)[self.key]
+            quantizer = _read_quantizer(zf, f, self.path, names, self.key)
+
+        return X, quantizer
 
     @property
     def shape(self) -> tuple[int, ...]:
@@ -31,23 +312,68 @@ class NPZDatabase(CollateNDArrayMixin, Database[int, np.ndarray, Tensor]):
         return self.X.shape[0]
 
     def __getitem__(self, idx: int) -> np.ndarray:
-        return self.X[idx]
+        return self._dequantize_row(self.X[idx])
 
     def __iter__(self) -> Iterator[np.ndarray]:
-        return iter(self.X)
+        return (self[i] for i in range(len(self)))
+
+    def get_batch(self, idxs: Sequence[int]) -> Tensor:
+        return self.gather(self.X, idxs)
+
+    def read_batch(self, idxs: Sequence[int]) -> np.ndarray:
+        """Read the rows at the input indices into a new array in their storage format without
+        collating them."""
+        return self.X[np.asarray(idxs, dtype=np.int64)]
+
+    def __getstate__(self) -> dict:
+        state = super().__getstate__()
+        if isinstance(self.X, np.memmap):
+            state["X"] = None
+
+        return state
+
+    def __setstate__(self, state: dict):
+        self.__dict__.update(state)
+        if self.X is None:
+            self.X, _ = self._load()
+
+    def share_memory_(self) -> Self:
+        """Move the in-memory data of this database to shared memory. See
+        :func:`~notorch.utils.shared.share` for details."""
+        if not isinstance(self.X, np.memmap):
+            self.X = share(self.X, type(self).__name__.lower())
+
+        return self
 
 
 @dataclass
 class NPYDatabase(NPZDatabase):
+    """A :class:`NPYDatabase` contains the array stored in an ``.npy`` file.
+
+    Parameters
+    ----------
+    path : PathLike
+        the path to the file
+    mmap_mode : {"r", "c"} | None, default=None
+        the mode with which to memory-map the array. If ``None``, the array is loaded into memory.
+    precision : {"float16", "bfloat16", "int8"} | None, default=None
+        see :class:`NPZDatabase`
+    """
+
     path: Final[PathLike]
-    mmap_mode: InitVar[str | None] = None
+    mmap_mode: str | None = None
+    precision: Precision | None = None
+    # keyword-only so that the mode stays the second positional argument
+    key: Final[str | None] = field(default=None, kw_only=True)
 
-    def __post_init__(self, mmap_mode: str | None):
-        # with np.load(self.path) as npz:
-        #     self.shape = npz[self.key].shape
+    def _load(self) -> tuple[np.ndarray, Quantizer | None]:
+        X = np.load(self.path, self.mmap_mode)
+        quant_path = Path(f"{self.path}{QUANT_SUFFIX}")
+        if not quant_path.exists():
+            return X, None
 
-        self.npz = None
-        self.X = np.load(self.path, mmap_mode)
+        with np.load(quant_path) as npz:
+            return X, Quantizer.from_metadata(npz)
 
     @property
     def shape(self) -> tuple[int, ...]:
@@ -57,10 +383,10 @@ class NPYDatabase(NPZDatabase):
         return self.X.shape[0]
 
     def __getitem__(self, idx: int) -> np.ndarray:
-        return self.X[idx]
+        return self._dequantize_row(self.X[idx])
 
     def __iter__(self) -> Iterator[np.ndarray]:
-        return iter(self.X)
+        return (self[i] for i in range(len(self)))
 
     # def __getitem__(self, idx: int) -> np.ndarray:
     #     try:
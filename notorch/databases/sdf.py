@@ -1,12 +1,57 @@
 from dataclasses import dataclass, field
+import hashlib
+import mmap
+import os
 from os import PathLike
+from pathlib import Path
+import re
 from typing import Iterator, Self
 
+import numpy as np
 import rdkit.Chem as Chem
 
 from notorch.databases.base import Database
 from notorch.types import Mol
 
+RECORD_END = re.compile(rb"^\$\$\$\$[^\n]*(?:\n|$)", re.MULTILINE)
+"""matches the line that terminates each record of an SDF file"""
+DATA_HEADER = re.compile(r"^>.*<(.+)>")
+"""matches the header line of a data item of an SDF record and captures its name"""
+INDEX_CACHE_DIR = Path(os.environ.get("XDG_CACHE_HOME", "~/.cache")).expanduser() / "notorch"
+"""the directory of the sidecar indices of SDF files whose own directory isn't writable"""
+
+
+def decode(block: bytes) -> str:
+    """Decode a record of an SDF file as UTF-8, falling back to Latin-1 for legacy files.
+
+    Latin-1 maps every byte to a character, so the fallback never fails and leaves the ASCII
+    content of the record (i.e., everything RDKit parses) intact.
+    """
+    try:
+        return block.decode()
+    except UnicodeDecodeError:
+        return block.decode("latin-1")
+
+
+def parse_data_items(block: str) -> dict[str, str]:
+    """Parse the data items (i.e., the ``> <NAME>`` fields) of a single SDF record."""
+    items = {}
+    name, lines = None, []
+    _, _, data = block.partition("M  END")
+    for line in data.splitlines():
+        if name is None:
+            if (match := DATA_HEADER.match(line)) is not None:
+                name, lines = match.group(1), []
+        elif line.strip() == "" or line.startswith("$$$$"):
+            items[name] = "\n".join(lines)
+            name = None
+        else:
+            lines.append(line)
+    if name is not None:
+        items[name] = "\n".join(lines)
+
+    return items
+
 
 @dataclass
 class SDFDatabase(Database[int, Mol, list[Mol]]):
@@ -15,8 +60,7 @@ class SDFDatabase(Database[int, Mol, list[Mol]]):
     mols: list[Mol] = field(init=False)
 
     def __post_init__(self):
-        with open(self.path) as supp:
-            self.mols = list(supp)
+        self.mols = list(Chem.SDMolSupplier(str(self.path)))
 
     def __len__(self) -> int:
         return len(self.mols)
@@ -31,31 +75,168 @@ class SDFDatabase(Database[int, Mol, list[Mol]]):
 
 
 @dataclass
-class __SDFDatabaseOnDisk(SDFDatabase):
+class SDFDatabaseOnDisk(Database[int, Mol, list[Mol]]):
+    """An :class:`SDFDatabaseOnDisk` parses the records of an SDF file from disk on demand.
+
+    On first use, the byte offset of each record is found in a single pass over the file and
+    persisted to a sidecar index file, which is reused as long as it is newer than the SDF file.
+    If the sidecar index can't be written (e.g., the SDF file lives in a read-only directory), the
+    index is persisted to :data:`INDEX_CACHE_DIR` instead or, failing that, held in memory.
+    A record is then read with a single seek into a memory map of the file and parsed via
+    :func:`~rdkit.Chem.MolFromMolBlock`, so random access costs :math:`O(1)` regardless of the
+    size of the file. The file is mapped lazily in each process that accesses it (e.g., each
+    :class:`~torch.utils.data.DataLoader` worker) and unmapped when the database is pickled.
+
+    Parameters
+    ----------
+    path : PathLike
+        the path to the SDF file
+    index_path : PathLike | None, default=None
+        the path to the sidecar index. If ``None``, use the path of the SDF file with the suffix
+        ``.idx.npy`` appended. After initialization, this is the path of the index that was
+        actually used, or ``None`` if the index is held in memory.
+    sanitize : bool, default=True
+        whether to sanitize each molecule
+    remove_hs : bool, default=True
+        whether to remove explicit hydrogens from each molecule
+    props : bool, default=False
+        whether to set the data items of each record as properties of its molecule
+    """
+
     path: PathLike
+    index_path: PathLike | None = None
+    sanitize: bool = True
+    remove_hs: bool = True
+    props: bool = False
+
+    offsets: np.ndarray = field(init=False, repr=False)
+    _mm: mmap.mmap | None = field(init=False, default=None, repr=False)
+    _pid: int | None = field(init=False, default=None, repr=False)
 
     def __post_init__(self):
-        with open(self.path) as f:
-            self.__size = sum(1 for line in f if line.startswith("$$$$"))
-        self.supp = None
+        self.path = Path(self.path)
+        if self.index_path is not None:
+            index_paths = [Path(self.index_path)]
+        else:
+            key = hashlib.sha256(str(self.path.resolve()).encode()).hexdigest()[:16]
+            index_paths = [
+                self.path.with_name(f"{self.path.name}.idx.npy"),
+                INDEX_CACHE_DIR / f"{self.path.name}-{key}.idx.npy",
+            ]
+
+        for index_path in index_paths:
+            if self._index_is_valid(index_path):
+                self.index_path = index_path
+                self.offsets = np.load(index_path, mmap_mode="r")
+                return
+
+        for index_path in index_paths:
+            try:
+                self.offsets = self.build_index(self.path, index_path)
+            except OSError:
+                continue
+            self.index_path = index_path
+            return
+
+        self.index_path = None
+        self.offsets = self.build_index(self.path)
+
+    def _index_is_valid(self, index_path: Path) -> bool:
+        if not index_path.is_file():
+            return False
+        if index_path.stat().st_mtime_ns < self.path.stat().st_mtime_ns:
+            return False
+
+        offsets = np.load(index_path, mmap_mode="r")
+
+        return len(offsets) > 0 and offsets[-1] == self.path.stat().st_size
+
+    @staticmethod
+    def build_index(path: PathLike, index_path: PathLike | None = None) -> np.ndarray:
+        """Find the byte offset of each record in the input SDF file and save them to
+        :attr:`index_path`, if provided.
+
+        Returns
+        -------
+        np.ndarray
+            an array of shape ``n + 1`` such that record ``i`` spans the bytes
+            ``offsets[i]:offsets[i+1]`` of the file
+        """
+        size = os.stat(path).st_size
+        offsets = [0]
+        if size > 0:
+            with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                offsets.extend(m.end() for m in RECORD_END.finditer(mm))
+                if offsets[-1] < size and mm[offsets[-1] :].strip():
+                    offsets.append(size)
+        offsets = np.array(offsets, dtype=np.int64)
+        # the trailing whitespace belongs to the last record so that the index covers the file
+        offsets[-1] = size
+
+        if index_path is None:
+            return offsets
+
+        index_path = Path(index_path)
+        index_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = index_path.with_suffix(f".{os.getpid()}.tmp")
+        try:
+            with open(tmp_path, "wb") as f:
+                np.save(f, offsets)
+            os.replace(tmp_path, index_path)
+        finally:
+            tmp_path.unlink(missing_ok=True)
+
+        return offsets
+
+    @property
+    def mm(self) -> mmap.mmap:
+        """the memory map of the SDF file, opened lazily so that each worker process receives its
+        own map."""
+        if self._mm is None or self._pid != os.getpid():
+            with open(self.path, "rb") as f:
+                self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            self._pid = os.getpid()
+
+        return self._mm
 
     def __len__(self) -> int:
-        return self.__size
+        return len(self.offsets) - 1
 
     def __getitem__(self, idx: int) -> Mol:
-        try:
-            return self.supp[idx]
-        except TypeError:
-            raise ValueError
+        if not -len(self) <= idx < len(self):
+            raise IndexError(f"index {idx} is out of range for database of size {len(self)}!")
 
-    def __enter__(self) -> Self:
-        self.supp = Chem.SDMolSupplier(str(self.path))
+        idx = idx % len(self)
+        block = decode(self.mm[self.offsets[idx] : self.offsets[idx + 1]])
+        mol = Chem.MolFromMolBlock(block, sanitize=self.sanitize, removeHs=self.remove_hs)
 
+        if self.props and mol is not None:
+            for key, value in parse_data_items(block).items():
+                mol.SetProp(key, value)
+
+        return mol
+
+    def __iter__(self) -> Iterator[int]:
+        return iter(range(len(self)))
+
+    collate = list
+
+    def close(self) -> None:
+        if self._mm is not None and self._pid == os.getpid():
+            self._mm.close()
+
+        self._mm = None
+        self._pid = None
+
+    def __enter__(self) -> Self:
         return self
 
     def __exit__(self, *exc):
-        self.supp = None
+        self.close()
+
+    def __getstate__(self) -> dict:
+        state = self.__dict__.copy()
+        state["_mm"] = None
+        state["_pid"] = None
 
-    def __iter__(self) -> Iterator:
-        with self:
-            return iter(self.supp)
+        return state
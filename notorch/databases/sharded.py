@@ -0,0 +1,205 @@
+from collections import OrderedDict
+from collections.abc import Iterator, Sequence
+from dataclasses import dataclass, field
+import glob
+import os
+from os import PathLike
+from pathlib import Path
+from typing import Self
+
+import h5py
+import numpy as np
+import torch
+from torch import Tensor
+
+from notorch.databases.base import Database
+from notorch.databases.hdf5 import HDF5DatabaseOnDisk
+from notorch.databases.np import NPYDatabase
+from notorch.exceptions import InvalidChoiceError
+from notorch.utils.mixins import CollateNDArrayMixin
+
+NPY_SUFFIXES = (".npy",)
+HDF5_SUFFIXES = (".h5", ".hdf5")
+MANIFEST_SUFFIXES = (".txt", ".manifest")
+
+type Shard = NPYDatabase | HDF5DatabaseOnDisk
+
+
+def read_manifest(path: PathLike) -> list[Path]:
+    """Read the shard paths listed in a manifest file.
+
+    A manifest contains one path per line. Relative paths are resolved relative to the directory
+    containing the manifest, and blank lines and lines starting with ``#`` are ignored.
+    """
+    path = Path(path)
+    with open(path) as f:
+        lines = [line.strip() for line in f]
+
+    return [path.parent / line for line in lines if line and not line.startswith("#")]
+
+
+@dataclass
+class ShardedDatabase(CollateNDArrayMixin, Database[int, np.ndarray, Tensor]):
+    """A :class:`ShardedDatabase` presents the rows of several ``.npy`` or HDF5 files (shards) as
+    a single database.
+
+    The global index of a row is its index in the concatenation of all shards, in the order that
+    they're supplied. The number of rows in each shard is read once at initialization to build a
+    table of global offsets. A batch of indices is routed to the shards containing them with a
+    single :func:`numpy.searchsorted`, and each shard is then read once per batch via the
+    vectorized ``read_batch`` of :class:`~notorch.databases.np.NPYDatabase` or
+    :class:`~notorch.databases.hdf5.HDF5DatabaseOnDisk`, directly into the collated output.
+    Quantized shards are dequantized as they're read.
+
+    Shards are opened lazily in each process that accesses them (e.g., each
+    :class:`~torch.utils.data.DataLoader` worker). At most :attr:`max_open` shards are kept open at
+    once, and the least recently used shard is closed to open a new one.
+
+    Parameters
+    ----------
+    shards : str | PathLike | Sequence[PathLike]
+        either a sequence of shard paths, the path to a manifest file (see :func:`read_manifest`),
+        or a glob pattern, whose matches will be sorted by name
+    dataset : str | None, default=None
+        the name of the dataset inside each HDF5 shard. Required if any shard is an HDF5 file.
+    max_open : int, default=32
+        the maximum number of shards to keep open at once in each process
+    hdf5_kwargs : dict, default={}
+        additional keyword arguments to supply to
+        :class:`~notorch.databases.hdf5.HDF5DatabaseOnDisk` when opening an HDF5 shard (e.g.,
+        ``rdcc_nbytes``)
+    """
+
+    shards: str | PathLike | Sequence[PathLike]
+    dataset: str | None = None
+    max_open: int = 32
+    hdf5_kwargs: dict = field(default_factory=dict, repr=False)
+
+    paths: list[Path] = field(init=False, repr=False)
+    offsets: np.ndarray = field(init=False, repr=False)
+    shape: tuple[int, ...] = field(init=False)
+    dtype: np.dtype = field(init=False, repr=False)
+    _open: OrderedDict[int, Shard] = field(init=False, default_factory=OrderedDict, repr=False)
+    _pid: int | None = field(init=False, default=None, repr=False)
+
+    def __post_init__(self):
+        if self.max_open < 1:
+            raise ValueError(f"arg 'max_open' must be >= 1! got: {self.max_open}")
+
+        if not isinstance(self.shards, (str, PathLike)):
+            self.paths = [Path(p) for p in self.shards]
+        elif Path(self.shards).suffix in MANIFEST_SUFFIXES:
+            self.paths = read_manifest(self.shards)
+        else:
+            self.paths = [Path(p) for p in sorted(glob.glob(str(self.shards)))]
+        if len(self.paths) == 0:
+            raise ValueError(f"arg 'shards' must specify at least one shard! got: {self.shards}")
+
+        shapes, dtypes = zip(*[self._describe(path) for path in self.paths])
+        row_shapes = {shape[1:] for shape in shapes}
+        if len(row_shapes) > 1:
+            raise ValueError(f"all shards must have the same row shape! got: {row_shapes}")
+
+        self.offsets = np.cumsum([0, *[shape[0] for shape in shapes]])
+        self.shape = (int(self.offsets[-1]), *row_shapes.pop())
+        self.dtype = np.result_type(*dtypes)
+
+    def _describe(self, path: Path) -> tuple[tuple[int, ...], np.dtype]:
+        """Get the shape and dtype of the input shard without reading its data."""
+        if path.suffix in NPY_SUFFIXES:
+            X = np.load(path, mmap_mode="r")
+            return X.shape, X.dtype
+        if path.suffix in HDF5_SUFFIXES:
+            if self.dataset is None:
+                raise ValueError(f"arg 'dataset' must be supplied for HDF5 shard '{path}'!")
+            with h5py.File(path, "r") as h5f:
+                X = h5f[self.dataset]
+                return X.shape, X.dtype
+
+        raise InvalidChoiceError(path.suffix, (*NPY_SUFFIXES, *HDF5_SUFFIXES))
+
+    def shard(self, i: int) -> Shard:
+        """Get the ``i``-th shard, opening it (and closing the least recently used shard, if
+        necessary) if it isn't already open in the current process."""
+        if self._pid != os.getpid():
+            self._open = OrderedDict()
+            self._pid = os.getpid()
+
+        if i in self._open:
+            self._open.move_to_end(i)
+            return self._open[i]
+
+        while len(self._open) >= self.max_open:
+            _, shard = self._open.popitem(last=False)
+            if isinstance(shard, HDF5DatabaseOnDisk):
+                shard.close()
+
+        path = self.paths[i]
+        if path.suffix in NPY_SUFFIXES:
+            shard = NPYDatabase(path, mmap_mode="r")
+        else:
+            shard = HDF5DatabaseOnDisk(path, self.dataset, **self.hdf5_kwargs)
+        self._open[i] = shard
+
+        return shard
+
+    def _locate(self, idxs: Sequence[int]) -> tuple[np.ndarray, np.ndarray]:
+        """Get the shard and local index of each of the input global indices."""
+        idxs = np.array(idxs, dtype=np.int64, ndmin=1)
+        if len(idxs) > 0 and not (-len(self) <= idxs.min() and idxs.max() < len(self)):
+            raise IndexError(f"index out of range for database of size {len(self)}!")
+        idxs[idxs < 0] += len(self)
+        shard_idxs = np.searchsorted(self.offsets, idxs, side="right") - 1
+
+        return shard_idxs, idxs - self.offsets[shard_idxs]
+
+    def __len__(self) -> int:
+        return self.shape[0]
+
+    def __getitem__(self, idx: int) -> np.ndarray:
+        (i,), (local_idx,) = self._locate([idx])
+
+        return self.shard(int(i))[int(local_idx)]
+
+    def __iter__(self) -> Iterator[int]:
+        return iter(range(len(self)))
+
+    def get_batch(self, idxs: Sequence[int]) -> Tensor:
+        shard_idxs, local_idxs = self._locate(idxs)
+        out = self._collate_buffer((len(local_idxs), *self.shape[1:]))
+        out_np = out.numpy()
+
+        order = np.argsort(shard_idxs, kind="stable")
+        uniq_shard_idxs, starts = np.unique(shard_idxs[order], return_index=True)
+        for i, rows in zip(uniq_shard_idxs, np.split(order, starts[1:])):
+            shard = self.shard(int(i))
+            X = shard.read_batch(local_idxs[rows])
+            if shard.quantizer is not None:
+                X = shard.quantizer.dequantize(
+                    torch.from_numpy(X), torch.empty(X.shape, dtype=self.collate_dtype)
+                )
+            out_np[rows] = X
+
+        return out
+
+    def close(self) -> None:
+        if self._pid == os.getpid():
+            for shard in self._open.values():
+                if isinstance(shard, HDF5DatabaseOnDisk):
+                    shard.close()
+
+        self._open = OrderedDict()
+        self._pid = None
+
+    def __enter__(self) -> Self:
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __getstate__(self) -> dict:
+        state = super().__getstate__()
+        state["_open"] = OrderedDict()
+        state["_pid"] = None
+
+        return state
@@ -0,0 +1,271 @@
+from _thread import LockType
+from collections.abc import Iterator, Sequence
+from contextlib import closing
+from dataclasses import dataclass, field
+import os
+from os import PathLike
+from pathlib import Path
+import re
+import sqlite3
+import threading
+from typing import Self
+
+import numpy as np
+from numpy.typing import ArrayLike, DTypeLike
+from torch import Tensor
+
+from notorch.databases.base import Database
+from notorch.utils.mixins import CollateNDArrayMixin
+
+META_TABLE = "meta"
+MAX_VARIABLES = 32766
+"""the maximum number of parameters in a single query for SQLite >= 3.32"""
+
+_CONNECT_LOCK = threading.Lock()
+
+
+def _check_table(table: str) -> str:
+    if re.fullmatch(r"[A-Za-z_]\w*", table) is None or table == META_TABLE:
+        raise ValueError(
+            f"arg 'table' must be a valid SQL identifier other than 'meta'! got: {table}"
+        )
+
+    return table
+
+
+@dataclass
+class SQLiteDatabase(CollateNDArrayMixin, Database[int, np.ndarray, Tensor]):
+    """A :class:`SQLiteDatabase` stores fixed-shape arrays under integer IDs in a single SQLite
+    file.
+
+    Each row is stored as the raw bytes of its array, and the dtype and shape of the rows are
+    stored in a metadata table. The IDs need not be contiguous, so the database can hold a sparse
+    subset of a larger index (e.g., descriptors for only some molecules) and be extended over time.
+
+    Reads go through one read-only connection per process, which is opened lazily (e.g., in each
+    :class:`~torch.utils.data.DataLoader` worker) and dropped when the database is pickled. The
+    connection is shared by every thread of the process (e.g., that of a
+    :class:`~notorch.data.prefetch.PrefetchLoader`) and only used while holding a lock. A batch
+    is read via :meth:`get_batch` with one ``SELECT ... WHERE id IN (...)`` query per
+    :data:`MAX_VARIABLES` unique IDs rather than one query per ID.
+
+    The file is kept in write-ahead logging mode, so :meth:`append` may be called from a separate
+    writer process (e.g., a featurization job) while the database is being read. Each call to
+    :meth:`append` is a single transaction, so readers see either all or none of its rows.
+
+    Parameters
+    ----------
+    path : PathLike
+        the path to the database file, as created by :meth:`create`
+    table : str, default="features"
+        the name of the table containing the rows
+    cache_size : int, default=2**16
+        the size (in KiB) of the page cache of each connection
+    mmap_size : int, default=2**28
+        the maximum number of bytes of the file to memory-map in each connection. Reads from the
+        mapped region skip a copy through the page cache.
+    timeout : float, default=30.0
+        the number of seconds to wait for a lock held by another connection before raising an
+        error
+    """
+
+    path: PathLike
+    table: str = "features"
+    cache_size: int = 2**16
+    mmap_size: int = 2**28
+    timeout: float = 30.0
+
+    shape: tuple[int, ...] = field(init=False, repr=False)
+    dtype: np.dtype = field(init=False, repr=False)
+    _conn: sqlite3.Connection | None = field(init=False, default=None, repr=False)
+    _lock: LockType | None = field(init=False, default=None, repr=False)
+    _pid: int | None = field(init=False, default=None, repr=False)
+
+    def __post_init__(self):
+        self.path = Path(self.path)
+        self.table = _check_table(self.table)
+        # read the metadata through a short-lived connection so that no connection is inherited
+        # by forked workers
+        with closing(self._connect()) as conn:
+            meta = dict(conn.execute(f"SELECT key, value FROM {META_TABLE}"))
+        self.dtype = np.dtype(meta[f"{self.table}.dtype"])
+        self.shape = tuple(int(d) for d in meta[f"{self.table}.shape"].split(",") if d)
+
+    @classmethod
+    def create(
+        cls,
+        path: PathLike,
+        shape: Sequence[int],
+        dtype: DTypeLike = np.float32,
+        table: str = "features",
+        **kwargs,
+    ) -> Self:
+        """Create a new, empty table in the database file at the input path.
+
+        Parameters
+        ----------
+        path : PathLike
+            the path to the database file, which will be created if it doesn't exist
+        shape : Sequence[int]
+            the shape of each row
+        dtype : DTypeLike, default=np.float32
+            the dtype of each row
+        table : str, default="features"
+            the name of the table
+        **kwargs
+            additional keyword arguments to supply to :class:`SQLiteDatabase`
+
+        Returns
+        -------
+        SQLiteDatabase
+            the new database
+
+        Raises
+        ------
+        sqlite3.OperationalError
+            if the table already exists
+        """
+        table = _check_table(table)
+        with sqlite3.connect(path) as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                f"CREATE TABLE IF NOT EXISTS {META_TABLE} (key TEXT PRIMARY KEY, value TEXT)"
+            )
+            conn.execute(f"CREATE TABLE {table} (id INTEGER PRIMARY KEY, value BLOB NOT NULL)")
+            conn.executemany(
+                f"INSERT INTO {META_TABLE} VALUES (?, ?)",
+                [
+                    (f"{table}.dtype", np.dtype(dtype).str),
+                    (f"{table}.shape", ",".join(map(str, shape))),
+                ],
+            )
+        conn.close()
+
+        return cls(path, table, **kwargs)
+
+    @property
+    def conn(self) -> sqlite3.Connection:
+        """the read-only connection to the database file, opened lazily so that each worker
+        process receives its own connection.
+
+        The connection is shared by every thread of the process, so it must only be used while
+        holding :attr:`_lock`.
+        """
+        if self._conn is None or self._pid != os.getpid():
+            with _CONNECT_LOCK:
+                if self._conn is None or self._pid != os.getpid():
+                    self._lock = threading.Lock()
+                    self._conn = self._connect()
+                    self._pid = os.getpid()
+
+        return self._conn
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(
+            f"{self.path.absolute().as_uri()}?mode=ro",
+            self.timeout,
+            uri=True,
+            check_same_thread=False,
+        )
+        conn.execute("PRAGMA query_only=ON")
+        conn.execute(f"PRAGMA cache_size=-{self.cache_size}")
+        conn.execute(f"PRAGMA mmap_size={self.mmap_size}")
+        conn.execute("PRAGMA temp_store=MEMORY")
+
+        return conn
+
+    def _fetch(self, query: str, params: Sequence = ()) -> list[tuple]:
+        """Fetch every row of the input query through the connection of the current process."""
+        conn = self.conn
+        with self._lock:
+            return conn.execute(query, params).fetchall()
+
+    def append(self, ids: ArrayLike, X: ArrayLike) -> None:
+        """Insert (or replace) the rows of the input array under the corresponding IDs in a
+        single transaction.
+
+        The write goes through a separate connection that is closed afterwards, so this may be
+        called from any process while others are reading the database.
+        """
+        ids = np.asarray(ids, dtype=np.int64).reshape(-1)
+        X = np.ascontiguousarray(X, dtype=self.dtype)
+        if X.shape != (len(ids), *self.shape):
+            raise ValueError(f"arg 'X' must have shape {(len(ids), *self.shape)}! got: {X.shape}")
+
+        conn = sqlite3.connect(self.path, self.timeout, isolation_level=None)
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.executemany(
+                f"INSERT OR REPLACE INTO {self.table} VALUES (?, ?)",
+                zip(ids.tolist(), (x.tobytes() for x in X)),
+            )
+            conn.execute("COMMIT")
+        except BaseException:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+
+    def __len__(self) -> int:
+        return self._fetch(f"SELECT COUNT(*) FROM {self.table}")[0][0]
+
+    def __contains__(self, idx: object) -> bool:
+        if not isinstance(idx, (int, np.integer)):
+            return False
+
+        return len(self._fetch(f"SELECT 1 FROM {self.table} WHERE id = ?", (int(idx),))) > 0
+
+    def __getitem__(self, idx: int) -> np.ndarray:
+        rows = self._fetch(f"SELECT value FROM {self.table} WHERE id = ?", (int(idx),))
+        if len(rows) == 0:
+            raise KeyError(idx)
+
+        return np.frombuffer(rows[0][0], self.dtype).reshape(self.shape)
+
+    def __iter__(self) -> Iterator[int]:
+        return iter([idx for (idx,) in self._fetch(f"SELECT id FROM {self.table} ORDER BY id")])
+
+    def get_batch(self, idxs: Sequence[int]) -> Tensor:
+        uniq_idxs, inverse = np.unique(np.asarray(idxs, dtype=np.int64), return_inverse=True)
+        X = np.empty((len(uniq_idxs), *self.shape), self.dtype)
+        found = np.zeros(len(uniq_idxs), bool)
+
+        for i in range(0, len(uniq_idxs), MAX_VARIABLES):
+            chunk = uniq_idxs[i : i + MAX_VARIABLES].tolist()
+            query = f"SELECT id, value FROM {self.table} WHERE id IN ({','.join('?' * len(chunk))})"
+            rows = self._fetch(query, chunk)
+            if len(rows) == 0:
+                continue
+
+            ids, values = zip(*rows)
+            js = np.searchsorted(uniq_idxs, ids)
+            X[js] = np.frombuffer(b"".join(values), self.dtype).reshape(len(rows), *self.shape)
+            found[js] = True
+
+        if not found.all():
+            raise KeyError(int(uniq_idxs[~found][0]))
+
+        return self.gather(X, inverse)
+
+    def close(self) -> None:
+        if self._conn is not None and self._pid == os.getpid():
+            self._conn.close()
+
+        self._conn = None
+        self._lock = None
+        self._pid = None
+
+    def __enter__(self) -> Self:
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __getstate__(self) -> dict:
+        state = super().__getstate__()
+        state["_conn"] = None
+        state["_lock"] = None
+        state["_pid"] = None
+
+        return state
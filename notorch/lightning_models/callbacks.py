@@ -0,0 +1,135 @@
+import lightning as L
+from lightning.pytorch.utilities import CombinedLoader
+from tensordict import TensorDict
+import torch
+
+from notorch.conf import INDEX_KEY, SAMPLE_WEIGHTS_KEY
+from notorch.samplers import DistributedSeededSampler, ImportanceSampler
+
+
+class ImportanceSampling(L.Callback):
+    """Drive an :class:`~notorch.samplers.ImportanceSampler` from the training loop.
+
+    Before each training step, the importance weight of each sample in the batch is placed into
+    the batch under the key ``"sample_weights"``. After each step, the per-sample losses returned
+    by :meth:`~notorch.lightning_models.model.NotorchModel.training_step` are recorded in the
+    sampler. For the weights to take effect, every loss term must map its ``sample_weights``
+    argument to that key, e.g., ``in_keys: {..., sample_weights: sample_weights}``.
+
+    At the end of each training epoch, the estimated variance reduction relative to uniform
+    sampling and the corresponding estimate of the number of steps saved are logged. If a
+    :attr:`target` is given, the global step at which the :attr:`monitor`-ed validation metric
+    first reaches it is logged as well, which can be compared directly against a run that
+    samples uniformly.
+
+    Parameters
+    ----------
+    sampler : ImportanceSampler
+        the sampler of the training dataloader
+    target : float | None, default=None
+        the target value of the :attr:`monitor`-ed metric
+    monitor : str, default="val/loss"
+        the validation metric to compare against :attr:`target`
+    """
+
+    def __init__(
+        self, sampler: ImportanceSampler, target: float | None = None, monitor: str = "val/loss"
+    ):
+        self.sampler = sampler
+        self.target = target
+        self.monitor = monitor
+        self.steps_saved = 0.0
+        self.steps_to_target: int | None = None
+
+    def on_train_batch_start(
+        self, trainer: L.Trainer, pl_module: L.LightningModule, batch: TensorDict, batch_idx: int
+    ):
+        idxs = batch[INDEX_KEY].cpu().numpy()
+        batch[SAMPLE_WEIGHTS_KEY] = torch.as_tensor(
+            self.sampler.importance_weights(idxs), dtype=torch.float, device=batch[INDEX_KEY].device
+        )
+
+    def on_train_batch_end(
+        self,
+        trainer: L.Trainer,
+        pl_module: L.LightningModule,
+        outputs,
+        batch: TensorDict,
+        batch_idx: int,
+    ):
+        if not isinstance(outputs, dict) or "sample_losses" not in outputs:
+            return
+
+        self.sampler.update(batch[INDEX_KEY].cpu().numpy(), outputs["sample_losses"].cpu().numpy())
+
+    def on_train_epoch_end(self, trainer: L.Trainer, pl_module: L.LightningModule):
+        gain = self.sampler.variance_reduction()
+        self.steps_saved += trainer.num_training_batches * (1 - 1 / gain)
+
+        pl_module.log_dict(
+            {"importance/variance_reduction": gain, "importance/steps_saved": self.steps_saved}
+        )
+
+    def on_validation_epoch_end(self, trainer: L.Trainer, pl_module: L.LightningModule):
+        if self.target is None or self.steps_to_target is not None or trainer.sanity_checking:
+            return
+
+        value = trainer.callback_metrics.get(self.monitor)
+        if value is not None and value <= self.target:
+            self.steps_to_target = trainer.global_step
+            pl_module.log("importance/steps_to_target", float(self.steps_to_target))
+
+
+class SetEpoch(L.Callback):
+    """Set the epoch of the dataset of each training dataloader at the start of each epoch.
+
+    Lightning only calls ``set_epoch()`` on the *sampler* of a dataloader, so this is required for
+    datasets that shuffle themselves, e.g., a
+    :class:`~notorch.data.iterable.NotorchIterableDataset`, to change their order between epochs.
+    """
+
+    def on_train_epoch_start(self, trainer: L.Trainer, pl_module: L.LightningModule):
+        for dataloader in CombinedLoader(trainer.train_dataloader).flattened:
+            dataset = getattr(dataloader, "dataset", None)
+            if callable(getattr(dataset, "set_epoch", None)):
+                dataset.set_epoch(trainer.current_epoch)
+
+
+class SamplerCheckpoint(L.Callback):
+    """Store the position of a :class:`~notorch.samplers.DistributedSeededSampler` in each
+    checkpoint, so that a run resumed from a checkpoint saved mid-epoch continues the epoch where
+    it stopped rather than restarting it.
+
+    The position is the number of samples that have been trained on in the current epoch, as
+    counted from the ``"index"`` key of each batch. Unlike the position of the sampler itself, it
+    excludes any batches that were fetched ahead of the training step but not yet trained on.
+
+    Parameters
+    ----------
+    sampler : DistributedSeededSampler
+        the sampler of the training dataloader
+    """
+
+    def __init__(self, sampler: DistributedSeededSampler):
+        self.sampler = sampler
+        self.num_trained = 0
+
+    def on_train_epoch_start(self, trainer: L.Trainer, pl_module: L.LightningModule):
+        self.num_trained = 0
+
+    def on_train_batch_end(
+        self,
+        trainer: L.Trainer,
+        pl_module: L.LightningModule,
+        outputs,
+        batch: TensorDict,
+        batch_idx: int,
+    ):
+        self.num_trained += len(batch[INDEX_KEY])
+
+    def state_dict(self) -> dict:
+        return self.sampler.state_dict() | {"num_yielded": self.num_trained}
+
+    def load_state_dict(self, state_dict: dict):
+        self.sampler.load_state_dict(state_dict)
+        self.num_trained = state_dict["num_yielded"]
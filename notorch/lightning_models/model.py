@@ -5,12 +5,13 @@ from collections.abc import Callable
 import lightning as L
 from tensordict import TensorDict
 from tensordict.nn import TensorDictModule, TensorDictSequential
+import torch
 import torch.nn as nn
 from torch.optim import Adam, Optimizer
 from torch.optim.lr_scheduler import LRScheduler
 from torch.optim.optimizer import ParamsT
 
-from notorch.conf import TARGET_KEY_PREFIX
+from notorch.conf import SAMPLE_WEIGHTS_KEY, TARGET_KEY_PREFIX
 from notorch.types import LossConfig, LRSchedConfig, ModuleConfig, TargetTransformConfig
 
 
@@ -19,6 +20,16 @@ def is_target_key(key: str):
     return key.split(".")[0] == TARGET_KEY_PREFIX
 
 
+def is_batch_key(key: str):
+    """Is the input key :attr:`key` supplied by the batch rather than output by the model?"""
+    return is_target_key(key) or key == SAMPLE_WEIGHTS_KEY
+
+
+def get_keys(in_keys: list[str] | dict[str, str]) -> list[str]:
+    """Get the tensordict keys of the input ``in_keys``, which may map from argument names."""
+    return list(in_keys.values()) if isinstance(in_keys, dict) else list(in_keys)
+
+
 class NotorchModel(L.LightningModule):
     """A :class:`SimpleModel` is a generic class for composing (mostly) arbitrary models.
 
@@ -118,7 +129,9 @@ class NotorchModel(L.LightningModule):
             )
             module._weight = loss_config["weight"]
             loss_modules.append(module)
-            selected_out_keys.update([k for k in loss_config["in_keys"] if not is_target_key(k)])
+            selected_out_keys.update(
+                [k for k in get_keys(loss_config["in_keys"]) if not is_batch_key(k)]
+            )
         metric_modules = []
         for name, metric_config in metrics.items():
             module = TensorDictModule(
@@ -126,7 +139,9 @@ class NotorchModel(L.LightningModule):
             )
             module._weight = metric_config["weight"]
             metric_modules.append(module)
-            selected_out_keys.update([k for k in metric_config["in_keys"] if not is_target_key(k)])
+            selected_out_keys.update(
+                [k for k in get_keys(metric_config["in_keys"]) if not is_batch_key(k)]
+            )
 
         selected_out_keys = None if keep_all_output else list(selected_out_keys)
 
@@ -159,6 +174,17 @@ class NotorchModel(L.LightningModule):
         return self.model(batch)
 
     def training_step(self, batch: TensorDict, batch_idx: int):
+        """Compute the training loss of the input batch.
+
+        If the batch contains per-sample weights under the key ``"sample_weights"``, then the
+        per-sample losses are returned as well under the key ``"sample_losses"``. These are
+        computed as the gradient of the loss with respect to the sample weights, so they only
+        include loss terms whose ``in_keys`` map the ``sample_weights`` argument to that key.
+        """
+        sample_weights = batch.get(SAMPLE_WEIGHTS_KEY, None)
+        if sample_weights is not None:
+            sample_weights.requires_grad_()
+
         batch = self(batch)
         batch = self.transforms["targets"](batch)
 
@@ -175,7 +201,40 @@ class NotorchModel(L.LightningModule):
         self.log_dict(loss_dict)
         self.log("train/loss", loss, prog_bar=True)
 
-        return loss
+        if sample_weights is None:
+            return loss
+
+        (grad,) = torch.autograd.grad(loss, sample_weights, retain_graph=True, allow_unused=True)
+        if grad is None:
+            return loss
+
+        return {"loss": loss, "sample_losses": len(sample_weights) * grad.detach()}
+
+    def on_train_epoch_end(self):
+        loader = self.trainer.train_dataloader
+        if hasattr(loader, "prefetch_info"):
+            info = loader.prefetch_info()
+            self.log_dict(
+                {
+                    "prefetch/queue_depth": info.queue_depth,
+                    "prefetch/stall_time": info.stall_time,
+                    "prefetch/mean_stall_time": info.mean_stall_time,
+                }
+            )
+            loader.prefetch_clear()
+
+        dataset = getattr(loader, "dataset", None)
+        if not hasattr(dataset, "cache_info"):
+            return
+
+        cache_dict = {}
+        for name, info in dataset.cache_info().items():
+            cache_dict[f"cache/{name}/hits"] = float(info.hits)
+            cache_dict[f"cache/{name}/misses"] = float(info.misses)
+            cache_dict[f"cache/{name}/hit_rate"] = info.hit_rate
+
+        if len(cache_dict) > 0:
+            self.log_dict(cache_dict)
 
     def validation_step(self, batch: TensorDict, batch_idx: int):
         batch = self(batch)
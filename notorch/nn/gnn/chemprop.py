@@ -1,6 +1,5 @@
 from __future__ import annotations
 
-from copy import copy
 from typing import Literal
 
 import torch.nn as nn
@@ -67,7 +66,7 @@ class ChempropBlock(nn.Module):
         if residual:
             # residual connection on edge features
             def add_edge_attrs(G1, G2):
-                G = copy(G1)
+                G = G1.clone(recurse=False)
                 G.E = G1.E + G2.E
 
                 return G
@@ -80,7 +79,7 @@ class ChempropBlock(nn.Module):
         self.depth = len(self.block)
 
     def forward(self, G: Graph) -> Graph:
-        G_t = copy(G)
+        G_t = G.clone(recurse=False)
         G_t.E = G.V[G.edge_index[0]] + G.E
         G_t = self.block(G_t)
         G_t.V = scatter(G_t.E, G_t.edge_index[0], dim=0, dim_size=G.num_nodes, reduce=self.reduce)
@@ -1,6 +1,5 @@
 from __future__ import annotations
 
-from copy import copy
 from typing import Literal
 
 import torch.nn as nn
@@ -21,7 +20,9 @@ class GraphEmbedding(nn.Module):
         self.edge = nn.EmbeddingBag(num_edge_types, hidden_dim, mode="sum")
 
     def forward(self, G: Graph) -> Graph:
-        G_emb = copy(G)
+        # a shallow copy of a tensorclass shares its tensordict, so assigning to it would
+        # overwrite the input
+        G_emb = G.clone(recurse=False)
         G_emb.V = self.node(G_emb.V)
         G_emb.E = self.edge(G_emb.E)
 
@@ -40,11 +40,11 @@ class _LossFunctionBase(nn.Module):
             case None, None:
                 pass
             case None, _:
-                loss = loss * sample_weights.unsqueeze(0)
+                loss = loss * sample_weights.unsqueeze(1)
             case _, None:
                 loss = loss * self.task_weights
             case _, _:
-                loss = loss * self.task_weights * sample_weights.unsqueeze(0)
+                loss = loss * self.task_weights * sample_weights.unsqueeze(1)
 
         return loss.mean() if mask is None else (loss * mask).sum() / mask.sum()
 
@@ -1,8 +1,12 @@
 from itertools import chain
-from typing import Iterator
+import math
+from typing import Any, Iterator, Self
 
 import numpy as np
-from torch.utils.data import Sampler
+from numpy.typing import ArrayLike
+import pandas as pd
+import torch.distributed as dist
+from torch.utils.data import DistributedSampler, Sampler
 
 
 class SeededSampler(Sampler):
@@ -24,6 +28,120 @@ class SeededSampler(Sampler):
         return len(self.idxs)
 
 
+class DistributedSeededSampler(DistributedSampler):
+    """A :class:`DistributedSeededSampler` is a :class:`SeededSampler` that shards a dataset across
+    distributed ranks and that can be resumed mid-epoch.
+
+    The order of each epoch is a deterministic function of :attr:`seed` and the epoch set via
+    :meth:`set_epoch`, so every rank agrees on the same global order without communicating. Each
+    rank then takes every :attr:`num_replicas`-th index of that order. To give every rank the
+    same number of samples, the order is either padded by repeating its first indices or
+    truncated, depending on :attr:`drop_last`.
+
+    The sampler tracks its position in the current epoch, which can be saved via
+    :meth:`state_dict` and restored via :meth:`load_state_dict` to resume a preempted epoch where
+    it stopped. With Lightning, add a :class:`~notorch.lightning_models.callbacks.SamplerCheckpoint`
+    callback to the trainer to store the position in each checkpoint. The length of the sampler is
+    always the number of samples in a full epoch, so a resumed epoch yields fewer indices than
+    :meth:`__len__`. Because this is a :class:`~torch.utils.data.DistributedSampler`, Lightning
+    will use it as-is rather than replacing it with its own.
+
+    .. note::
+        The position counts the indices handed to the :class:`~torch.utils.data.DataLoader`. With
+        ``num_workers > 0``, the loader fetches batches ahead of the training step, so the indices
+        of any batches that were prefetched but not yet trained on when the state was saved will
+        be skipped upon resuming.
+
+    Parameters
+    ----------
+    N : int
+        the size of the dataset
+    seed : int
+        the random seed to use for shuffling
+    num_replicas : int | None, default=None
+        the number of distributed ranks. If ``None``, it will be inferred from the default process
+        group, if it is initialized, or 1 otherwise.
+    rank : int | None, default=None
+        the rank of the current process. If ``None``, it will be inferred like
+        :attr:`num_replicas`.
+    shuffle : bool, default=True
+        whether to shuffle the indices each epoch
+    drop_last : bool, default=False
+        whether to drop the tail of the order to make it evenly divisible across ranks rather than
+        padding it
+    """
+
+    def __init__(
+        self,
+        N: int,
+        seed: int,
+        num_replicas: int | None = None,
+        rank: int | None = None,
+        shuffle: bool = True,
+        drop_last: bool = False,
+    ):
+        if seed is None:
+            raise ValueError("arg 'seed' was `None`! A SeededSampler must be seeded!")
+
+        initialized = dist.is_available() and dist.is_initialized()
+        if num_replicas is None:
+            num_replicas = dist.get_world_size() if initialized else 1
+        if rank is None:
+            rank = dist.get_rank() if initialized else 0
+
+        super().__init__(range(N), num_replicas, rank, shuffle, seed, drop_last)
+        self.N = N
+        self.num_yielded = 0
+
+    def set_epoch(self, epoch: int) -> None:
+        """Set the epoch of the sampler, which resets its position if the epoch has changed."""
+        if epoch != self.epoch:
+            self.num_yielded = 0
+        self.epoch = epoch
+
+    @property
+    def idxs(self) -> np.ndarray:
+        """The indices of the current rank in the current epoch."""
+        if self.shuffle:
+            idxs = np.random.default_rng([self.seed, self.epoch]).permutation(self.N)
+        else:
+            idxs = np.arange(self.N)
+        # `np.resize()` pads by repeating the array, even if the padding is longer than the array
+        idxs = np.resize(idxs, self.total_size)
+
+        return idxs[self.rank :: self.num_replicas]
+
+    def __iter__(self) -> Iterator[int]:
+        for idx in self.idxs[self.num_yielded :].tolist():
+            self.num_yielded += 1
+            yield idx
+
+        self.num_yielded = 0
+
+    def __len__(self) -> int:
+        return self.num_samples
+
+    def state_dict(self) -> dict[str, Any]:
+        return {
+            "N": self.N,
+            "seed": self.seed,
+            "num_replicas": self.num_replicas,
+            "epoch": self.epoch,
+            "num_yielded": self.num_yielded,
+        }
+
+    def load_state_dict(self, state_dict: dict[str, Any]) -> None:
+        for key in ["N", "seed", "num_replicas"]:
+            if state_dict[key] != getattr(self, key):
+                raise ValueError(
+                    f"Can't resume a sampler with a different '{key}'! "
+                    f"expected: {getattr(self, key)}, got: {state_dict[key]}"
+                )
+
+        self.epoch = state_dict["epoch"]
+        self.num_yielded = state_dict["num_yielded"]
+
+
 class ClassBalanceSampler(Sampler):
     """A :class:`ClassBalanceSampler` samples a dataset such that
     positive and negative classes are equally sampled
@@ -58,3 +176,467 @@ class ClassBalanceSampler(Sampler):
 
     def __len__(self) -> int:
         return 2 * min(len(self._pos_idxs), len(self._neg_idxs))
+
+
+class BudgetBatchSampler(Sampler[list[int]]):
+    """A :class:`BudgetBatchSampler` packs samples into batches of a bounded total size.
+
+    Rather than batching a fixed number of samples, samples are greedily added to the current
+    batch until adding the next one would exceed :attr:`max_nodes` or :attr:`max_edges`, which
+    keeps the memory footprint and step time of graph batches roughly constant. A sample that
+    exceeds a budget on its own is placed in a batch by itself.
+
+    Parameters
+    ----------
+    sizes : ArrayLike
+        an array of shape ``n`` or ``n x 2`` containing the number of nodes and (optionally) the
+        number of edges in each sample. See :meth:`~notorch.data.dataset.NotorchDataset.size_index`
+    max_nodes : int | None, default=None
+        the maximum total number of nodes in a batch. If ``None``, the number of nodes is not
+        bounded.
+    max_edges : int | None, default=None
+        the maximum total number of edges in a batch. If ``None``, the number of edges is not
+        bounded.
+    shuffle : bool, default=False
+        whether to shuffle the samples before packing them each epoch
+    seed : int | None, default=None
+        the random seed to use for shuffling (only used when :attr:`shuffle` is ``True``)
+    drop_last : bool, default=False
+        whether to drop the last batch of each epoch, which is typically not full
+
+    Raises
+    ------
+    ValueError
+        if neither :attr:`max_nodes` nor :attr:`max_edges` is given or if :attr:`max_edges` is
+        given but :attr:`sizes` contains no edge counts
+    """
+
+    def __init__(
+        self,
+        sizes: ArrayLike,
+        max_nodes: int | None = None,
+        max_edges: int | None = None,
+        shuffle: bool = False,
+        seed: int | None = None,
+        drop_last: bool = False,
+    ):
+        sizes = np.asarray(sizes, dtype=np.int64)
+
+        if max_nodes is None and max_edges is None:
+            raise ValueError("One of args 'max_nodes' or 'max_edges' must be supplied!")
+        if max_edges is not None and (sizes.ndim < 2 or sizes.shape[1] < 2):
+            raise ValueError("arg 'max_edges' was supplied, but 'sizes' contains no edge counts!")
+
+        if sizes.ndim == 1:
+            sizes = np.stack([sizes, np.zeros_like(sizes)], axis=1)
+
+        self.sizes = sizes[:, :2]
+        self.max_nodes = max_nodes
+        self.max_edges = max_edges
+        self.shuffle = shuffle
+        self.rg = np.random.default_rng(seed)
+        self.drop_last = drop_last
+        self._batches: list[list[int]] | None = None
+
+    def _pack(self) -> list[list[int]]:
+        """Greedily pack the (optionally shuffled) samples into batches."""
+        N = len(self.sizes)
+        idxs = self.rg.permutation(N) if self.shuffle else np.arange(N)
+        max_nodes = float("inf") if self.max_nodes is None else self.max_nodes
+        max_edges = float("inf") if self.max_edges is None else self.max_edges
+
+        starts = [0]
+        num_nodes = num_edges = 0
+        for i, (n, e) in enumerate(self.sizes[idxs].tolist()):
+            num_nodes += n
+            num_edges += e
+            if i > starts[-1] and (num_nodes > max_nodes or num_edges > max_edges):
+                starts.append(i)
+                num_nodes, num_edges = n, e
+
+        batches = [idxs[i:j].tolist() for i, j in zip(starts, [*starts[1:], N]) if i < j]
+        if self.drop_last and len(batches) > 0:
+            batches = batches[:-1]
+
+        return batches
+
+    def __iter__(self) -> Iterator[list[int]]:
+        # reuse the batches packed by a preceding call to `__len__()`, so the two agree
+        batches = self._pack() if self._batches is None else self._batches
+        self._batches = None
+
+        return iter(batches)
+
+    def __len__(self) -> int:
+        if self._batches is None:
+            self._batches = self._pack()
+
+        return len(self._batches)
+
+
+class WeightedSampler(Sampler[int]):
+    """A :class:`WeightedSampler` samples a dataset in proportion to per-sample weights.
+
+    Sampling with replacement uses an alias table [1]_, which is built once in :math:`O(n)` time
+    and then draws each sample in :math:`O(1)` time. Sampling without replacement uses the
+    exponential-key method of [2]_, which draws an entire epoch in :math:`O(n \\log n)` time. Both
+    are fully vectorized and indices are generated in chunks, so the sampler remains fast for
+    tens of millions of samples.
+
+    Parameters
+    ----------
+    weights : ArrayLike
+        an array of shape ``n`` containing the non-negative (and not necessarily normalized)
+        weight of each sample
+    num_samples : int | None, default=None
+        the number of samples to draw each epoch. If ``None``, draw as many samples as there are
+        weights.
+    replacement : bool, default=True
+        whether to sample with replacement
+    seed : int | None, default=None
+        the random seed to use for sampling
+
+    Raises
+    ------
+    ValueError
+        if any weight is negative or not finite, if every weight is 0, or if sampling without
+        replacement and :attr:`num_samples` is larger than the number of non-zero weights
+
+    References
+    ----------
+    .. [1] Vose, M. D. IEEE Trans. Softw. Eng. 1991, 17 (9), 972-975. doi:10.1109/32.92917
+    .. [2] Efraimidis, P. S.; Spirakis, P. G. Inf. Process. Lett. 2006, 97 (5), 181-185.
+        doi:10.1016/j.ipl.2005.11.003
+    """
+
+    chunksize: int = 65536
+
+    def __init__(
+        self,
+        weights: ArrayLike,
+        num_samples: int | None = None,
+        replacement: bool = True,
+        seed: int | None = None,
+    ):
+        weights = np.asarray(weights, dtype=np.float64).reshape(-1)
+        if not np.isfinite(weights).all() or (weights < 0).any():
+            raise ValueError("arg 'weights' must be finite and non-negative!")
+        if not (weights > 0).any():
+            raise ValueError("arg 'weights' must contain at least one non-zero weight!")
+
+        self.weights = weights
+        self.num_samples = len(weights) if num_samples is None else num_samples
+        self.replacement = replacement
+        self.rg = np.random.default_rng(seed)
+
+        if replacement:
+            self.prob, self.alias = self.build_alias_table(weights)
+        elif self.num_samples > np.count_nonzero(weights):
+            raise ValueError(
+                "Can't draw more samples than there are non-zero weights without replacement! "
+                f"got: {self.num_samples} samples and {np.count_nonzero(weights)} non-zero weights"
+            )
+
+    @staticmethod
+    def build_alias_table(weights: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        """Build the alias table of the input weights.
+
+        This is a vectorized equivalent of Vose's algorithm: lay the deficits of the "small"
+        entries (scaled probability below 1) end-to-end and do the same for the surpluses of the
+        "large" entries. Each small entry is aliased to the large entry whose surplus covers the
+        start of its deficit, and each large entry whose surplus is exhausted before the end
+        becomes small and is aliased to the next large entry.
+
+        Returns
+        -------
+        np.ndarray
+            an array of shape ``n`` containing the probability of keeping each entry
+        np.ndarray
+            an array of shape ``n`` containing the alias of each entry
+        """
+        n = len(weights)
+        q = weights * (n / weights.sum())
+        prob = np.ones(n)
+        alias = np.arange(n)
+
+        small = q < 1
+        S, L = np.flatnonzero(small), np.flatnonzero(~small)
+        if len(L) == 0:
+            # the weights are uniform up to rounding error
+            return prob, alias
+
+        deficits = 1 - q[S]
+        C = np.cumsum(deficits)
+        T = np.cumsum(q[L] - 1)
+
+        prob[S] = q[S]
+        # a deficit that starts exactly where a surplus ends is covered by the next large entry
+        starts = np.concatenate([[0], C[:-1]])
+        alias[S] = L[np.searchsorted(T, starts, side="right").clip(max=len(L) - 1)]
+
+        exhausted = np.flatnonzero(T[:-1] < C[-1]) if len(C) > 0 else np.empty(0, int)
+        # a surplus that ends exactly where a deficit starts or ends is exhausted without being
+        # overdrawn
+        i = np.searchsorted(C, T[exhausted], side="left").clip(max=len(C) - 1)
+        overdraft = np.where(starts[i] < T[exhausted], C[i] - T[exhausted], 0)
+        prob[L[exhausted]] = (1 - overdraft).clip(0, 1)
+        alias[L[exhausted]] = L[exhausted + 1]
+
+        return prob, alias
+
+    @classmethod
+    def from_column(cls, df: pd.DataFrame, column: str, **kwargs) -> Self:
+        """Build a :class:`WeightedSampler` from the per-sample weights in a column of the input
+        :class:`~pandas.DataFrame`. See :class:`WeightedSampler` for details on the keyword
+        arguments."""
+        return cls(df[column].to_numpy(), **kwargs)
+
+    @classmethod
+    def class_balanced(cls, Y: ArrayLike, chunksize: int = 65536, **kwargs) -> Self:
+        """Build a :class:`WeightedSampler` that balances the positives and negatives of every
+        task.
+
+        The weight of a sample is the mean over each of its labeled tasks ``t`` of
+        :math:`1 / (2 p_t)` if it is a positive of task ``t`` and :math:`1 / (2 (1 - p_t))`
+        otherwise, where :math:`p_t` is the positive rate of task ``t``. For a single task, this
+        makes positives and negatives equally likely to be drawn.
+
+        Parameters
+        ----------
+        Y : ArrayLike
+            an array of shape ``n x t`` containing the binary labels of each task, where missing
+            labels are ``NaN``
+        chunksize : int, default=65536
+            the number of rows of :attr:`Y` to process at a time
+        **kwargs
+            see :class:`WeightedSampler`
+        """
+        Y = np.asarray(Y)
+        Y = Y.reshape(-1, 1) if Y.ndim == 1 else Y
+
+        num_pos = np.zeros(Y.shape[1])
+        num_labeled = np.zeros(Y.shape[1])
+        for i in range(0, len(Y), chunksize):
+            Y_i = Y[i : i + chunksize].astype(float)
+            num_pos += np.nansum(Y_i, 0)
+            num_labeled += (~np.isnan(Y_i)).sum(0)
+        p = num_pos / np.maximum(num_labeled, 1)
+        with np.errstate(divide="ignore"):
+            w_pos = np.where(p > 0, 0.5 / p, 0)
+            w_neg = np.where(p < 1, 0.5 / (1 - p), 0)
+
+        weights = np.empty(len(Y))
+        for i in range(0, len(Y), chunksize):
+            Y_i = Y[i : i + chunksize].astype(float)
+            labeled = ~np.isnan(Y_i)
+            W_i = np.where(Y_i > 0, w_pos, w_neg) * labeled
+            weights[i : i + chunksize] = W_i.sum(1) / np.maximum(labeled.sum(1), 1)
+
+        return cls(weights, **kwargs)
+
+    def _iter_chunks(self) -> Iterator[np.ndarray]:
+        if not self.replacement:
+            keys = self.rg.exponential(size=len(self.weights))
+            with np.errstate(divide="ignore"):
+                keys /= self.weights
+            idxs = np.argpartition(keys, self.num_samples - 1)[: self.num_samples]
+            idxs = idxs[np.argsort(keys[idxs])]
+            for i in range(0, len(idxs), self.chunksize):
+                yield idxs[i : i + self.chunksize]
+
+            return
+
+        n = len(self.weights)
+        for i in range(0, self.num_samples, self.chunksize):
+            size = min(self.chunksize, self.num_samples - i)
+            idxs = self.rg.integers(n, size=size)
+            keep = self.rg.random(size) < self.prob[idxs]
+
+            yield np.where(keep, idxs, self.alias[idxs])
+
+    def __iter__(self) -> Iterator[int]:
+        for idxs in self._iter_chunks():
+            yield from idxs.tolist()
+
+    def __len__(self) -> int:
+        return self.num_samples
+
+
+class ImportanceSampler(WeightedSampler):
+    """An :class:`ImportanceSampler` samples a dataset in proportion to a smoothed estimate of the
+    loss of each sample [1]_.
+
+    Per-sample losses are recorded via :meth:`update` (e.g., by the
+    :class:`~notorch.lightning_models.callbacks.ImportanceSampling` callback) and smoothed with an
+    exponential moving average. At the start of each epoch, the sampling probability of each
+    sample is set in proportion to its smoothed loss and mixed with a uniform distribution to
+    keep every sample reachable. Samples that have not been seen yet are assigned the largest
+    smoothed loss. To keep the gradient estimate unbiased, each drawn sample must be weighted by
+    its :meth:`importance_weights` in the loss.
+
+    Parameters
+    ----------
+    N : int
+        the size of the dataset
+    num_samples : int | None, default=None
+        the number of samples to draw each epoch. If ``None``, draw :attr:`N` samples.
+    seed : int | None, default=None
+        the random seed to use for sampling
+    smoothing : float, default=0.9
+        the weight of the previous estimate in the moving average of each sample's loss
+    uniform_mix : float, default=0.1
+        the weight of the uniform distribution in the sampling distribution
+    warmup_epochs : int, default=1
+        the number of epochs to sample uniformly before sampling by loss
+
+    References
+    ----------
+    .. [1] Katharopoulos, A.; Fleuret, F. "Not All Samples Are Created Equal: Deep Learning with
+        Importance Sampling." ICML, 2018. https://doi.org/10.48550/arXiv.1803.00942
+    """
+
+    def __init__(
+        self,
+        N: int,
+        num_samples: int | None = None,
+        seed: int | None = None,
+        smoothing: float = 0.9,
+        uniform_mix: float = 0.1,
+        warmup_epochs: int = 1,
+    ):
+        if not 0 < uniform_mix <= 1:
+            raise ValueError(f"arg 'uniform_mix' must be in (0, 1]! got: {uniform_mix}")
+
+        super().__init__(np.ones(N), num_samples, True, seed)
+
+        self.smoothing = smoothing
+        self.uniform_mix = uniform_mix
+        self.warmup_epochs = warmup_epochs
+        self.scores = np.full(N, np.nan)
+        self.epoch = 0
+
+    @property
+    def probs(self) -> np.ndarray:
+        """The sampling probability of each sample in the current epoch."""
+        return self.weights / self.weights.sum()
+
+    def update(self, idxs: ArrayLike, losses: ArrayLike) -> None:
+        """Record the losses of the input samples."""
+        idxs = np.asarray(idxs, dtype=np.int64)
+        losses = np.asarray(losses, dtype=np.float64)
+
+        scores = self.scores[idxs]
+        self.scores[idxs] = np.where(
+            np.isnan(scores), losses, self.smoothing * scores + (1 - self.smoothing) * losses
+        )
+
+    def importance_weights(self, idxs: ArrayLike) -> np.ndarray:
+        """Get the importance weight :math:`1 / (N p_i)` of each of the input samples."""
+        return 1 / (len(self.weights) * self.probs[np.asarray(idxs, dtype=np.int64)])
+
+    def variance_reduction(self) -> float:
+        """Estimate the factor by which the variance of the (loss-proxy) gradient estimate of the
+        current epoch is reduced relative to uniform sampling.
+
+        A value of :math:`g` means that uniform sampling would need about :math:`g` times as many
+        samples to reach the same variance, i.e., that about :math:`1 - 1/g` of the steps were
+        saved. The smoothed losses are only a proxy for the per-sample gradient norms, so this is
+        an optimistic estimate.
+        """
+        seen = ~np.isnan(self.scores)
+        if not seen.any():
+            return 1.0
+
+        s = self.scores[seen]
+        p = self.probs[seen] / self.probs[seen].sum()
+        mean_sq = s.mean() ** 2
+        var_uniform = (s**2).mean() - mean_sq
+        var_importance = (s**2 / (len(s) ** 2 * p)).sum() - mean_sq
+
+        return float(var_uniform / var_importance) if var_importance > 0 else 1.0
+
+    def __iter__(self) -> Iterator[int]:
+        seen = ~np.isnan(self.scores)
+        if self.epoch >= self.warmup_epochs and seen.any() and self.scores[seen].max() > 0:
+            scores = np.where(seen, self.scores, self.scores[seen].max()).clip(min=0)
+            p = scores / scores.sum()
+            self.weights = (1 - self.uniform_mix) * p + self.uniform_mix / len(p)
+            self.prob, self.alias = self.build_alias_table(self.weights)
+        self.epoch += 1
+
+        return super().__iter__()
+
+
+class BlockShuffleSampler(Sampler[int]):
+    """A :class:`BlockShuffleSampler` shuffles a dataset such that reads from an on-disk database
+    remain mostly sequential.
+
+    The indices are divided into contiguous blocks of :attr:`block_size` indices and the order of
+    the blocks is shuffled. The indices are then shuffled within consecutive windows of
+    :attr:`window_size` blocks. Each window therefore touches only :attr:`window_size` blocks,
+    which are each read sequentially, while samples from different parts of the dataset are still
+    mixed together. The block size should match the layout of the underlying database (see
+    :meth:`from_database`).
+
+    Parameters
+    ----------
+    N : int
+        the size of the dataset
+    block_size : int
+        the number of contiguous indices in each block
+    window_size : int, default=8
+        the number of consecutive blocks whose indices are shuffled together. Larger windows give
+        more thorough shuffling at the cost of touching more blocks at once.
+    seed : int | None, default=None
+        the random seed to use for shuffling
+    """
+
+    def __init__(self, N: int, block_size: int, window_size: int = 8, seed: int | None = None):
+        if block_size < 1:
+            raise ValueError(f"arg 'block_size' must be >= 1! got: {block_size}")
+        if window_size < 1:
+            raise ValueError(f"arg 'window_size' must be >= 1! got: {window_size}")
+
+        self.N = N
+        self.block_size = block_size
+        self.window_size = window_size
+        self.rg = np.random.default_rng(seed)
+
+    @classmethod
+    def from_database(
+        cls, database, window_size: int = 8, seed: int | None = None, nbytes: int = 2**20
+    ) -> Self:
+        """Build a :class:`BlockShuffleSampler` with blocks matched to the layout of the input
+        database.
+
+        If the database has ``chunks`` (e.g., an
+        :class:`~notorch.databases.hdf5.HDF5DatabaseOnDisk`), each block is a single chunk along
+        the first axis. Otherwise, each block is sized to span :attr:`nbytes` of the database's
+        ``X`` array (e.g., the memory-mapped array of an
+        :class:`~notorch.databases.np.NPYDatabase`), i.e., a run of consecutive pages.
+        """
+        chunks = getattr(database, "chunks", None)
+        if chunks is not None:
+            block_size = chunks[0]
+        else:
+            X = database.X
+            row_nbytes = max(X.itemsize * math.prod(X.shape[1:]), 1)
+            block_size = max(nbytes // row_nbytes, 1)
+
+        return cls(len(database), block_size, window_size, seed)
+
+    def __iter__(self) -> Iterator[int]:
+        num_blocks = math.ceil(self.N / self.block_size)
+        blocks = self.rg.permutation(num_blocks)
+        idxs = (blocks[:, None] * self.block_size + np.arange(self.block_size)).ravel()
+        # assign windows by block so that the partial last block doesn't shift the windows after it
+        window_ids = np.repeat(np.arange(num_blocks) // self.window_size, self.block_size)
+        mask = idxs < self.N
+        idxs, window_ids = idxs[mask], window_ids[mask]
+
+        idxs = idxs[np.argsort(window_ids + self.rg.random(len(idxs)))]
+
+        return iter(idxs.tolist())
+
+    def __len__(self) -> int:
+        return self.N
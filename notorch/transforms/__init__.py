@@ -1,4 +1,5 @@
 from .base import Pipeline, Transform
+from .cache import CacheInfo, DiskCache, LRUCache
 from .chem import SmiToMol
 from .graph import MolToGraph
 from .mol import MolToFP
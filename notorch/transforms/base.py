@@ -18,6 +18,14 @@ class Transform[S, T, T_batched](Protocol):
     def __call__(self, input: S) -> T: ...
     def collate(self, inputs: Collection[T]) -> T_batched: ...
 
+    def transform_batch(self, inputs: Sequence[S]) -> T_batched:
+        """Transform and collate a batch of inputs.
+
+        By default, this is equivalent to calling :meth:`collate` on the transformed inputs.
+        Subclasses that can featurize an entire batch more efficiently should override this.
+        """
+        return self.collate([self(input) for input in inputs])
+
 
 @dataclass
 class Pipeline[S, T, T_batched](Transform[S, T, T_batched]):
@@ -33,6 +41,13 @@ class Pipeline[S, T, T_batched](Transform[S, T, T_batched]):
 
         return output  # type: ignore
 
+    def transform_batch(self, inputs: Sequence[S]) -> T_batched:
+        *transforms, last = self.transforms
+        for transform in transforms:
+            inputs = [transform(input) for input in inputs]
+
+        return last.transform_batch(inputs)
+
     def __repr__(self) -> str:
         text = "\n".join(f"({i}): {transform}" for i, transform in enumerate(self.transforms))
 
@@ -80,7 +80,7 @@ class MultiTypeBondTransform:
         lines = []
 
         if self.bond_type_map is not None:
-            lines.append(f"(bond_types): {self.stereo_map}")
+            lines.append(f"(bond_types): {self.bond_type_map}")
         if self.stereo_map is not None:
             lines.append(f"(stereos): {self.stereo_map}")
         text = "\n".join(lines)
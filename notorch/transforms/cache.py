@@ -0,0 +1,340 @@
+from _thread import LockType
+from collections import OrderedDict
+from collections.abc import Callable, Collection, Hashable
+from dataclasses import dataclass, field, fields, is_dataclass
+import hashlib
+import multiprocessing as mp
+from multiprocessing.sharedctypes import Synchronized
+import os
+from os import PathLike
+from pathlib import Path
+import pickle
+import sqlite3
+import sys
+import textwrap
+import threading
+from typing import NamedTuple
+import warnings
+
+import numpy as np
+from rdkit import Chem
+from torch import Tensor
+
+from notorch.conf import REPR_INDENT
+from notorch.transforms.base import Transform
+from notorch.types import Mol
+
+PICKLE_PROTOCOL = 5
+
+_CONNECT_LOCK = threading.Lock()
+
+
+def fingerprint(transform: Transform) -> str:
+    """Compute a stable fingerprint of the input transform's configuration.
+
+    The fingerprint is the SHA-256 digest of the :func:`repr` of the transform, so any
+    :class:`Transform` whose configuration (e.g., atom/bond vocabularies, fingerprint radius and
+    length, or SMILES parsing flags) is fully described by its ``repr`` can be fingerprinted.
+
+    Example
+    -------
+    >>> fingerprint(SmiToMol()) == fingerprint(SmiToMol())
+    True
+    >>> fingerprint(SmiToMol()) == fingerprint(SmiToMol(add_h=True))
+    False
+    """
+    text = repr(transform)
+    if " object at 0x" in text:
+        warnings.warn(
+            f"the repr of transform `{type(transform).__name__}` contains a memory address! "
+            "Its fingerprint will not be stable across processes and cached outputs will not be "
+            "reused. Define a `__repr__` that fully describes its configuration."
+        )
+
+    return hashlib.sha256(text.encode()).hexdigest()
+
+
+def hash_input(input) -> bytes:
+    """Hash an input value to a fixed-size key."""
+    return hashlib.blake2b(pickle.dumps(input, PICKLE_PROTOCOL), digest_size=16).digest()
+
+
+@dataclass(repr=False)
+class DiskCache[S, T, T_batched](Transform[S, T, T_batched]):
+    """A :class:`DiskCache` memoizes the outputs of a wrapped :class:`Transform` in a persistent,
+    on-disk key-value store.
+
+    Outputs are keyed on a hash of the input value and stored in an SQLite database inside
+    :attr:`cache_dir` whose filename contains the :func:`fingerprint` of the wrapped transform.
+    Changing the configuration of the transform therefore changes the file that is read from,
+    which invalidates any previously cached outputs. The store is opened in write-ahead-log mode
+    with reads served through a memory map, so a single cache file may be shared across epochs,
+    runs, and :class:`~torch.utils.data.DataLoader` workers.
+
+    Parameters
+    ----------
+    transform : Transform
+        the transform to cache
+    cache_dir : PathLike
+        the directory under which the cache file will be placed
+    mmap_size : int, default=2**30
+        the maximum number of bytes of the cache file that will be memory-mapped
+
+    Example
+    -------
+    >>> transform = DiskCache(Pipeline([SmiToMol(), MolToGraph()]), "~/.cache/notorch")
+    >>> G = transform("c1ccccc1")  # featurizes and stores the output
+    >>> G = transform("c1ccccc1")  # reads the output from disk
+    """
+
+    transform: Transform[S, T, T_batched]
+    cache_dir: PathLike
+    mmap_size: int = 2**30
+
+    path: Path = field(init=False)
+    _conn: sqlite3.Connection | None = field(init=False, default=None)
+    _lock: LockType | None = field(init=False, default=None)
+    _pid: int | None = field(init=False, default=None)
+
+    def __post_init__(self):
+        self.fingerprint = fingerprint(self.transform)
+
+        cache_dir = Path(self.cache_dir).expanduser()
+        cache_dir.mkdir(parents=True, exist_ok=True)
+        name = type(self.transform).__name__.lower()
+        self.path = cache_dir / f"{name}-{self.fingerprint[:16]}.sqlite"
+
+    @property
+    def _in_key_(self) -> str:
+        return self.transform._in_key_
+
+    @property
+    def _out_key_(self) -> str:
+        return self.transform._out_key_
+
+    @property
+    def conn(self) -> sqlite3.Connection:
+        """the connection to the cache file of the current process, opened lazily so that each
+        worker process receives its own connection.
+
+        The connection is shared by every thread of the process (e.g., those of a thread-backed
+        :func:`~notorch.data.featurize.featurize` or a
+        :class:`~notorch.data.prefetch.PrefetchLoader`), so it must only be used while holding
+        :attr:`_lock`.
+        """
+        if self._conn is None or self._pid != os.getpid():
+            with _CONNECT_LOCK:
+                if self._conn is None or self._pid != os.getpid():
+                    self._lock = threading.Lock()
+                    self._conn = self._connect()
+                    self._pid = os.getpid()
+
+        return self._conn
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, timeout=60, isolation_level=None, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute(f"PRAGMA mmap_size={self.mmap_size}")
+        conn.execute("CREATE TABLE IF NOT EXISTS meta (transform TEXT)")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS cache (key BLOB PRIMARY KEY, value BLOB) WITHOUT ROWID"
+        )
+        if conn.execute("SELECT COUNT(*) FROM meta").fetchone()[0] == 0:
+            conn.execute("INSERT INTO meta VALUES (?)", (repr(self.transform),))
+
+        return conn
+
+    def __call__(self, input: S) -> T:
+        key = hash_input(input)
+        conn = self.conn
+        with self._lock:
+            row = conn.execute("SELECT value FROM cache WHERE key = ?", (key,)).fetchone()
+        if row is not None:
+            return pickle.loads(row[0])
+
+        output = self.transform(input)
+        value = pickle.dumps(output, PICKLE_PROTOCOL)
+        with self._lock:
+            conn.execute("INSERT OR IGNORE INTO cache VALUES (?, ?)", (key, value))
+
+        return output
+
+    def collate(self, inputs: Collection[T]) -> T_batched:
+        return self.transform.collate(inputs)
+
+    def __getstate__(self) -> dict:
+        state = self.__dict__.copy()
+        state["_conn"] = None
+        state["_lock"] = None
+        state["_pid"] = None
+
+        return state
+
+    def __repr__(self) -> str:
+        text = "\n".join([f"(transform): {self.transform}", f"(path): {repr(str(self.path))}"])
+
+        return "\n".join([f"{type(self).__name__}(", textwrap.indent(text, REPR_INDENT), ")"])
+
+
+class CacheInfo(NamedTuple):
+    hits: int
+    misses: int
+    size: int
+    nbytes: int
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+
+        return self.hits / total if total > 0 else 0.0
+
+
+def sizeof(obj) -> int:
+    """Estimate the number of bytes used by the input object.
+
+    Tensors and arrays count their underlying storage, :class:`~rdkit.Chem.Mol` objects count
+    their binary serialization, and dataclasses (e.g., :class:`~notorch.data.models.graph.Graph`),
+    lists and tuples sum the size of their members.
+    """
+    if isinstance(obj, Tensor):
+        return obj.element_size() * obj.nelement()
+    elif isinstance(obj, np.ndarray):
+        return obj.nbytes
+    elif isinstance(obj, Mol):
+        return len(obj.ToBinary())
+    elif is_dataclass(obj):
+        return sum(sizeof(getattr(obj, f.name)) for f in fields(obj))
+    elif isinstance(obj, (list, tuple)):
+        return sys.getsizeof(obj) + sum(sizeof(x) for x in obj)
+
+    return sys.getsizeof(obj)
+
+
+@dataclass(repr=False)
+class LRUCache[S: Hashable, T, T_batched](Transform[S, T, T_batched]):
+    """A :class:`LRUCache` memoizes the outputs of a wrapped :class:`Transform` in memory, evicting
+    the least recently used outputs once its budget is exceeded.
+
+    The cache itself is local to each process, but the hit and miss counters live in shared
+    memory, so :meth:`cache_info` reports totals across all :class:`~torch.utils.data.DataLoader`
+    workers that were forked after the cache was created. Shared counters can't be pickled, so a
+    pickled or deep-copied cache (e.g., one sent to a spawned worker) starts new counters from
+    the current totals, and its counts are no longer reflected in those of the original.
+
+    Outputs are stored under the key of each input. By default, a :class:`~rdkit.Chem.Mol` is keyed
+    on its canonical SMILES, as molecules are otherwise hashed by identity and two copies of the
+    same molecule would never share an entry, while any other input is its own key.
+
+    Parameters
+    ----------
+    transform : Transform
+        the transform to cache
+    max_size : int | None, default=4096
+        the maximum number of outputs to store. If ``None``, the number of entries is unbounded.
+    max_bytes : int | None, default=None
+        the maximum total size (in bytes) of the stored outputs, as estimated by :func:`sizeof`.
+        If ``None``, the size of the cache is unbounded.
+    key : Callable[[S], Hashable] | None, default=None
+        a function that calculates the key of an input. If ``None``, use the default keys
+        described above.
+    """
+
+    transform: Transform[S, T, T_batched]
+    max_size: int | None = 4096
+    max_bytes: int | None = None
+    key: Callable[[S], Hashable] | None = None
+
+    cache: OrderedDict[S, tuple[T, int]] = field(init=False, default_factory=OrderedDict)
+    nbytes: int = field(init=False, default=0)
+    _hits: Synchronized = field(init=False)
+    _misses: Synchronized = field(init=False)
+
+    def __post_init__(self):
+        self._hits = mp.Value("Q", 0)
+        self._misses = mp.Value("Q", 0)
+
+    @property
+    def _in_key_(self) -> str:
+        return self.transform._in_key_
+
+    @property
+    def _out_key_(self) -> str:
+        return self.transform._out_key_
+
+    def _key(self, input: S) -> Hashable:
+        if self.key is not None:
+            return self.key(input)
+        if isinstance(input, Mol):
+            return Chem.MolToSmiles(input)
+
+        return input
+
+    def __call__(self, input: S) -> T:
+        key = self._key(input)
+        try:
+            output, _ = self.cache[key]
+        except KeyError:
+            pass
+        else:
+            self.cache.move_to_end(key)
+            with self._hits.get_lock():
+                self._hits.value += 1
+
+            return output
+
+        with self._misses.get_lock():
+            self._misses.value += 1
+
+        output = self.transform(input)
+        nbytes = sizeof(output) if self.max_bytes is not None else 0
+        self.cache[key] = (output, nbytes)
+        self.nbytes += nbytes
+        self._evict()
+
+        return output
+
+    def _evict(self):
+        while (self.max_size is not None and len(self.cache) > self.max_size) or (
+            self.max_bytes is not None and self.nbytes > self.max_bytes
+        ):
+            _, (_, nbytes) = self.cache.popitem(last=False)
+            self.nbytes -= nbytes
+
+    def collate(self, inputs: Collection[T]) -> T_batched:
+        return self.transform.collate(inputs)
+
+    def cache_info(self) -> CacheInfo:
+        """The current cache statistics. The ``size`` and ``nbytes`` fields are local to the
+        calling process."""
+        return CacheInfo(self._hits.value, self._misses.value, len(self.cache), self.nbytes)
+
+    def cache_clear(self):
+        self.cache.clear()
+        self.nbytes = 0
+        with self._hits.get_lock(), self._misses.get_lock():
+            self._hits.value = 0
+            self._misses.value = 0
+
+    def __getstate__(self) -> dict:
+        state = self.__dict__.copy()
+        state["_hits"] = self._hits.value
+        state["_misses"] = self._misses.value
+
+        return state
+
+    def __setstate__(self, state: dict):
+        self.__dict__.update(state)
+        self._hits = mp.Value("Q", state["_hits"])
+        self._misses = mp.Value("Q", state["_misses"])
+
+    def __repr__(self) -> str:
+        text = "\n".join(
+            [
+                f"(transform): {self.transform}",
+                f"(max_size): {self.max_size}",
+                f"(max_bytes): {self.max_bytes}",
+            ]
+        )
+
+        return "\n".join([f"{type(self).__name__}(", textwrap.indent(text, REPR_INDENT), ")"])
@@ -1,9 +1,12 @@
+from collections.abc import Sequence
 from dataclasses import dataclass, field
+from itertools import chain
 import textwrap
 from typing import ClassVar
 
 import numpy as np
 import torch
+from torch.nn import functional as F
 
 from notorch.conf import REPR_INDENT
 from notorch.data.models.graph import BatchedGraph, Graph
@@ -44,6 +47,38 @@ class MolToGraph(Transform[Mol, Graph, BatchedGraph]):
 
     collate = BatchedGraph.from_graphs
 
+    def transform_batch(self, mols: Sequence[Mol]) -> BatchedGraph:
+        """Featurize a batch of molecules directly into a :class:`BatchedGraph` with a single call
+        to each of the atom and bond transforms."""
+        num_nodes = torch.tensor([mol.GetNumAtoms() for mol in mols])
+        num_edges = 2 * torch.tensor([mol.GetNumBonds() for mol in mols])
+        node_ptr = F.pad(num_nodes.cumsum(0), [1, 0])
+        edge_ptr = F.pad(num_edges.cumsum(0), [1, 0])
+
+        V = self.atom_transform(chain.from_iterable(mol.GetAtoms() for mol in mols))
+        E = self.bond_transform(chain.from_iterable(mol.GetBonds() for mol in mols))
+        E = E.repeat_interleave(2, dim=0)
+
+        edge_index = []
+        for mol, offset in zip(mols, node_ptr[:-1].tolist()):
+            for bond in mol.GetBonds():
+                u, v = bond.GetBeginAtomIdx() + offset, bond.GetEndAtomIdx() + offset
+                edge_index.extend([(u, v), (v, u)])
+        edge_index = torch.tensor(edge_index, dtype=torch.long).reshape(-1, 2).T
+        rev_index = torch.from_numpy(np.arange(len(E)).reshape(-1, 2)[:, ::-1].ravel())
+        batch_index = torch.arange(len(mols))
+
+        return BatchedGraph(
+            V,
+            E,
+            edge_index,
+            rev_index,
+            batch_node_index=batch_index.repeat_interleave(num_nodes),
+            batch_edge_index=batch_index.repeat_interleave(num_edges),
+            node_ptr=node_ptr,
+            edge_ptr=edge_ptr,
+        )
+
     def __repr__(self) -> str:
         text = "\n".join(
             [f"(atom_transform): {self.atom_transform}", f"(bond_transform): {self.bond_transform}"]
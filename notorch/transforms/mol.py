@@ -1,4 +1,4 @@
-from collections.abc import Callable, Sized
+from collections.abc import Callable, Sequence, Sized
 from dataclasses import InitVar, dataclass
 from typing import ClassVar
 
@@ -24,6 +24,7 @@ class MolToFP(
     bit_fingerprint: InitVar[bool] = True
 
     def __post_init__(self, bit_fingerprint: bool = True):
+        self.bit_fingerprint = bit_fingerprint
         self.func: Callable[[Mol], Float[NDArray, "d"]] = (
             self.fpgen.GetFingerprintAsNumPy
             if bit_fingerprint
@@ -38,6 +39,20 @@ class MolToFP(
 
         return torch.from_numpy(fp).float()
 
+    def transform_batch(self, inputs: Sequence[Mol]) -> Float[Tensor, "n d"]:
+        out = self._collate_buffer((len(inputs), len(self)))
+        out_np = out.numpy()
+        for i, mol in enumerate(inputs):
+            out_np[i] = self.func(mol)
+
+        return out
+
+    def __repr__(self) -> str:
+        return (
+            f"{type(self).__name__}(fpgen='{self.fpgen.GetInfoString()}', "
+            f"bit_fingerprint={self.bit_fingerprint})"
+        )
+
     @classmethod
     def morgan(
         cls,
@@ -1,12 +1,141 @@
+from collections import deque
 from collections.abc import Collection
+import os
+from typing import ClassVar
 
 from jaxtyping import Num
 import numpy as np
-from numpy.typing import NDArray
+from numpy.typing import ArrayLike, NDArray
 import torch
 from torch import Tensor
+from torch.utils.data import get_worker_info
+
+from notorch.utils.quantize import Quantizer
 
 
 class CollateNDArrayMixin:
+    """Collate rows of arrays or tensors into a single tensor of dtype :attr:`collate_dtype`.
+
+    Each batch is written directly into its output tensor with a single copy (and cast, if the
+    dtype of the inputs differs from :attr:`collate_dtype`):
+
+    - inside a :class:`~torch.utils.data.DataLoader` worker, the output is allocated in shared
+      memory, so it isn't copied again when it's sent to the main process.
+    - otherwise, if :attr:`num_buffers` is greater than 0, the output is a view of one of a ring of
+      :attr:`num_buffers` reusable buffers. A batch collated this way is only valid until
+      :attr:`num_buffers` more batches have been collated, so the ring should be larger than the
+      number of batches in flight at once (e.g., the queue size of a
+      :class:`~notorch.data.prefetch.PrefetchLoader` + 1).
+    - otherwise, the output is freshly allocated.
+
+    If :attr:`quantizer` is set, the stored rows are assumed to be in its storage format. A batch
+    of stored rows is gathered as-is and then dequantized into the output (see :meth:`gather` and
+    :meth:`_collate_stored`), while single rows are dequantized as they're read (see
+    :meth:`_dequantize_row`), so the values returned by ``__getitem__`` and collated by
+    :meth:`collate` are always dequantized.
+    """
+
+    collate_dtype: ClassVar[torch.dtype] = torch.float
+    num_buffers: ClassVar[int] = 0
+    quantizer: Quantizer | None = None
+
+    def _collate_buffer(self, shape: tuple[int, ...]) -> Tensor:
+        """Get an uninitialized output tensor of the given shape."""
+        numel = int(np.prod(shape))
+
+        if get_worker_info() is not None:
+            storage = torch.UntypedStorage._new_shared(numel * self.collate_dtype.itemsize)
+            return torch.empty(0, dtype=self.collate_dtype).set_(storage).view(shape)
+        if self.num_buffers <= 0:
+            return torch.empty(shape, dtype=self.collate_dtype)
+
+        pid, buffers = self.__dict__.get("_collate_buffers", (None, None))
+        if pid != os.getpid():
+            buffers = deque([torch.empty(0, dtype=self.collate_dtype)] * self.num_buffers)
+            self.__dict__["_collate_buffers"] = (os.getpid(), buffers)
+
+        buffer = buffers.popleft()
+        if buffer.numel() < numel:
+            buffer = torch.empty(numel, dtype=self.collate_dtype)
+        buffers.append(buffer)
+
+        return buffer[:numel].view(shape)
+
+    def _dequantize_row(self, x: NDArray) -> NDArray:
+        """Dequantize a single stored row into a new array, if necessary."""
+        if self.quantizer is None:
+            return x
+
+        Q = torch.from_numpy(np.ascontiguousarray(x))
+
+        return self.quantizer.dequantize(Q, torch.empty(Q.shape, dtype=self.collate_dtype)).numpy()
+
+    def _collate_stored(self, Q: NDArray | Tensor) -> Num[Tensor, "n ..."]:
+        """Collate a batch of stored rows (e.g., as read from disk), dequantizing them if
+        necessary."""
+        if self.quantizer is None:
+            return self.collate(Q)
+
+        Q = torch.from_numpy(np.ascontiguousarray(Q)) if isinstance(Q, np.ndarray) else Q
+
+        return self.quantizer.dequantize(Q, self._collate_buffer(Q.shape))
+
     def collate(self, inputs: Collection[Num[NDArray, "d"]]) -> Num[Tensor, "n d"]:
-        return torch.from_numpy(np.array(inputs)).to(torch.float)
+        if isinstance(inputs, Tensor):
+            return inputs.to(self.collate_dtype)
+        if isinstance(inputs, np.ndarray):
+            return torch.from_numpy(np.ascontiguousarray(inputs)).to(self.collate_dtype)
+
+        inputs = [x if isinstance(x, (Tensor, np.ndarray)) else np.asarray(x) for x in inputs]
+        if len(inputs) == 0:
+            return torch.empty(0, dtype=self.collate_dtype)
+
+        out = self._collate_buffer((len(inputs), *inputs[0].shape))
+        if isinstance(inputs[0], Tensor):
+            if all(x.dtype == self.collate_dtype for x in inputs):
+                return torch.stack(inputs, out=out)
+            inputs = [np.asarray(x) for x in inputs]
+        np.stack(inputs, out=out.numpy())
+
+        return out
+
+    def gather(self, X: NDArray | Tensor, idxs: ArrayLike) -> Num[Tensor, "n ..."]:
+        """Collate the rows of the input array or tensor at the given indices.
+
+        Rows are gathered with a single :func:`numpy.take` or :func:`torch.index_select` directly
+        into the output if :attr:`X` already has the dtype :attr:`collate_dtype` and gathered and
+        cast in one assignment otherwise. Quantized rows are gathered in their storage format and
+        then dequantized into the output.
+        """
+        idxs = np.array(idxs, dtype=np.int64, ndmin=1)
+        if len(idxs) > 0 and not (-len(X) <= idxs.min() and idxs.max() < len(X)):
+            raise IndexError(f"index out of range for array with {len(X)} rows!")
+        idxs[idxs < 0] += len(X)
+        out = self._collate_buffer((len(idxs), *X.shape[1:]))
+
+        if self.quantizer is not None:
+            if isinstance(X, Tensor):
+                Q = torch.index_select(X, 0, torch.from_numpy(idxs))
+            else:
+                Q = torch.from_numpy(np.take(X, idxs, axis=0))
+            return self.quantizer.dequantize(Q, out)
+
+        if isinstance(X, Tensor):
+            if X.dtype == self.collate_dtype:
+                return torch.index_select(X, 0, torch.from_numpy(idxs), out=out)
+            X = X.numpy()
+
+        out_np = out.numpy()
+        if X.dtype == out_np.dtype:
+            # the indices were already checked, and `mode="raise"` would gather into a temporary
+            np.take(X, idxs, axis=0, out=out_np, mode="clip")
+        else:
+            out_np[:] = X[idxs]
+
+        return out
+
+    def __getstate__(self) -> dict:
+        state = self.__dict__.copy()
+        state.pop("_collate_buffers", None)
+
+        return state
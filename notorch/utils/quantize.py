@@ -0,0 +1,181 @@
+from collections.abc import Mapping
+from dataclasses import dataclass, field
+from typing import Literal, Self
+
+import numpy as np
+from numpy.typing import ArrayLike, NDArray
+import torch
+from torch import Tensor
+
+from notorch.exceptions import InvalidChoiceError
+
+type Precision = Literal["float16", "bfloat16", "int8"]
+
+PRECISIONS = ("float16", "bfloat16", "int8")
+STORAGE_DTYPES: dict[str, np.dtype] = {
+    "float16": np.dtype(np.float16),
+    # numpy has no bfloat16 dtype, so the bits are stored as int16 and viewed as bfloat16 by torch
+    "bfloat16": np.dtype(np.int16),
+    "int8": np.dtype(np.int8),
+}
+
+
+@dataclass
+class Quantizer:
+    """A :class:`Quantizer` converts arrays to and from a reduced-precision storage format.
+
+    - ``"float16"`` and ``"bfloat16"`` store each value as a 16-bit float.
+    - ``"int8"`` maps each column (i.e., each index along all but the first axis) linearly onto
+      the 256 values of an 8-bit integer, such that ``x ~= offset + (q + 128) * scale`` for the
+      per-column :attr:`scale` and :attr:`offset`. The offset is the minimum of the column
+      (rounded down to a 32-bit float), so a column far from zero keeps its full resolution and a
+      constant column is stored exactly.
+
+    Quantized rows are gathered as-is and only dequantized once per batch by :meth:`dequantize`,
+    so the resident memory and I/O of a database shrink by 2-4x over 32-bit floats while its
+    collated output is unchanged.
+
+    Parameters
+    ----------
+    precision : {"float16", "bfloat16", "int8"}
+        the storage precision
+    scale : NDArray | None, default=None
+        the scale of each column. Required for ``"int8"``.
+    offset : NDArray | None, default=None
+        the value of the smallest quantized value (i.e., -128) of each column. Required for
+        ``"int8"``.
+    """
+
+    precision: Precision
+    scale: NDArray[np.float32] | None = None
+    offset: NDArray[np.float32] | None = None
+
+    _params: dict[torch.dtype, tuple[Tensor, Tensor]] = field(
+        init=False, default_factory=dict, repr=False
+    )
+
+    def __post_init__(self):
+        if self.precision not in PRECISIONS:
+            raise InvalidChoiceError(self.precision, PRECISIONS)
+        if self.precision == "int8" and (self.scale is None or self.offset is None):
+            raise ValueError("args 'scale' and 'offset' must be supplied for int8 precision!")
+
+    @classmethod
+    def fit(cls, X: ArrayLike, precision: Precision) -> Self:
+        """Build a quantizer for the input array, calculating the per-column scale and offset
+        from the range of each column if necessary."""
+        if precision != "int8":
+            return cls(precision)
+
+        X = np.asarray(X)
+        if X.size > 0 and not np.isfinite(X).all():
+            raise ValueError("arg 'X' must only contain finite values for int8 precision!")
+
+        lo = X.min(0).astype(np.float64) if len(X) > 0 else np.zeros(X.shape[1:])
+        hi = X.max(0).astype(np.float64) if len(X) > 0 else np.zeros(X.shape[1:])
+        # round the offset down so that it's exact in float32 and the column stays in range
+        offset = lo.astype(np.float32)
+        offset = np.where(offset > lo, np.nextafter(offset, np.float32(-np.inf)), offset)
+        scale = np.where(hi > offset, (hi - offset) / 255, 1)
+        scale = np.nextafter(scale.astype(np.float32), np.float32(np.inf))
+
+        return cls(precision, scale, offset.astype(np.float32))
+
+    @classmethod
+    def from_metadata(cls, metadata: Mapping[str, ArrayLike]) -> Self | None:
+        """Build a quantizer from the metadata written by :meth:`to_metadata`, or return ``None``
+        if the metadata doesn't describe a quantized array."""
+        if "precision" not in metadata:
+            return None
+
+        precision = str(np.asarray(metadata["precision"]))
+        scale, offset = metadata.get("scale"), metadata.get("offset")
+        if scale is not None:
+            scale, offset = np.asarray(scale), np.asarray(offset)
+
+        return cls(precision, scale, offset)
+
+    def to_metadata(self) -> dict[str, np.ndarray]:
+        """Get the metadata needed to rebuild this quantizer."""
+        metadata = {"precision": np.array(self.precision)}
+        if self.scale is not None:
+            metadata |= {"scale": self.scale, "offset": self.offset}
+
+        return metadata
+
+    @property
+    def storage_dtype(self) -> np.dtype:
+        return STORAGE_DTYPES[self.precision]
+
+    def quantize(self, X: ArrayLike) -> np.ndarray:
+        """Convert the input array to the storage format."""
+        X = np.asarray(X)
+        match self.precision:
+            case "float16":
+                return X.astype(np.float16)
+            case "bfloat16":
+                X = torch.from_numpy(np.ascontiguousarray(X, dtype=np.float32))
+                return X.to(torch.bfloat16).view(torch.int16).numpy()
+            case "int8":
+                Q = np.rint((X - self.offset.astype(np.float64)) / self.scale) - 128
+                return Q.clip(-128, 127).astype(np.int8)
+
+    def dequantize(self, Q: Tensor, out: Tensor) -> Tensor:
+        """Convert the input tensor from the storage format into the output tensor."""
+        match self.precision:
+            case "float16":
+                return out.copy_(Q)
+            case "bfloat16":
+                return out.copy_(Q.view(torch.bfloat16))
+            case "int8":
+                if out.dtype not in self._params:
+                    self._params[out.dtype] = (
+                        torch.from_numpy(np.asarray(self.scale)).to(out.dtype),
+                        torch.from_numpy(np.asarray(self.offset)).to(out.dtype),
+                    )
+                scale, offset = self._params[out.dtype]
+                # `q + 128` and its product with the scale are small, so the only rounding error
+                # of note is that of the final sum
+                return out.copy_(Q).add_(128).mul_(scale).add_(offset)
+
+
+def quantize_array(
+    X: np.ndarray, quantizer: Quantizer | None, precision: Precision | None
+) -> tuple[np.ndarray, Quantizer | None]:
+    """Quantize an in-memory array to the input precision if it isn't already stored in it.
+
+    Parameters
+    ----------
+    X : np.ndarray
+        the array
+    quantizer : Quantizer | None
+        the quantizer of the array if it's already quantized, ``None`` otherwise
+    precision : Precision | None
+        the desired precision. If ``None``, the array is left as-is.
+
+    Returns
+    -------
+    tuple[np.ndarray, Quantizer | None]
+        the (possibly) quantized array and its quantizer
+
+    Raises
+    ------
+    ValueError
+        if the array is already quantized to a different precision or if it's memory-mapped and
+        would have to be quantized
+    """
+    if precision is None:
+        return X, quantizer
+    if quantizer is not None:
+        if quantizer.precision != precision:
+            raise ValueError(
+                f"arg 'precision' must match the stored precision! got: '{precision}'. "
+                f"expected: '{quantizer.precision}'"
+            )
+        return X, quantizer
+    if isinstance(X, np.memmap):
+        raise ValueError("memory-mapped arrays can't be quantized! Save a quantized copy instead.")
+
+    quantizer = Quantizer.fit(X, precision)
+
+    return quantizer.quantize(X), quantizer
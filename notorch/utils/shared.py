@@ -0,0 +1,167 @@
+import atexit
+from collections.abc import Iterator
+from contextlib import contextmanager
+import fcntl
+import hashlib
+import os
+from os import PathLike
+from pathlib import Path
+import re
+import shutil
+import tempfile
+
+import numpy as np
+from numpy.typing import ArrayLike
+
+SHARED_DIR = Path("/dev/shm" if Path("/dev/shm").is_dir() else tempfile.gettempdir()) / "notorch"
+"""the default directory in which shared arrays are placed. ``/dev/shm`` is backed by memory on
+Linux, so arrays placed there are never written to disk."""
+
+LOCK_NAME = ".lock"
+REFS_SUFFIX = ".refs"
+
+_REFERENCED_PATHS: set[Path] = set()
+
+
+class SharedArray(np.memmap):
+    """A :class:`SharedArray` is a memory-mapped array backed by a file in shared memory.
+
+    Every process that maps the same file shares the same physical pages, and pickling a
+    :class:`SharedArray` only sends the path to its file, so unpickling it in a spawned
+    :class:`~torch.utils.data.DataLoader` worker attaches to the existing memory rather than
+    copying it. Views of a :class:`SharedArray` are pickled by value like a regular array.
+
+    The array is mapped copy-on-write, so any writes remain private to the writing process.
+    """
+
+    path: Path | None = None
+
+    def __reduce__(self):
+        if self.path is None:
+            return np.asarray(self).__reduce__()
+
+        return attach, (self.path,)
+
+
+def attach(path: PathLike) -> SharedArray:
+    """Attach to the shared array stored at the input path."""
+    array = np.load(path, mmap_mode="c").view(SharedArray)
+    array.path = Path(path)
+
+    return array
+
+
+def share(
+    array: ArrayLike, name: str = "array", root: PathLike | None = None, cleanup: bool = True
+) -> SharedArray:
+    """Place the input array in shared memory.
+
+    The backing file is named after the contents of the array, so any process on the same node
+    that shares an identical array (e.g., another distributed rank) will attach to the existing
+    file instead of creating a new one. Each such process holds a reference to the file (see
+    :func:`cleanup_at_exit`), so it's only deleted once all of them have exited.
+
+    Parameters
+    ----------
+    array : ArrayLike
+        the array to share
+    name : str, default="array"
+        a human-readable prefix for the backing file
+    root : PathLike | None, default=None
+        the directory in which to place the backing file. If ``None``, use :data:`SHARED_DIR`.
+    cleanup : bool, default=True
+        whether to delete the backing file once the current process and every other process that
+        shared the same array have exited
+
+    Returns
+    -------
+    SharedArray
+        a shared array with the same contents as the input array
+    """
+    if isinstance(array, SharedArray) and array.path is not None:
+        return array
+
+    array = np.ascontiguousarray(array)
+    if array.dtype.hasobject:
+        raise TypeError(
+            "arg 'array' has dtype `object`! Only arrays of fixed-size items can be shared."
+        )
+
+    h = hashlib.blake2b(array.reshape(-1).view(np.uint8), digest_size=16)
+    h.update(f"{array.dtype.str}{array.shape}".encode())
+    root = SHARED_DIR if root is None else Path(root)
+    root.mkdir(parents=True, exist_ok=True)
+    stem = re.sub(r"[^\w.-]", "_", name)
+    path = root / f"{stem}-{h.hexdigest()}.npy"
+
+    if cleanup:
+        cleanup_at_exit(path)
+    if not path.exists():
+        tmp_path = path.with_suffix(f".{os.getpid()}.tmp")
+        with open(tmp_path, "wb") as f:
+            np.save(f, array)
+        # identical contents are written by concurrent writers, so whichever rename wins is fine
+        os.replace(tmp_path, path)
+
+    return attach(path)
+
+
+@contextmanager
+def lock(root: PathLike) -> Iterator[None]:
+    """Hold an exclusive lock on the input shared directory across all processes on the node."""
+    root = Path(root)
+    root.mkdir(parents=True, exist_ok=True)
+    with open(root / LOCK_NAME, "a") as f:
+        fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
+
+
+def _is_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+
+    return True
+
+
+def cleanup_at_exit(path: PathLike) -> None:
+    """Hold a reference to the shared file at the input path until the current process exits.
+
+    Several processes may reference the same file (e.g., every distributed rank that shares an
+    identical array), and the file is only deleted by the last of them to exit, so no process
+    removes a file that another one (or its :class:`~torch.utils.data.DataLoader` workers) may
+    still attach to. To guarantee this, the reference must be taken *before* checking whether the
+    file exists and creating it if it doesn't.
+    """
+    path = Path(path)
+    if path in _REFERENCED_PATHS:
+        return
+
+    refs = path.with_name(f"{path.name}{REFS_SUFFIX}")
+    with lock(path.parent):
+        refs.mkdir(exist_ok=True)
+        (refs / str(os.getpid())).touch()
+    _REFERENCED_PATHS.add(path)
+    atexit.register(release, path)
+
+
+def release(path: PathLike) -> None:
+    """Release the reference of the current process to the shared file at the input path and
+    delete the file if no other live process still references it. See :func:`cleanup_at_exit`."""
+    path = Path(path)
+    refs = path.with_name(f"{path.name}{REFS_SUFFIX}")
+    _REFERENCED_PATHS.discard(path)
+
+    with lock(path.parent):
+        (refs / str(os.getpid())).unlink(missing_ok=True)
+        pids = [int(ref.name) for ref in refs.iterdir()] if refs.is_dir() else []
+        # the references of processes that died without releasing them are ignored
+        if not any(_is_alive(pid) for pid in pids):
+            path.unlink(missing_ok=True)
+            shutil.rmtree(refs, ignore_errors=True)
@@ -5,8 +5,6 @@ from rdkit import Chem
 import pandas as pd
 import pytest
 
-from notorch.data.molecule import MoleculeDatapoint
-
 TEST_DIR = Path(__file__).parent
 DATA_DIR = TEST_DIR / "data"
 
@@ -23,6 +21,8 @@ def mols(smis: list):
 
 @pytest.fixture
 def random_mol_data(mols: list):
+    from notorch.data.molecule import MoleculeDatapoint
+
     Y = np.random.randn(len(mols), 1)
     data = [MoleculeDatapoint(mol, y) for mol, y in zip(mols, Y)]
 
@@ -31,6 +31,8 @@ def random_mol_data(mols: list):
 
 @pytest.fixture
 def lipo_data():
+    from notorch.data.molecule import MoleculeDatapoint
+
     df = pd.read_csv(DATA_DIR / "lipo.csv")
     data = [MoleculeDatapoint.from_smi(smi, y) for smi, y in zip(df['smiles'], df[['lipo']].values)]
 
@@ -0,0 +1,131 @@
+import pickle
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.ipc as ipc
+import pyarrow.parquet as pq
+import pytest
+import torch
+
+from notorch.databases.arrow import ArrowDatabase, parquet_to_ipc
+
+
+@pytest.fixture
+def table():
+    rg = np.random.default_rng(0)
+    fps = rg.integers(0, 2, (50, 8), dtype=np.uint8)
+    pairs = rg.random((50, 2, 3)).astype(np.float32)
+
+    return pa.table(
+        {
+            "a": pa.array(rg.random(50).astype(np.float32)),
+            "b": pa.array(rg.integers(0, 100, 50)),
+            "fp": pa.FixedSizeListArray.from_arrays(pa.array(fps.ravel()), 8),
+            "pairs": pa.FixedSizeListArray.from_arrays(
+                pa.FixedSizeListArray.from_arrays(pa.array(pairs.ravel()), 3), 2
+            ),
+            "name": pa.array([f"mol{i}" for i in range(50)]),
+        }
+    )
+
+
+@pytest.fixture
+def expected(table):
+    return np.concatenate(
+        [
+            table["a"].to_numpy()[:, None],
+            table["b"].to_numpy()[:, None],
+            np.stack(table["fp"].to_numpy(zero_copy_only=False)),
+            np.stack([np.concatenate(x) for x in table["pairs"].to_numpy(zero_copy_only=False)]),
+        ],
+        axis=1,
+    )
+
+
+@pytest.fixture
+def path(tmp_path, table):
+    path = tmp_path / "table.arrow"
+    with pa.OSFile(str(path), "wb") as sink, ipc.new_file(sink, table.schema) as writer:
+        writer.write_table(table, max_chunksize=16)
+
+    return path
+
+
+COLUMNS = ["a", "b", "fp", "pairs"]
+
+
+def test_arrow(path, expected):
+    db = ArrowDatabase(path, COLUMNS)
+
+    assert len(db) == 50
+    assert db.shape == (50, 1 + 1 + 8 + 6)
+    assert db.widths == [1, 1, 8, 6]
+    np.testing.assert_array_equal(db.offsets, [0, 16, 32, 48, 50])
+    for i in [0, 15, 16, 49, -1]:
+        np.testing.assert_allclose(db[i], expected[i])
+    with pytest.raises(IndexError):
+        db[50]
+
+
+@pytest.mark.parametrize("idxs", [[0, 49, 17, 16, 17], list(range(50))[::-1], [-1, -50], []])
+def test_get_batch(path, expected, idxs):
+    db = ArrowDatabase(path, COLUMNS)
+    out = db.get_batch(idxs)
+
+    assert out.dtype == torch.float
+    torch.testing.assert_close(out, torch.from_numpy(expected[idxs]).float().reshape(-1, 16))
+
+
+def test_get_batch_out_of_range(path):
+    with pytest.raises(IndexError):
+        ArrowDatabase(path, COLUMNS).get_batch([0, 50])
+
+
+def test_single_column(tmp_path, table):
+    path = tmp_path / "fp.arrow"
+    with pa.OSFile(str(path), "wb") as sink, ipc.new_file(sink, table.schema) as writer:
+        writer.write_table(table)
+    db = ArrowDatabase(path, ["fp"])
+    fps = np.stack(table["fp"].to_numpy(zero_copy_only=False))
+
+    assert db.dtype == np.uint8
+    torch.testing.assert_close(db.get_batch([3, 1, -1]), torch.from_numpy(fps[[3, 1, -1]]).float())
+
+
+def test_invalid_columns(path):
+    with pytest.raises(TypeError):
+        ArrowDatabase(path, ["a", "name"])
+    with pytest.raises(TypeError):
+        ArrowDatabase(path)
+
+
+def test_nulls(tmp_path):
+    path = tmp_path / "nulls.arrow"
+    table = pa.table({"a": pa.array([1.0, None, 3.0])})
+    with pa.OSFile(str(path), "wb") as sink, ipc.new_file(sink, table.schema) as writer:
+        writer.write_table(table)
+
+    with pytest.raises(ValueError):
+        ArrowDatabase(path).get_batch([0])
+
+
+def test_parquet(tmp_path, table, expected):
+    path = tmp_path / "table.parquet"
+    pq.write_table(table, path, row_group_size=20)
+
+    db = ArrowDatabase(path, COLUMNS)
+    assert db.ipc_path == path.with_suffix(".arrow")
+    torch.testing.assert_close(db.get_batch(range(50)), torch.from_numpy(expected).float())
+
+    mtime = db.ipc_path.stat().st_mtime_ns
+    assert parquet_to_ipc(path) == db.ipc_path
+    assert db.ipc_path.stat().st_mtime_ns == mtime
+
+
+def test_pickle(path, expected):
+    db = ArrowDatabase(path, COLUMNS)
+    db.get_batch([0])
+    db2 = pickle.loads(pickle.dumps(db))
+
+    assert db2._arrays is None
+    torch.testing.assert_close(db2.get_batch([40, 2]), torch.from_numpy(expected[[40, 2]]).float())
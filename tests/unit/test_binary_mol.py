@@ -0,0 +1,78 @@
+import pickle
+
+import numpy as np
+import pytest
+from rdkit import Chem
+
+from notorch.databases.mol import OFFSETS_NAME, BinaryMolDatabase
+from notorch.transforms.chem import SmiToMol
+
+
+def smiles(mol) -> str:
+    return Chem.MolToSmiles(mol)
+
+
+@pytest.fixture
+def expected(smis):
+    return [smiles(SmiToMol()(smi)) for smi in smis]
+
+
+@pytest.mark.parametrize("num_workers,backend", [(0, "process"), (2, "thread")])
+def test_build(tmp_path, smis, expected, num_workers, backend):
+    db = BinaryMolDatabase.build(
+        smis, tmp_path / "store", num_workers=num_workers, chunksize=7, backend=backend
+    )
+
+    assert len(db) == len(smis)
+    assert [smiles(db[i]) for i in db] == expected
+    assert smiles(db[-1]) == expected[-1]
+    assert np.load(tmp_path / "store" / OFFSETS_NAME).dtype == np.int64
+    with pytest.raises(IndexError):
+        db[len(smis)]
+
+
+def test_build_invalid(tmp_path):
+    db = BinaryMolDatabase.build(["CCO", "not a smiles", "c1ccccc1"], tmp_path, num_workers=0)
+
+    assert len(db) == 3
+    assert db[1] is None
+    assert [smiles(db[0]), smiles(db[2])] == ["CCO", "c1ccccc1"]
+
+
+def test_build_empty(tmp_path):
+    db = BinaryMolDatabase.build([], tmp_path, num_workers=0)
+
+    assert len(db) == 0
+    assert db.blob.size == 0
+
+
+@pytest.mark.parametrize("header", [False, True])
+def test_build_smiles_file(tmp_path, smis, expected, header):
+    path = tmp_path / "mols.smi"
+    lines = [f"{smi} mol{i}" for i, smi in enumerate(smis)]
+    path.write_text("\n".join(["smiles name", *lines] if header else lines) + "\n")
+    db = BinaryMolDatabase.build(path, tmp_path / "store", header=header, num_workers=0)
+
+    assert [smiles(db[i]) for i in db] == expected
+
+
+def test_build_sdf(tmp_path, mols):
+    path = tmp_path / "mols.sdf"
+    with Chem.SDWriter(str(path)) as writer:
+        for i, mol in enumerate(mols):
+            mol = Chem.Mol(mol)
+            mol.SetProp("idx", str(i))
+            writer.write(mol)
+    db = BinaryMolDatabase.build(path, tmp_path / "store", props=True, num_workers=0)
+
+    assert [smiles(db[i]) for i in db] == [smiles(mol) for mol in mols]
+    assert [db[i].GetProp("idx") for i in db] == [str(i) for i in range(len(mols))]
+
+
+def test_pickle(tmp_path, smis, expected):
+    db = BinaryMolDatabase.build(smis, tmp_path, num_workers=0)
+    db[0]
+    db2 = pickle.loads(pickle.dumps(db))
+
+    assert db2._blob is None
+    assert smiles(db2[3]) == expected[3]
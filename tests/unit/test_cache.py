@@ -0,0 +1,111 @@
+from concurrent.futures import ThreadPoolExecutor
+import copy
+import pickle
+import threading
+
+from rdkit import Chem
+import torch
+
+from notorch.transforms.cache import DiskCache, LRUCache
+from notorch.transforms.chem import SmiToMol
+from notorch.transforms.mol import MolToFP
+
+
+def test_disk_cache_hit(tmp_path, smis):
+    cache = DiskCache(SmiToMol(), tmp_path)
+
+    first = [Chem.MolToSmiles(cache(smi)) for smi in smis[:10]]
+    second = [Chem.MolToSmiles(cache(smi)) for smi in smis[:10]]
+
+    assert first == second
+    assert cache.conn.execute("SELECT COUNT(*) FROM cache").fetchone()[0] == 10
+
+
+def test_disk_cache_config_change(tmp_path, mols):
+    cache2 = DiskCache(MolToFP.morgan(radius=2), tmp_path)
+    cache3 = DiskCache(MolToFP.morgan(radius=3), tmp_path)
+    assert cache2.path != cache3.path
+
+    fps2 = [cache2(mol) for mol in mols[:10]]
+    fps3 = [cache3(mol) for mol in mols[:10]]
+
+    expected = [MolToFP.morgan(radius=3)(mol) for mol in mols[:10]]
+    assert all(torch.equal(fp, e) for fp, e in zip(fps3, expected))
+    assert any(not torch.equal(fp2, fp3) for fp2, fp3 in zip(fps2, fps3))
+    assert cache3.conn.execute("SELECT COUNT(*) FROM cache").fetchone()[0] == 10
+
+
+def test_disk_cache_add_h(tmp_path, smis):
+    cache = DiskCache(SmiToMol(), tmp_path)
+    cache_h = DiskCache(SmiToMol(add_h=True), tmp_path)
+    assert cache.path != cache_h.path
+
+    heavy = [cache(smi).GetNumAtoms() for smi in smis[:10]]
+    all_atoms = [cache_h(smi).GetNumAtoms() for smi in smis[:10]]
+
+    assert all_atoms == [SmiToMol(add_h=True)(smi).GetNumAtoms() for smi in smis[:10]]
+    assert sum(all_atoms) > sum(heavy)
+
+
+def test_disk_cache_worker_thread(tmp_path, smis):
+    cache = DiskCache(SmiToMol(), tmp_path)
+    expected = [Chem.MolToSmiles(cache(smi)) for smi in smis[:10]]
+
+    outputs = []
+    thread = threading.Thread(target=lambda: outputs.extend(cache(smi) for smi in smis[:10]))
+    thread.start()
+    thread.join()
+
+    assert [Chem.MolToSmiles(mol) for mol in outputs] == expected
+
+
+def test_disk_cache_thread_pool(tmp_path, smis):
+    cache = DiskCache(SmiToMol(), tmp_path)
+    expected = [Chem.MolToSmiles(SmiToMol()(smi)) for smi in smis]
+
+    with ThreadPoolExecutor(4) as pool:
+        outputs = list(pool.map(cache, smis))
+    with ThreadPoolExecutor(4) as pool:
+        cached = list(pool.map(cache, smis))
+
+    assert [Chem.MolToSmiles(mol) for mol in outputs] == expected
+    assert [Chem.MolToSmiles(mol) for mol in cached] == expected
+
+
+def test_lru_cache_hits(smis):
+    cache = LRUCache(SmiToMol(), max_size=4)
+
+    for smi in smis[:4] * 2:
+        cache(smi)
+
+    info = cache.cache_info()
+    assert (info.hits, info.misses, info.size) == (4, 4, 4)
+
+
+def test_lru_cache_evicts(smis):
+    cache = LRUCache(SmiToMol(), max_size=2)
+
+    for smi in smis[:3]:
+        cache(smi)
+
+    assert list(cache.cache) == smis[1:3]
+
+
+def test_lru_cache_mol_key(mols):
+    cache = LRUCache(MolToFP.morgan())
+
+    cache(mols[0])
+    cache(Chem.Mol(mols[0]))
+
+    assert cache.cache_info().hits == 1
+
+
+def test_lru_cache_pickle(smis):
+    cache = LRUCache(SmiToMol())
+    cache(smis[0])
+    cache(smis[0])
+
+    for copy_ in [pickle.loads(pickle.dumps(cache)), copy.deepcopy(cache)]:
+        assert copy_.cache_info() == cache.cache_info()
+        copy_(smis[0])
+        assert copy_.cache_info().hits == cache.cache_info().hits + 1
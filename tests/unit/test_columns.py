@@ -0,0 +1,43 @@
+import pickle
+
+import numpy as np
+import pandas as pd
+
+from notorch.data.columns import StringColumn, build_column
+
+
+def test_string_column(smis):
+    column = StringColumn.from_strings(smis)
+
+    assert len(column) == len(smis)
+    assert column.tolist() == smis
+    assert column[-1] == smis[-1]
+
+
+def test_string_column_unicode():
+    strings = ["", "C", "é", "日本"]
+    column = StringColumn.from_strings(strings)
+
+    assert column.tolist() == strings
+    assert column.nbytes == column.data.nbytes + column.offsets.nbytes
+
+
+def test_string_column_pickle(smis):
+    column = pickle.loads(pickle.dumps(StringColumn.from_strings(smis)))
+
+    assert column.tolist() == smis
+
+
+def test_build_column(smis):
+    assert isinstance(build_column(pd.Series(smis)), StringColumn)
+
+    values = build_column(pd.Series(np.arange(5.0)))
+    assert isinstance(values, np.ndarray)
+    np.testing.assert_array_equal(values, np.arange(5.0))
+
+
+def test_build_column_mixed():
+    values = build_column(pd.Series(["C", None, 1], dtype=object))
+
+    assert isinstance(values, np.ndarray)
+    assert values.dtype.hasobject
@@ -0,0 +1,106 @@
+import numpy as np
+import pandas as pd
+import pytest
+import torch
+
+from notorch.data.dataset import NotorchDataset
+from notorch.transforms.base import Pipeline
+from notorch.transforms.chem import SmiToMol
+from notorch.transforms.graph import MolToGraph
+from notorch.transforms.mol import MolToFP
+
+
+@pytest.fixture
+def df(smis):
+    return pd.DataFrame({"smiles": smis, "y": np.arange(len(smis), dtype=float)})
+
+
+@pytest.fixture
+def transforms():
+    return {
+        "fp": {
+            "transform": Pipeline([SmiToMol(), MolToFP.morgan()]),
+            "in_key": "smiles",
+            "out_key": "fp",
+        }
+    }
+
+
+@pytest.fixture
+def target_groups():
+    return {"y": {"columns": ["y"]}}
+
+
+@pytest.mark.parametrize("backend", ["thread", "process"])
+def test_prefeaturize(df, transforms, target_groups, backend):
+    lazy = NotorchDataset(df, transforms, target_groups)
+    eager = NotorchDataset(
+        df, transforms, target_groups, prefeaturize=True, num_workers=2, backend=backend
+    )
+
+    assert list(eager.features) == ["fp"]
+    for i in range(len(df)):
+        torch.testing.assert_close(eager[i]["fp"], lazy[i]["fp"])
+
+
+def test_columns(df, transforms, target_groups):
+    dset = NotorchDataset(df, transforms, target_groups)
+
+    assert list(dset.columns) == ["smiles"]
+    assert dset.columns["smiles"].tolist() == df["smiles"].tolist()
+    for i in [0, 5, len(df) - 1]:
+        sample = dset[i]
+        assert sample["smiles"] == df["smiles"][i]
+        assert sample["y"].item() == df["y"][i]
+        assert sample["index"] == i
+
+
+@pytest.mark.parametrize("prefeaturize", [False, True])
+def test_getitems(df, transforms, target_groups, prefeaturize):
+    dset = NotorchDataset(df, transforms, target_groups, prefeaturize=prefeaturize, num_workers=0)
+    idxs = [3, 1, 4, 1, 5]
+
+    batch = dset.__getitems__(idxs)
+    expected = dset.collate([dset[i] for i in idxs])
+
+    assert dset.batchable
+    assert set(batch.keys()) == set(expected.keys())
+    for key in expected.keys():
+        torch.testing.assert_close(batch[key], expected[key])
+
+
+def test_getitems_fallback(df, target_groups):
+    transforms = {
+        "mol": {"transform": SmiToMol(), "in_key": "smiles", "out_key": "mol"},
+        "fp": {"transform": MolToFP.morgan(), "in_key": "mol", "out_key": "fp"},
+    }
+    dset = NotorchDataset(df, transforms, target_groups)
+    batch = dset.__getitems__([0, 2])
+
+    assert not dset.batchable
+    torch.testing.assert_close(batch["inputs.fp"], torch.stack([dset[0]["fp"], dset[2]["fp"]]))
+
+
+def test_dataloader(df, transforms, target_groups):
+    dset = NotorchDataset(df, transforms, target_groups)
+    batches = list(dset.to_dataloader(batch_size=16))
+
+    assert sum(len(batch["index"]) for batch in batches) == len(df)
+    torch.testing.assert_close(batches[0]["targets.y"], dset.targets["y"][:16])
+
+
+def test_budget_dataloader(df, target_groups):
+    transforms = {
+        "G": {"transform": Pipeline([SmiToMol(), MolToGraph()]), "in_key": "smiles", "out_key": "G"}
+    }
+    dset = NotorchDataset(df, transforms, target_groups)
+    sizes = dset.size_index(num_workers=0)
+
+    assert sizes.shape == (len(df), 2)
+    assert sizes[0].tolist() == [dset[0]["G"].num_nodes, dset[0]["G"].num_edges]
+
+    loader = dset.to_dataloader(max_nodes=256, shuffle=True, seed=0)
+    batches = list(loader)
+    assert sum(len(batch["index"]) for batch in batches) == len(df)
+    for batch in batches:
+        assert len(batch["index"]) == 1 or batch["inputs.G"].num_nodes <= 256
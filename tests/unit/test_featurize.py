@@ -0,0 +1,60 @@
+import itertools
+import time
+
+import pytest
+import torch
+
+from notorch.data.featurize import featurize, ifeaturize
+from notorch.exceptions import InvalidChoiceError
+from notorch.transforms.base import Pipeline
+from notorch.transforms.chem import SmiToMol
+from notorch.transforms.mol import MolToFP
+
+
+@pytest.fixture
+def transform():
+    return Pipeline([SmiToMol(), MolToFP.morgan()])
+
+
+@pytest.fixture
+def expected(transform, smis):
+    return torch.stack([transform(smi) for smi in smis])
+
+
+@pytest.mark.parametrize("num_workers,backend", [(0, "process"), (2, "thread"), (2, "process")])
+def test_featurize(transform, smis, expected, num_workers, backend):
+    outputs = featurize(transform, smis, num_workers, chunksize=7, backend=backend)
+
+    torch.testing.assert_close(torch.stack(outputs), expected)
+
+
+def test_ifeaturize_chunks(transform, smis):
+    chunks = list(ifeaturize(transform, smis, num_workers=2, chunksize=7, backend="thread"))
+
+    assert [len(chunk) for chunk in chunks[:-1]] == [7] * (len(chunks) - 1)
+    assert sum(len(chunk) for chunk in chunks) == len(smis)
+
+
+def test_ifeaturize_bounded(smis):
+    counter = itertools.count()
+
+    def transform(smi):
+        next(counter)
+        return smi
+
+    chunks = ifeaturize(transform, smis, num_workers=2, chunksize=5, backend="thread")
+    assert next(chunks) == smis[:5]
+    time.sleep(0.2)
+
+    # the first chunk is consumed and at most 2 * num_workers more are in flight
+    assert next(counter) <= 5 * 5
+    assert sum(list(chunks), []) == smis[5:]
+
+
+def test_featurize_empty(transform):
+    assert featurize(transform, [], num_workers=2, backend="thread") == []
+
+
+def test_featurize_invalid_backend(transform, smis):
+    with pytest.raises(InvalidChoiceError):
+        featurize(transform, smis, num_workers=2, backend="gpu")
@@ -0,0 +1,140 @@
+import pickle
+
+import pytest
+from tensordict import TensorDict
+import torch
+
+from notorch.data.models.graph import BatchedGraph
+from notorch.nn.gnn.embed import GraphEmbedding
+from notorch.transforms.graph import MolToGraph
+
+
+@pytest.fixture
+def featurizer():
+    return MolToGraph()
+
+
+@pytest.fixture
+def graphs(featurizer, mols):
+    return [featurizer(mol) for mol in mols[:16]]
+
+
+def test_from_graphs(graphs):
+    G = BatchedGraph.from_graphs(graphs)
+
+    assert len(G) == len(graphs)
+    assert G.num_nodes == sum(g.num_nodes for g in graphs)
+    assert G.num_edges == sum(g.num_edges for g in graphs)
+    for i, g in enumerate(graphs):
+        n0, n1 = G.node_ptr[i], G.node_ptr[i + 1]
+        e0, e1 = G.edge_ptr[i], G.edge_ptr[i + 1]
+        torch.testing.assert_close(G.V[n0:n1], g.V)
+        torch.testing.assert_close(G.E[e0:e1], g.E)
+        torch.testing.assert_close(G.edge_index[:, e0:e1] - n0, g.edge_index.long())
+        torch.testing.assert_close(G.rev_index[e0:e1] - e0, g.rev_index.long())
+        assert (G.batch_node_index[n0:n1] == i).all()
+        assert (G.batch_edge_index[e0:e1] == i).all()
+
+
+def test_ptr_from_index(graphs):
+    G = BatchedGraph.from_graphs(graphs)
+    H = BatchedGraph(
+        G.V,
+        G.E,
+        G.edge_index,
+        G.rev_index,
+        batch_node_index=G.batch_node_index,
+        batch_edge_index=G.batch_edge_index,
+    )
+
+    torch.testing.assert_close(H.node_ptr, G.node_ptr)
+    torch.testing.assert_close(H.edge_ptr, G.edge_ptr)
+
+
+def test_from_graphs_out(graphs):
+    out = BatchedGraph.from_graphs(graphs)
+    ptr = out.V.untyped_storage().data_ptr()
+    G = BatchedGraph.from_graphs(graphs[:8], out=out)
+    expected = BatchedGraph.from_graphs(graphs[:8])
+
+    assert G.V.untyped_storage().data_ptr() == ptr
+    for key in ["V", "E", "edge_index", "rev_index", "node_ptr", "edge_ptr"]:
+        torch.testing.assert_close(getattr(G, key), getattr(expected, key))
+
+    G = BatchedGraph.from_graphs(graphs, out=out)
+    torch.testing.assert_close(G.V, BatchedGraph.from_graphs(graphs).V)
+
+
+def test_transform_batch(featurizer, mols):
+    G = featurizer.transform_batch(mols[:16])
+    expected = featurizer.collate([featurizer(mol) for mol in mols[:16]])
+
+    for key in [
+        "V",
+        "E",
+        "edge_index",
+        "rev_index",
+        "batch_node_index",
+        "batch_edge_index",
+        "node_ptr",
+        "edge_ptr",
+    ]:
+        torch.testing.assert_close(getattr(G, key), getattr(expected, key))
+
+
+def test_tensorclass(graphs):
+    G = BatchedGraph.from_graphs(graphs)
+    batch = TensorDict({"G": G, "Y": torch.zeros(len(G), 1)}, batch_size=[])
+
+    batch = batch.apply(lambda x: x if x.is_floating_point() else x.int())
+    assert batch["G"].V.dtype == torch.int32
+    assert batch["G"].node_ptr.dtype == torch.int32
+    assert batch["Y"].dtype == torch.float32
+
+    batch.share_memory_()
+    assert batch["G"].V.is_shared()
+    assert batch["G"].edge_index.is_shared()
+
+
+def test_graph_pickle(graphs):
+    G = BatchedGraph.from_graphs(graphs)
+    H = pickle.loads(pickle.dumps(G))
+
+    assert isinstance(H, BatchedGraph)
+    assert len(H) == len(G)
+    for key in ["V", "E", "edge_index", "rev_index", "node_ptr", "edge_ptr"]:
+        torch.testing.assert_close(getattr(H, key), getattr(G, key))
+
+
+def test_embedding_leaves_input_unchanged(featurizer, graphs):
+    G = BatchedGraph.from_graphs(graphs)
+    V, E = G.V, G.E
+    batch = TensorDict({"G": G}, batch_size=[])
+    embed = GraphEmbedding(featurizer.num_node_types, featurizer.num_edge_types, 16)
+
+    for _ in range(2):
+        H = embed(batch["G"])
+
+        assert isinstance(H, BatchedGraph)
+        assert H.V.shape == (G.num_nodes, 16)
+        assert H.E.shape == (G.num_edges, 16)
+        assert batch["G"].V is V and batch["G"].E is E
+        assert (batch["G"].V.dtype, batch["G"].E.dtype) == (torch.int64, torch.int64)
+
+
+def test_chemprop_leaves_input_unchanged(graphs):
+    pytest.importorskip("torch_scatter")
+    from notorch.nn.gnn.chemprop import ChempropBlock
+
+    G = BatchedGraph.from_graphs(graphs)
+    G = G.clone(recurse=False)
+    G.V = torch.randn(G.num_nodes, 16)
+    G.E = torch.randn(G.num_edges, 16)
+    V, E = G.V, G.E
+    block = ChempropBlock(16, depth=2)
+
+    for _ in range(2):
+        H = block(G)
+
+        assert H.V.shape == (G.num_nodes, 16)
+        assert G.V is V and G.E is E
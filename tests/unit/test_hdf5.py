@@ -0,0 +1,71 @@
+import pickle
+
+import numpy as np
+import pytest
+import torch
+
+from notorch.databases.hdf5 import HDF5Database, HDF5DatabaseOnDisk, save_hdf5
+
+
+@pytest.fixture
+def X():
+    return np.random.default_rng(0).random((100, 8)).astype(np.float32)
+
+
+@pytest.fixture(params=[None, (16, 8)])
+def path(request, tmp_path, X):
+    path = tmp_path / "data.h5"
+    save_hdf5(path, "X", X, chunks=request.param)
+
+    return path
+
+
+@pytest.mark.parametrize(
+    "idxs", [[0, 1, 2], [5, 3, 3, 90, 4], [-1, 0, -100], list(range(100))[::-1], [42]]
+)
+def test_read_batch(path, X, idxs):
+    with HDF5DatabaseOnDisk(path, "X", max_gap=4) as db:
+        np.testing.assert_array_equal(db.read_batch(idxs), X[idxs])
+        torch.testing.assert_close(db.get_batch(idxs), torch.from_numpy(X[idxs]))
+
+
+def test_read_batch_empty(path, X):
+    with HDF5DatabaseOnDisk(path, "X") as db:
+        out = db.read_batch([])
+
+        assert out.shape == (0, X.shape[1])
+        assert out.dtype == X.dtype
+        assert db.get_batch([]).shape == (0, X.shape[1])
+
+
+def test_on_disk(path, X):
+    db = HDF5DatabaseOnDisk(path, "X")
+
+    assert len(db) == len(X)
+    assert db.shape == X.shape
+    np.testing.assert_array_equal(db[3], X[3])
+
+    db2 = pickle.loads(pickle.dumps(db))
+    assert db2._h5f is None
+    np.testing.assert_array_equal(db2.read_batch([7, 1]), X[[7, 1]])
+    db.close()
+    db2.close()
+
+
+def test_in_memory(path, X):
+    db = HDF5Database(path, "X")
+
+    assert len(db) == len(X)
+    np.testing.assert_array_equal(db[3], X[3])
+    torch.testing.assert_close(db.get_batch([4, 2, 4]), torch.from_numpy(X[[4, 2, 4]]))
+
+
+def test_save_quantized(tmp_path, X):
+    path = tmp_path / "data.h5"
+    save_hdf5(path, "X", X, precision="float16")
+
+    with HDF5DatabaseOnDisk(path, "X") as db:
+        assert db.dtype == np.float16
+        torch.testing.assert_close(
+            db.get_batch([1, 0]), torch.from_numpy(X[[1, 0]]), atol=1e-3, rtol=1e-3
+        )
@@ -0,0 +1,136 @@
+import lightning as L
+import numpy as np
+import pandas as pd
+import pytest
+import torch
+from torch.utils.data import DataLoader
+
+from notorch.data.iterable import NotorchIterableDataset, index_csv
+from notorch.lightning_models.callbacks import SetEpoch
+from notorch.transforms.chem import SmiToMol
+
+
+@pytest.fixture
+def df(smis):
+    return pd.DataFrame({"smiles": smis, "y": np.arange(len(smis), dtype=float)})
+
+
+@pytest.fixture(params=["csv", "parquet"])
+def path(request, tmp_path, df):
+    if request.param == "csv":
+        path = tmp_path / "data.csv"
+        df.to_csv(path, index=False)
+    else:
+        path = tmp_path / "data.parquet"
+        df.to_parquet(path, index=False, row_group_size=16)
+
+    return path
+
+
+def build(path, **kwargs):
+    transforms = {"mol": {"transform": SmiToMol(), "in_key": "smiles", "out_key": "mol"}}
+
+    return NotorchIterableDataset(
+        path, transforms, {"y": {"columns": ["y"]}}, chunksize=16, **kwargs
+    )
+
+
+def ys(samples) -> list[int]:
+    return [int(sample["y"].item()) for sample in samples]
+
+
+@pytest.mark.parametrize("trailing_newline", [True, False])
+def test_index_csv(tmp_path, df, trailing_newline):
+    path = tmp_path / "data.csv"
+    text = df.to_csv(index=False)
+    path.write_text(text if trailing_newline else text.rstrip("\n"))
+
+    offsets, sizes = index_csv(path, 16, blocksize=100)
+
+    assert sizes.sum() == len(df)
+    assert (sizes[:-1] == 16).all()
+    assert offsets[-1] == path.stat().st_size
+    with open(path, "rb") as f:
+        for offset, i in zip(offsets[:-1], range(0, len(df), 16)):
+            f.seek(offset)
+            assert f.readline().decode().startswith(df["smiles"][i])
+
+
+def test_iter(path, df):
+    dset = build(path)
+
+    assert len(dset) == len(df)
+    assert ys(dset) == list(range(len(df)))
+
+
+@pytest.mark.parametrize("drop_last", [False, True])
+@pytest.mark.parametrize("world_size", [2, 3, 7])
+def test_ranks(path, df, world_size, drop_last):
+    dsets = [
+        build(path, rank=r, world_size=world_size, drop_last=drop_last) for r in range(world_size)
+    ]
+    samples = [ys(dset) for dset in dsets]
+
+    n = len(df) // world_size if drop_last else -(-len(df) // world_size)
+    assert all(len(dset) == n for dset in dsets)
+    assert [len(s) for s in samples] == [n] * world_size
+    if drop_last:
+        assert len(set(sum(samples, []))) == n * world_size
+    else:
+        assert set(sum(samples, [])) == set(range(len(df)))
+
+
+def test_workers(path, df):
+    dset = build(path, rank=1, world_size=2)
+    samples = ys(DataLoader(dset, batch_size=None, num_workers=3, collate_fn=lambda x: x))
+
+    assert sorted(samples) == list(range(len(df) // 2, len(df)))
+
+
+def test_shuffle(path, df):
+    dset = build(path, shuffle=True, buffer_size=8)
+
+    first = ys(dset)
+    assert first == ys(dset)
+    dset.set_epoch(1)
+    second = ys(dset)
+
+    assert first != second
+    assert sorted(first) == sorted(second) == list(range(len(df)))
+
+
+class _Model(L.LightningModule):
+    def __init__(self):
+        super().__init__()
+        self.w = torch.nn.Parameter(torch.zeros(1))
+        self.orders = []
+
+    def training_step(self, batch, batch_idx):
+        if batch_idx == 0:
+            self.orders.append([])
+        self.orders[-1].extend(int(y) for y in batch["targets.y"].flatten())
+
+        return (self.w * batch["targets.y"]).sum()
+
+    def configure_optimizers(self):
+        return torch.optim.SGD(self.parameters(), lr=0.0)
+
+
+def test_set_epoch_callback(path, df):
+    dset = build(path, shuffle=True, buffer_size=8)
+    model = _Model()
+    trainer = L.Trainer(
+        max_epochs=2,
+        callbacks=[SetEpoch()],
+        logger=False,
+        enable_checkpointing=False,
+        enable_progress_bar=False,
+        enable_model_summary=False,
+        accelerator="cpu",
+    )
+    trainer.fit(model, dset.to_dataloader(batch_size=16, num_workers=1))
+
+    assert dset.epoch == 1
+    assert len(model.orders) == 2
+    assert model.orders[0] != model.orders[1]
+    assert sorted(model.orders[0]) == sorted(model.orders[1]) == list(range(len(df)))
@@ -0,0 +1,92 @@
+import pickle
+
+import numpy as np
+import pytest
+import torch
+
+from notorch.databases import keyed
+from notorch.databases.keyed import KeyedDatabase, KeyIndex
+from notorch.databases.np import NPYDatabase
+
+
+@pytest.fixture
+def index(tmp_path, smis):
+    return KeyIndex.build(smis, tmp_path / "index")
+
+
+def test_key_index(index, smis):
+    assert len(index) == len(smis)
+    assert index[smis[3]] == 3
+    assert smis[3] in index
+    assert "not a key" not in index
+    np.testing.assert_array_equal(index.lookup(smis[::-1]), np.arange(len(smis))[::-1])
+    assert index.lookup([]).shape == (0,)
+    with pytest.raises(KeyError):
+        index.lookup([smis[0], "not a key"])
+
+
+def test_key_index_rows(tmp_path):
+    index = KeyIndex.build(["a", "b", "c"], tmp_path, rows=[10, 0, 5])
+
+    np.testing.assert_array_equal(index.lookup(["c", "a", "b"]), [5, 10, 0])
+
+
+def test_key_index_invalid(tmp_path):
+    with pytest.raises(ValueError):
+        KeyIndex.build(["a", "b"], tmp_path, rows=[0])
+    with pytest.raises(ValueError):
+        KeyIndex.build(["a", "b", "a"], tmp_path)
+
+
+def test_key_index_empty(tmp_path):
+    index = KeyIndex.build([], tmp_path)
+
+    assert len(index) == 0
+    assert "a" not in index
+    assert index.lookup([]).shape == (0,)
+
+
+def test_key_index_collisions(tmp_path, monkeypatch):
+    # hash each key by its length so that most of them collide
+    monkeypatch.setattr(
+        keyed, "hash_keys", lambda keys: np.array([len(k) for k in keys], dtype=np.uint64)
+    )
+    keys = ["a", "b", "cc", "ddd", "e"]
+    index = KeyIndex.build(keys, tmp_path)
+
+    assert len(index) == len(keys)
+    assert index.collisions == {"a": 0, "b": 1, "e": 4}
+    np.testing.assert_array_equal(index.lookup(keys[::-1]), np.arange(len(keys))[::-1])
+    assert "f" not in index
+    with pytest.raises(KeyError):
+        index["zzzz"]
+
+    with pytest.raises(ValueError):
+        KeyIndex.build(["a", "b", "a"], tmp_path / "dupes")
+
+
+def test_key_index_pickle(index, smis):
+    index2 = pickle.loads(pickle.dumps(index))
+
+    assert isinstance(index2.hashes, np.memmap)
+    np.testing.assert_array_equal(index2.lookup(smis), index.lookup(smis))
+
+
+def test_keyed_database(tmp_path, index, smis):
+    X = np.random.default_rng(0).random((len(smis), 4))
+    np.save(tmp_path / "X.npy", X)
+    db = KeyedDatabase(NPYDatabase(tmp_path / "X.npy"), index.path)
+
+    assert isinstance(db.index, KeyIndex)
+    assert len(db) == len(smis)
+    assert smis[0] in db
+    assert 0 not in db
+    np.testing.assert_array_equal(db[smis[5]], X[5])
+    torch.testing.assert_close(
+        db.get_batch([smis[5], smis[1]]), torch.from_numpy(X[[5, 1]]).float()
+    )
+    torch.testing.assert_close(db.collate([X[2], X[3]]), torch.from_numpy(X[2:4]).float())
+    with pytest.raises(TypeError):
+        iter(db)
+    with pytest.raises(KeyError):
+        db.get_batch(["not a key"])
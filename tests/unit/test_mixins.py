@@ -0,0 +1,94 @@
+import pickle
+
+import numpy as np
+import pytest
+import torch
+from torch.utils.data import DataLoader
+
+from notorch.utils.mixins import CollateNDArrayMixin
+
+
+class Collater(CollateNDArrayMixin):
+    pass
+
+
+class RingCollater(CollateNDArrayMixin):
+    num_buffers = 2
+
+
+@pytest.fixture
+def X():
+    return np.random.default_rng(0).random((20, 4))
+
+
+@pytest.mark.parametrize("dtype", [np.float32, np.float64, np.int64])
+@pytest.mark.parametrize("as_tensor", [False, True])
+def test_collate(X, dtype, as_tensor):
+    rows = [(torch.from_numpy(x) if as_tensor else x) for x in (100 * X[:5]).astype(dtype)]
+    expected = torch.from_numpy((100 * X[:5]).astype(dtype)).float()
+
+    out = Collater().collate(rows)
+    assert out.dtype == torch.float
+    torch.testing.assert_close(out, expected)
+
+    stacked = torch.stack(rows) if as_tensor else np.stack(rows)
+    torch.testing.assert_close(Collater().collate(stacked), expected)
+
+
+def test_collate_empty():
+    out = Collater().collate([])
+
+    assert out.dtype == torch.float
+    assert out.numel() == 0
+
+
+@pytest.mark.parametrize("dtype", [np.float32, np.float64, np.int8])
+@pytest.mark.parametrize("as_tensor", [False, True])
+def test_gather(X, dtype, as_tensor):
+    X = (100 * X).astype(dtype)
+    idxs = [3, 0, -1, 3]
+    out = Collater().gather(torch.from_numpy(X) if as_tensor else X, idxs)
+
+    assert out.dtype == torch.float
+    torch.testing.assert_close(out, torch.from_numpy(X[idxs]).float())
+
+
+def test_gather_empty(X):
+    assert Collater().gather(X, []).shape == (0, X.shape[1])
+
+
+@pytest.mark.parametrize("idxs", [[20], [-21], [0, 100]])
+def test_gather_out_of_range(X, idxs):
+    with pytest.raises(IndexError):
+        Collater().gather(X, idxs)
+
+
+def test_ring_buffers(X):
+    collater = RingCollater()
+    X = X.astype(np.float32)
+
+    a = collater.gather(X, [0, 1])
+    b = collater.gather(X, [2, 3])
+    c = collater.gather(X, [4, 5])
+
+    assert a.untyped_storage().data_ptr() != b.untyped_storage().data_ptr()
+    assert a.untyped_storage().data_ptr() == c.untyped_storage().data_ptr()
+    torch.testing.assert_close(c, torch.from_numpy(X[[4, 5]]))
+
+    # a larger batch replaces the buffer in its slot
+    d = collater.gather(X, range(10))
+    torch.testing.assert_close(d, torch.from_numpy(X[:10]))
+
+    state = pickle.loads(pickle.dumps(collater)).__dict__
+    assert "_collate_buffers" not in state
+
+
+def test_worker_shared_memory(X):
+    collater = RingCollater()
+    loader = DataLoader(
+        range(len(X)), batch_size=4, num_workers=1, collate_fn=lambda idxs: collater.gather(X, idxs)
+    )
+    batches = list(loader)
+
+    assert all(batch.is_shared() for batch in batches)
+    torch.testing.assert_close(torch.cat(batches), torch.from_numpy(X).float())
@@ -0,0 +1,112 @@
+import pickle
+
+import numpy as np
+import pytest
+import torch
+
+from notorch.databases import np as np_module
+from notorch.databases.np import NPYDatabase, NPZDatabase, save_npy, save_npz
+from notorch.exceptions import InvalidChoiceError
+
+
+@pytest.fixture
+def arrays():
+    rg = np.random.default_rng(0)
+
+    return {"x": rg.random((50, 4)), "y": rg.integers(0, 10, (50, 2)), "empty": np.empty((0, 3))}
+
+
+@pytest.fixture(autouse=True)
+def shared_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(np_module, "SHARED_DIR", tmp_path / "shm")
+
+
+@pytest.fixture(params=[False, True], ids=["stored", "compressed"])
+def path(request, tmp_path, arrays):
+    path = tmp_path / "arrays.npz"
+    save_npz(path, arrays, compressed=request.param)
+
+    return path
+
+
+@pytest.mark.parametrize("mmap_mode", [None, "r", "c"])
+def test_load_members(path, arrays, mmap_mode):
+    members = np_module.load_members(path, ["x", "y", "empty"], mmap_mode)
+
+    for key, X in arrays.items():
+        np.testing.assert_array_equal(members[key], X)
+    if mmap_mode is not None:
+        assert isinstance(members["x"], np.memmap)
+
+
+def test_load_members_invalid(path):
+    with pytest.raises(InvalidChoiceError):
+        np_module.load_members(path, ["x"], "w+")
+
+
+@pytest.mark.parametrize("mmap_mode", [None, "r"])
+def test_npz(path, arrays, mmap_mode):
+    db = NPZDatabase(path, "x", mmap_mode)
+
+    assert len(db) == len(arrays["x"])
+    np.testing.assert_array_equal(db[3], arrays["x"][3])
+    torch.testing.assert_close(db.get_batch([4, 1]), torch.from_numpy(arrays["x"][[4, 1]]).float())
+    np.testing.assert_array_equal(db.read_batch([4, 1]), arrays["x"][[4, 1]])
+
+    db2 = pickle.loads(pickle.dumps(db))
+    np.testing.assert_array_equal(db2.X, arrays["x"])
+    assert isinstance(db2.X, np.memmap) == (mmap_mode is not None)
+
+
+@pytest.mark.parametrize("mmap_mode", [None, "r"])
+def test_from_keys(path, arrays, mmap_mode):
+    dbs = NPZDatabase.from_keys(path, mmap_mode=mmap_mode)
+
+    assert set(dbs) == set(arrays)
+    for key, db in dbs.items():
+        assert isinstance(db, NPZDatabase)
+        assert (db.key, db.mmap_mode, db.precision) == (key, mmap_mode, None)
+        assert repr(db) == repr(NPZDatabase(path, key, mmap_mode))
+        np.testing.assert_array_equal(db.X, arrays[key])
+
+    db = pickle.loads(pickle.dumps(dbs["x"]))
+    np.testing.assert_array_equal(db.X, arrays["x"])
+    assert repr(db) == repr(dbs["x"])
+
+
+def test_from_keys_post_init(path):
+    class Tagged(NPZDatabase):
+        def __post_init__(self, *args):
+            super().__post_init__(*args)
+            self.tagged = True
+
+    assert all(db.tagged for db in Tagged.from_keys(path).values())
+
+
+def test_from_keys_quantized(tmp_path, arrays):
+    save_npz(tmp_path / "q.npz", {"x": arrays["x"]}, precision="float16")
+    db = NPZDatabase.from_keys(tmp_path / "q.npz")["x"]
+
+    assert db.quantizer is not None
+    assert db.X.dtype == np.float16
+    torch.testing.assert_close(
+        db.get_batch([0, 1]), torch.from_numpy(arrays["x"][:2]).float(), atol=1e-3, rtol=1e-3
+    )
+
+
+def test_npy(tmp_path, arrays):
+    path = tmp_path / "x.npy"
+    save_npy(path, arrays["x"])
+
+    db = NPYDatabase(path, "r")
+    assert db.mmap_mode == "r"
+    assert db.key is None
+    assert isinstance(db.X, np.memmap)
+    np.testing.assert_array_equal(db[7], arrays["x"][7])
+
+    db = NPYDatabase(path)
+    assert not isinstance(db.X, np.memmap)
+    torch.testing.assert_close(db.get_batch([1, 0]), torch.from_numpy(arrays["x"][[1, 0]]).float())
+
+    with pytest.raises(TypeError):
+        NPYDatabase(path, "r", None, "x")
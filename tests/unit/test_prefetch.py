@@ -0,0 +1,70 @@
+import threading
+
+import pytest
+from tensordict import TensorDict
+import torch
+from torch.utils.data import DataLoader
+
+from notorch.data.prefetch import PrefetchLoader
+
+
+@pytest.fixture
+def loader():
+    return DataLoader(
+        torch.arange(20.0), batch_size=4, collate_fn=lambda xs: TensorDict({"x": torch.stack(xs)})
+    )
+
+
+def test_prefetch(loader):
+    prefetcher = PrefetchLoader(loader, num_batches=3)
+    batches = list(prefetcher)
+
+    assert len(prefetcher) == len(loader) == len(batches)
+    assert prefetcher.batch_size == 4
+    for batch, expected in zip(batches, loader):
+        torch.testing.assert_close(batch["x"], expected["x"])
+
+    info = prefetcher.prefetch_info()
+    assert info.num_batches == len(loader)
+    assert 0 <= info.queue_depth <= 3
+    prefetcher.prefetch_clear()
+    assert prefetcher.prefetch_info().num_batches == 0
+
+
+def test_prefetch_transform(loader):
+    main = threading.get_ident()
+    idents = []
+
+    def transform(batch):
+        idents.append(threading.get_ident())
+        batch["y"] = 2 * batch["x"]
+        return batch
+
+    batches = list(PrefetchLoader(loader, transform=transform, device="cpu"))
+
+    assert all(ident != main for ident in idents)
+    for batch in batches:
+        torch.testing.assert_close(batch["y"], 2 * batch["x"])
+
+
+def test_prefetch_error():
+    def batches():
+        yield TensorDict({"x": torch.zeros(1)})
+        raise RuntimeError("bad batch")
+
+    with pytest.raises(RuntimeError, match="bad batch"):
+        list(PrefetchLoader(batches()))
+
+
+def test_prefetch_break(loader):
+    num_threads = threading.active_count()
+    for i, _ in enumerate(PrefetchLoader(loader, num_batches=1)):
+        if i == 1:
+            break
+
+    assert threading.active_count() == num_threads
+
+
+def test_prefetch_num_batches(loader):
+    with pytest.raises(ValueError):
+        PrefetchLoader(loader, num_batches=0)
@@ -0,0 +1,156 @@
+import numpy as np
+import pytest
+import torch
+
+from notorch.databases.base import Database
+from notorch.databases.hdf5 import HDF5Database, HDF5DatabaseOnDisk, save_hdf5
+from notorch.databases.np import NPYDatabase, NPZDatabase, save_npy, save_npz
+from notorch.databases.sharded import ShardedDatabase
+from notorch.exceptions import InvalidChoiceError
+from notorch.utils.quantize import Quantizer, quantize_array
+
+# the maximum relative error of each precision
+RTOLS = {"float16": 2**-11, "bfloat16": 2**-8}
+
+
+@pytest.fixture
+def X():
+    rg = np.random.default_rng(0)
+
+    return np.stack(
+        [
+            rg.normal(size=1000),
+            np.full(1000, 0.37),
+            1e6 + rg.random(1000),
+            rg.integers(0, 2, 1000).astype(float),
+            -5e3 + 1e-3 * rg.random(1000),
+        ],
+        axis=1,
+    )
+
+
+def dequantize(quantizer: Quantizer, Q: np.ndarray, dtype=torch.float64) -> np.ndarray:
+    return quantizer.dequantize(torch.from_numpy(Q), torch.empty(Q.shape, dtype=dtype)).numpy()
+
+
+@pytest.mark.parametrize("precision", ["float16", "bfloat16"])
+def test_float_round_trip(X, precision):
+    X = X[:, [0, 3]]
+    quantizer = Quantizer.fit(X, precision)
+    Q = quantizer.quantize(X)
+
+    assert Q.dtype == quantizer.storage_dtype
+    np.testing.assert_allclose(dequantize(quantizer, Q), X, rtol=RTOLS[precision])
+
+
+def test_int8_round_trip(X):
+    quantizer = Quantizer.fit(X, "int8")
+    Q = quantizer.quantize(X)
+
+    assert Q.dtype == np.int8
+    assert (Q.max(0) == 127).all()
+    # each value is within half a quantization step
+    assert (np.abs(dequantize(quantizer, Q) - X) <= quantizer.scale / 2 + 1e-12).all()
+
+    # in float32, the only additional error is that of rounding the value itself to float32
+    ulp = np.spacing(np.abs(X).astype(np.float32))
+    error = np.abs(dequantize(quantizer, Q, torch.float32) - X)
+    assert (error <= quantizer.scale / 2 + ulp).all()
+
+
+def test_int8_constant_column():
+    X = np.full((10, 2), [0.37, -2.0], dtype=np.float32)
+    quantizer = Quantizer.fit(X, "int8")
+
+    np.testing.assert_array_equal(dequantize(quantizer, quantizer.quantize(X), torch.float32), X)
+
+
+def test_int8_empty():
+    quantizer = Quantizer.fit(np.empty((0, 3)), "int8")
+
+    assert quantizer.quantize(np.empty((0, 3))).shape == (0, 3)
+
+
+def test_metadata(X):
+    quantizer = Quantizer.fit(X, "int8")
+    quantizer2 = Quantizer.from_metadata(quantizer.to_metadata())
+
+    np.testing.assert_array_equal(quantizer2.quantize(X), quantizer.quantize(X))
+    assert Quantizer.from_metadata({}) is None
+    assert Quantizer.from_metadata(Quantizer("float16").to_metadata()).precision == "float16"
+
+
+def test_invalid(X):
+    with pytest.raises(InvalidChoiceError):
+        Quantizer("int4")
+    with pytest.raises(ValueError):
+        Quantizer("int8")
+    with pytest.raises(ValueError):
+        Quantizer.fit([[np.nan]], "int8")
+
+
+def test_quantize_array(tmp_path, X):
+    Q, quantizer = quantize_array(X, None, "int8")
+
+    assert quantize_array(Q, quantizer, "int8") == (Q, quantizer)
+    assert quantize_array(X, None, None) == (X, None)
+    with pytest.raises(ValueError):
+        quantize_array(Q, quantizer, "float16")
+
+    np.save(tmp_path / "X.npy", X)
+    with pytest.raises(ValueError):
+        quantize_array(np.load(tmp_path / "X.npy", mmap_mode="r"), None, "int8")
+
+
+def build_databases(tmp_path, X) -> dict[str, Database]:
+    save_npz(tmp_path / "X.npz", {"X": X}, precision="int8")
+    save_npz(tmp_path / "raw.npz", {"X": X})
+    save_npy(tmp_path / "X.npy", X, precision="int8")
+    save_hdf5(tmp_path / "X.h5", "X", X, precision="int8")
+    save_npy(tmp_path / "shard-0.npy", X[:400], precision="int8")
+    save_hdf5(tmp_path / "shard-1.h5", "X", X[400:], precision="int8")
+
+    return {
+        "npz": NPZDatabase(tmp_path / "X.npz", "X"),
+        "npy": NPYDatabase(tmp_path / "X.npy", "r"),
+        "hdf5": HDF5Database(tmp_path / "X.h5", "X"),
+        "hdf5_on_disk": HDF5DatabaseOnDisk(tmp_path / "X.h5", "X"),
+        "in_memory": NPZDatabase(tmp_path / "raw.npz", "X", precision="int8"),
+        "sharded": ShardedDatabase([tmp_path / "shard-0.npy", tmp_path / "shard-1.h5"], "X"),
+    }
+
+
+def test_databases(tmp_path, X):
+    X = X[:, [0, 2, 3]]
+    idxs = [0, 999, 399, 400, 5, 5]
+
+    for name, db in build_databases(tmp_path, X).items():
+        batch = db.get_batch(idxs)
+        rows = [db[i] for i in idxs]
+
+        assert batch.dtype == torch.float, name
+        np.testing.assert_allclose(batch.numpy(), X[idxs], atol=0.04, err_msg=name)
+        # single rows and the per-item fallback of `get_batch` are dequantized too
+        np.testing.assert_allclose(np.stack(rows), X[idxs], atol=0.04, err_msg=name)
+        torch.testing.assert_close(db.collate(rows), batch, msg=name)
+        torch.testing.assert_close(Database.get_batch(db, idxs), batch, msg=name)
+
+
+@pytest.mark.parametrize("precision", [None, "float16", "bfloat16", "int8"])
+def test_iter(tmp_path, X, precision):
+    save_npz(tmp_path / "X.npz", {"X": X}, precision=precision)
+    save_npy(tmp_path / "X.npy", X, precision=precision)
+    save_hdf5(tmp_path / "X.h5", "X", X, precision=precision)
+    dbs = {
+        "npz": NPZDatabase(tmp_path / "X.npz", "X"),
+        "npy": NPYDatabase(tmp_path / "X.npy", "r"),
+        "hdf5": HDF5Database(tmp_path / "X.h5", "X"),
+    }
+
+    for name, db in dbs.items():
+        rows = list(db)
+
+        assert len(rows) == len(db), name
+        for i, row in enumerate(rows):
+            assert row.dtype == db[i].dtype, name
+            np.testing.assert_array_equal(row, db[i], err_msg=name)
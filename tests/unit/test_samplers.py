@@ -0,0 +1,317 @@
+import lightning as L
+from lightning.pytorch.callbacks import ModelCheckpoint
+import numpy as np
+import pytest
+from tensordict import TensorDict
+import torch
+from torch.utils.data import DataLoader, DistributedSampler
+
+from notorch.databases.hdf5 import HDF5DatabaseOnDisk, save_hdf5
+from notorch.databases.np import NPYDatabase
+from notorch.lightning_models.callbacks import ImportanceSampling, SamplerCheckpoint
+from notorch.samplers import (
+    BlockShuffleSampler,
+    BudgetBatchSampler,
+    DistributedSeededSampler,
+    ImportanceSampler,
+    WeightedSampler,
+)
+
+
+@pytest.mark.parametrize("drop_last", [False, True])
+@pytest.mark.parametrize("N,num_replicas", [(20, 3), (21, 3), (5, 8)])
+def test_distributed_seeded_sampler(N, num_replicas, drop_last):
+    samplers = [
+        DistributedSeededSampler(N, 0, num_replicas, rank, drop_last=drop_last)
+        for rank in range(num_replicas)
+    ]
+    idxs = [list(sampler) for sampler in samplers]
+
+    assert all(isinstance(sampler, DistributedSampler) for sampler in samplers)
+    assert len({len(sampler) for sampler in samplers}) == 1
+    assert [len(i) for i in idxs] == [len(sampler) for sampler in samplers]
+    if drop_last:
+        assert len(set(sum(idxs, []))) == len(samplers[0]) * num_replicas
+    else:
+        assert set(sum(idxs, [])) == set(range(N))
+
+
+def test_distributed_seeded_sampler_epoch():
+    sampler = DistributedSeededSampler(20, 0)
+
+    first = list(sampler)
+    assert first == list(sampler)
+    sampler.set_epoch(1)
+    assert first != list(sampler)
+    assert sorted(first) == list(range(20))
+
+
+def test_distributed_seeded_sampler_invalid():
+    with pytest.raises(ValueError):
+        DistributedSeededSampler(20, None)
+    with pytest.raises(ValueError):
+        DistributedSeededSampler(20, 0, num_replicas=2, rank=2)
+
+
+def test_distributed_seeded_sampler_resume():
+    sampler = DistributedSeededSampler(20, 0)
+    expected = list(sampler)
+
+    it = iter(sampler)
+    head = [next(it) for _ in range(7)]
+    assert len(sampler) == 20
+
+    resumed = DistributedSeededSampler(20, 0)
+    resumed.load_state_dict(sampler.state_dict())
+    resumed.set_epoch(0)
+    assert head + list(resumed) == expected
+    assert list(resumed) == expected
+
+    with pytest.raises(ValueError):
+        DistributedSeededSampler(20, 1).load_state_dict(sampler.state_dict())
+
+
+class _Model(L.LightningModule):
+    def __init__(self):
+        super().__init__()
+        self.w = torch.nn.Parameter(torch.zeros(1))
+        self.idxs = []
+
+    def training_step(self, batch, batch_idx):
+        self.idxs.extend(batch["index"].tolist())
+
+        return self.w.sum()
+
+    def configure_optimizers(self):
+        return torch.optim.SGD(self.parameters(), lr=0.0)
+
+
+def _fit(tmp_path, num_workers: int, ckpt_path=None) -> tuple[_Model, list[int]]:
+    sampler = DistributedSeededSampler(20, 0)
+    loader = DataLoader(
+        np.arange(20),
+        batch_size=2,
+        sampler=sampler,
+        num_workers=num_workers,
+        collate_fn=lambda idxs: TensorDict({"index": torch.as_tensor(idxs)}),
+    )
+    model = _Model()
+    checkpoint = ModelCheckpoint(
+        tmp_path, "{step}", save_top_k=-1, every_n_train_steps=3, save_on_train_epoch_end=False
+    )
+    trainer = L.Trainer(
+        max_epochs=1,
+        callbacks=[SamplerCheckpoint(sampler), checkpoint],
+        logger=False,
+        enable_progress_bar=False,
+        enable_model_summary=False,
+        accelerator="cpu",
+    )
+    trainer.fit(model, loader, ckpt_path=ckpt_path)
+
+    return model, list(DistributedSeededSampler(20, 0))
+
+
+@pytest.mark.parametrize("num_workers", [0, 2])
+def test_sampler_checkpoint(tmp_path, num_workers):
+    model, expected = _fit(tmp_path, num_workers)
+    ckpt_path = tmp_path / "step=3.ckpt"
+
+    assert model.idxs == expected
+    ckpt = torch.load(ckpt_path, weights_only=False)
+    assert ckpt["callbacks"]["SamplerCheckpoint"]["num_yielded"] == 6
+
+    resumed, _ = _fit(tmp_path / "resumed", num_workers, ckpt_path)
+    assert resumed.idxs == expected[6:]
+
+
+@pytest.fixture
+def sizes():
+    rg = np.random.default_rng(0)
+    num_nodes = rg.integers(1, 40, 200)
+
+    return np.stack([num_nodes, 2 * num_nodes + rg.integers(0, 10, 200)], axis=1)
+
+
+@pytest.mark.parametrize("max_nodes,max_edges", [(100, None), (None, 150), (100, 150)])
+def test_budget_batch_sampler(sizes, max_nodes, max_edges):
+    sampler = BudgetBatchSampler(sizes, max_nodes, max_edges, shuffle=True, seed=0)
+    num_batches = len(sampler)
+    batches = list(sampler)
+
+    assert len(batches) == num_batches
+    assert sorted(sum(batches, [])) == list(range(len(sizes)))
+    for batch in batches:
+        num_nodes, num_edges = sizes[batch].sum(0)
+        if len(batch) > 1:
+            assert max_nodes is None or num_nodes <= max_nodes
+            assert max_edges is None or num_edges <= max_edges
+
+
+def test_budget_batch_sampler_oversized():
+    sampler = BudgetBatchSampler([5, 50, 5, 5], max_nodes=10)
+
+    assert list(sampler) == [[0], [1], [2, 3]]
+    assert list(BudgetBatchSampler([5, 50, 5, 5], max_nodes=10, drop_last=True)) == [[0], [1]]
+
+
+def test_budget_batch_sampler_invalid(sizes):
+    with pytest.raises(ValueError):
+        BudgetBatchSampler(sizes)
+    with pytest.raises(ValueError):
+        BudgetBatchSampler(sizes[:, 0], max_edges=10)
+
+
+def implied_probs(prob: np.ndarray, alias: np.ndarray) -> np.ndarray:
+    """Get the sampling probability of each entry implied by an alias table."""
+    p = prob.copy()
+    np.add.at(p, alias, 1 - prob)
+
+    return p / len(p)
+
+
+@pytest.mark.parametrize(
+    "weights",
+    [[1, 0, 2, 2, 2, 3], [2, 0, 0, 0, 1, 2, 1, 1, 0], [1, 1, 1, 1], [0, 0, 5], [1e-6, 1, 1e6]],
+)
+def test_alias_table(weights):
+    weights = np.array(weights, dtype=float)
+    prob, alias = WeightedSampler.build_alias_table(weights)
+
+    assert ((0 <= prob) & (prob <= 1)).all()
+    np.testing.assert_allclose(implied_probs(prob, alias), weights / weights.sum(), atol=1e-12)
+
+
+def test_alias_table_random():
+    rg = np.random.default_rng(0)
+    for i in range(500):
+        n = rg.integers(1, 200)
+        weights = rg.integers(0, 4, n).astype(float) if i % 2 == 0 else rg.random(n) ** 4
+        if weights.sum() == 0:
+            continue
+        prob, alias = WeightedSampler.build_alias_table(weights)
+
+        np.testing.assert_allclose(implied_probs(prob, alias), weights / weights.sum(), atol=1e-12)
+
+
+def test_weighted_sampler():
+    weights = np.array([1, 0, 2, 2, 2, 3], dtype=float)
+    sampler = WeightedSampler(weights, num_samples=200_000, seed=0)
+    idxs = np.fromiter(sampler, int)
+
+    assert len(idxs) == len(sampler)
+    np.testing.assert_allclose(np.bincount(idxs, minlength=6) / len(idxs), weights / 10, atol=5e-3)
+
+
+def test_weighted_sampler_without_replacement():
+    sampler = WeightedSampler([1, 0, 2, 2, 2, 3], num_samples=5, replacement=False, seed=0)
+    idxs = list(sampler)
+
+    assert sorted(idxs) == [0, 2, 3, 4, 5]
+    with pytest.raises(ValueError):
+        WeightedSampler([1, 0, 2], num_samples=3, replacement=False)
+
+
+def test_weighted_sampler_invalid():
+    for weights in [[0, 0], [1, -1], [1, np.nan]]:
+        with pytest.raises(ValueError):
+            WeightedSampler(weights)
+
+
+def test_class_balanced():
+    Y = np.array([[1], [0], [0], [0], [np.nan]])
+    sampler = WeightedSampler.class_balanced(Y)
+    weights = sampler.weights
+
+    assert weights[0] == pytest.approx(weights[1:4].sum())
+    assert weights[4] == 0
+
+
+def test_importance_sampler_warmup():
+    sampler = ImportanceSampler(10, seed=0, warmup_epochs=1)
+    sampler.update(np.arange(10), np.arange(10.0))
+    list(sampler)
+
+    np.testing.assert_allclose(sampler.probs, np.full(10, 0.1))
+
+
+def test_importance_sampler():
+    sampler = ImportanceSampler(4, num_samples=100_000, seed=0, uniform_mix=0.2, warmup_epochs=0)
+    sampler.update([0, 1, 2], [1.0, 2.0, 3.0])
+    sampler.update([0], [3.0])
+    np.testing.assert_allclose(sampler.scores[:3], [1.2, 2.0, 3.0])
+
+    idxs = np.fromiter(sampler, int)
+    # the unseen sample is assigned the largest smoothed loss
+    scores = np.array([1.2, 2.0, 3.0, 3.0])
+    expected = 0.8 * scores / scores.sum() + 0.2 / 4
+    np.testing.assert_allclose(sampler.probs, expected)
+    np.testing.assert_allclose(np.bincount(idxs) / len(idxs), expected, atol=5e-3)
+
+    # the importance weights keep the estimate of the mean loss unbiased
+    w = sampler.importance_weights(np.arange(4))
+    assert (sampler.probs * w * scores).sum() == pytest.approx(scores.mean())
+    assert sampler.variance_reduction() > 1
+
+
+def test_importance_sampler_invalid():
+    with pytest.raises(ValueError):
+        ImportanceSampler(10, uniform_mix=0)
+
+
+def test_importance_sampling_callback():
+    sampler = ImportanceSampler(4, seed=0, warmup_epochs=0)
+    callback = ImportanceSampling(sampler)
+    batch = TensorDict({"index": torch.tensor([0, 2])})
+
+    callback.on_train_batch_start(None, None, batch, 0)
+    torch.testing.assert_close(batch["sample_weights"], torch.ones(2))
+
+    callback.on_train_batch_end(None, None, {"sample_losses": torch.tensor([1.0, 4.0])}, batch, 0)
+    np.testing.assert_array_equal(sampler.scores[[0, 2]], [1.0, 4.0])
+
+
+@pytest.mark.parametrize("N,block_size,window_size", [(100, 10, 3), (103, 8, 4), (5, 16, 2)])
+def test_block_shuffle_sampler(N, block_size, window_size):
+    sampler = BlockShuffleSampler(N, block_size, window_size, seed=0)
+    idxs = np.fromiter(sampler, int)
+
+    assert len(idxs) == len(sampler) == N
+    assert sorted(idxs) == list(range(N))
+
+    # the blocks, in order of first appearance, are shuffled in disjoint windows of `window_size`
+    blocks = idxs // block_size
+    firsts = np.array([np.flatnonzero(blocks == b)[0] for b in range(blocks.max() + 1)])
+    lasts = np.array([np.flatnonzero(blocks == b)[-1] for b in range(blocks.max() + 1)])
+    order = np.argsort(firsts)
+    windows = [order[i : i + window_size] for i in range(0, len(order), window_size)]
+    for prev, curr in zip(windows, windows[1:]):
+        assert lasts[prev].max() < firsts[curr].min()
+
+
+def test_block_shuffle_sampler_seed():
+    first = list(BlockShuffleSampler(100, 10, seed=0))
+
+    assert first == list(BlockShuffleSampler(100, 10, seed=0))
+    assert first != list(range(100))
+    sampler = BlockShuffleSampler(100, 10, seed=0)
+    assert list(sampler) != list(sampler)
+
+
+def test_block_shuffle_sampler_invalid():
+    with pytest.raises(ValueError):
+        BlockShuffleSampler(10, 0)
+    with pytest.raises(ValueError):
+        BlockShuffleSampler(10, 2, window_size=0)
+
+
+def test_block_shuffle_sampler_from_database(tmp_path):
+    X = np.zeros((100, 4), dtype=np.float32)
+    save_hdf5(tmp_path / "X.h5", "X", X, chunks=(16, 4))
+    np.save(tmp_path / "X.npy", X)
+
+    with HDF5DatabaseOnDisk(tmp_path / "X.h5", "X") as db:
+        assert BlockShuffleSampler.from_database(db).block_size == 16
+    sampler = BlockShuffleSampler.from_database(NPYDatabase(tmp_path / "X.npy"), nbytes=256)
+    assert sampler.block_size == 16
+    assert len(sampler) == 100
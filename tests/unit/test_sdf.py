@@ -0,0 +1,112 @@
+import os
+import pickle
+
+import pytest
+from rdkit import Chem
+
+from notorch.databases import sdf as sdf_module
+from notorch.databases.sdf import SDFDatabase, SDFDatabaseOnDisk, parse_data_items
+
+
+@pytest.fixture
+def path(tmp_path, mols):
+    path = tmp_path / "mols.sdf"
+    with Chem.SDWriter(str(path)) as writer:
+        for i, mol in enumerate(mols[:20]):
+            mol = Chem.Mol(mol)
+            mol.SetProp("idx", str(i))
+            writer.write(mol)
+
+    return path
+
+
+@pytest.fixture
+def cache_dir(tmp_path, monkeypatch):
+    cache_dir = tmp_path / "cache"
+    monkeypatch.setattr(sdf_module, "INDEX_CACHE_DIR", cache_dir)
+
+    return cache_dir
+
+
+def smiles(mol) -> str:
+    return Chem.MolToSmiles(mol)
+
+
+def test_on_disk(path, mols, cache_dir):
+    db = SDFDatabaseOnDisk(path, props=True)
+
+    assert len(db) == 20
+    assert db.index_path == path.with_name("mols.sdf.idx.npy")
+    assert db.index_path.is_file()
+    assert not cache_dir.exists()
+    assert [smiles(db[i]) for i in db] == [smiles(mol) for mol in mols[:20]]
+    assert [db[i].GetProp("idx") for i in db] == [str(i) for i in range(20)]
+    assert smiles(db[-1]) == smiles(mols[19])
+    with pytest.raises(IndexError):
+        db[20]
+
+    assert [smiles(mol) for mol in SDFDatabase(path)] == [smiles(db[i]) for i in db]
+
+
+def test_index_reuse(path):
+    SDFDatabaseOnDisk(path)
+    mtime = path.with_name("mols.sdf.idx.npy").stat().st_mtime_ns
+
+    SDFDatabaseOnDisk(path)
+    assert path.with_name("mols.sdf.idx.npy").stat().st_mtime_ns == mtime
+
+    # the index is rebuilt after the file changes
+    with open(path, "a") as f:
+        f.write(Chem.MolToMolBlock(Chem.MolFromSmiles("CCO")) + "$$$$\n")
+    assert len(SDFDatabaseOnDisk(path)) == 21
+
+
+def test_index_cache_dir(path, cache_dir):
+    # a directory at the sidecar path makes it unwritable
+    path.with_name("mols.sdf.idx.npy").mkdir()
+    db = SDFDatabaseOnDisk(path)
+
+    assert db.index_path.parent == cache_dir
+    assert db.index_path.is_file()
+    assert len(db) == 20
+    assert SDFDatabaseOnDisk(path).index_path == db.index_path
+
+
+def test_index_in_memory(path, tmp_path, monkeypatch):
+    (tmp_path / "file").touch()
+    monkeypatch.setattr(sdf_module, "INDEX_CACHE_DIR", tmp_path / "file" / "cache")
+    path.with_name("mols.sdf.idx.npy").mkdir()
+    db = SDFDatabaseOnDisk(path)
+
+    assert db.index_path is None
+    assert len(db) == 20
+    assert smiles(db[3]) == smiles(SDFDatabase(path)[3])
+    assert not list(tmp_path.glob("*.tmp"))
+
+
+def test_latin1(tmp_path):
+    path = tmp_path / "latin1.sdf"
+    block = Chem.MolToMolBlock(Chem.MolFromSmiles("CCO"))
+    path.write_bytes(f"{block}> <name>\nethanol caf\xe9\n\n$$$$\n".encode("latin-1"))
+    db = SDFDatabaseOnDisk(path, props=True)
+
+    assert smiles(db[0]) == "CCO"
+    assert db[0].GetProp("name") == "ethanol caf\xe9"
+
+
+def test_pickle(path):
+    db = SDFDatabaseOnDisk(path)
+    db[0]
+    db2 = pickle.loads(pickle.dumps(db))
+
+    assert db2._mm is None
+    assert smiles(db2[5]) == smiles(db[5])
+    assert db2._pid == os.getpid()
+    db.close()
+    db2.close()
+
+
+def test_parse_data_items():
+    block = "M  END\n> <a>\n1\n\n>  <b> (2)\nx\ny\n\n$$$$\n"
+
+    assert parse_data_items(block) == {"a": "1", "b": "x\ny"}
@@ -0,0 +1,106 @@
+import pickle
+
+import numpy as np
+import pytest
+import torch
+from torch.utils.data import DataLoader
+
+from notorch.databases.hdf5 import save_hdf5
+from notorch.databases.sharded import ShardedDatabase, read_manifest
+from notorch.exceptions import InvalidChoiceError
+
+
+@pytest.fixture
+def X():
+    return np.random.default_rng(0).random((100, 4)).astype(np.float32)
+
+
+@pytest.fixture
+def paths(tmp_path, X):
+    paths = []
+    for i, (start, stop) in enumerate([(0, 30), (30, 30), (30, 75), (75, 100)]):
+        if i % 2 == 0:
+            path = tmp_path / f"shard-{i}.npy"
+            np.save(path, X[start:stop])
+        else:
+            path = tmp_path / f"shard-{i}.h5"
+            save_hdf5(path, "X", X[start:stop])
+        paths.append(path)
+
+    return paths
+
+
+@pytest.fixture
+def db(paths):
+    return ShardedDatabase(paths, "X")
+
+
+def test_sharded(db, X):
+    assert len(db) == len(X)
+    assert db.shape == X.shape
+    np.testing.assert_array_equal(db.offsets, [0, 30, 30, 75, 100])
+    for i in [0, 29, 30, 74, 75, -1]:
+        np.testing.assert_array_equal(db[i], X[i])
+
+
+@pytest.mark.parametrize("idxs", [[0, 99, 30, 31, 29, 0], list(range(100))[::-1], [-1, -100], []])
+def test_get_batch(db, X, idxs):
+    torch.testing.assert_close(db.get_batch(idxs), torch.from_numpy(X[idxs]).reshape(-1, 4))
+
+
+def test_out_of_range(db):
+    with pytest.raises(IndexError):
+        db[100]
+    with pytest.raises(IndexError):
+        db.get_batch([0, -101])
+
+
+def test_max_open(paths, X):
+    db = ShardedDatabase(paths, "X", max_open=1)
+
+    torch.testing.assert_close(db.get_batch([80, 0, 40]), torch.from_numpy(X[[80, 0, 40]]))
+    assert len(db._open) == 1
+    db.close()
+    assert len(db._open) == 0
+
+
+def test_manifest_and_glob(tmp_path, paths, X):
+    manifest = tmp_path / "shards.txt"
+    manifest.write_text("# shards\n" + "\n".join(p.name for p in paths) + "\n\n")
+
+    assert read_manifest(manifest) == paths
+    assert len(ShardedDatabase(manifest, "X")) == len(X)
+    npy_db = ShardedDatabase(str(tmp_path / "shard-*.npy"))
+    assert npy_db.paths == [paths[0], paths[2]]
+    assert len(npy_db) == 30 + 45
+
+
+def test_invalid(tmp_path, paths):
+    with pytest.raises(ValueError):
+        ShardedDatabase(str(tmp_path / "*.none"))
+    with pytest.raises(ValueError):
+        ShardedDatabase(paths)
+    with pytest.raises(ValueError):
+        ShardedDatabase(paths, "X", max_open=0)
+
+    np.save(tmp_path / "wide.npy", np.zeros((5, 3)))
+    with pytest.raises(ValueError):
+        ShardedDatabase([paths[0], tmp_path / "wide.npy"])
+
+    (tmp_path / "shard.csv").touch()
+    with pytest.raises(InvalidChoiceError):
+        ShardedDatabase([tmp_path / "shard.csv"])
+
+
+def test_pickle(db, X):
+    db.get_batch([0, 50])
+    db2 = pickle.loads(pickle.dumps(db))
+
+    assert len(db2._open) == 0
+    torch.testing.assert_close(db2.get_batch([99, 1]), torch.from_numpy(X[[99, 1]]))
+
+
+def test_workers(db, X):
+    loader = DataLoader(range(len(X)), batch_size=16, num_workers=2, collate_fn=db.get_batch)
+
+    torch.testing.assert_close(torch.cat(list(loader)), torch.from_numpy(X))
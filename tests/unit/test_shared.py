@@ -0,0 +1,108 @@
+import pickle
+import subprocess
+import sys
+
+import numpy as np
+import pytest
+
+from notorch.utils.shared import REFS_SUFFIX, SharedArray, release, share
+
+# share an identical array from another "rank", then wait for a line on stdin before exiting
+RANK = """
+import sys
+import numpy as np
+from notorch.utils.shared import share
+
+X = share(np.arange(100.0), "X", sys.argv[1])
+print(X.path, flush=True)
+sys.stdin.readline()
+"""
+
+
+@pytest.fixture
+def X():
+    return np.arange(100.0)
+
+
+def start_rank(root) -> subprocess.Popen:
+    rank = subprocess.Popen(
+        [sys.executable, "-c", RANK, str(root)],
+        stdin=subprocess.PIPE,
+        stdout=subprocess.PIPE,
+        text=True,
+    )
+    rank.path = rank.stdout.readline().strip()
+
+    return rank
+
+
+def stop_rank(rank: subprocess.Popen):
+    rank.communicate("\n", timeout=60)
+    assert rank.returncode == 0
+
+
+def test_share(tmp_path, X):
+    Y = share(X, "X", tmp_path)
+
+    assert isinstance(Y, SharedArray)
+    np.testing.assert_array_equal(Y, X)
+    assert share(X, "X", tmp_path).path == Y.path
+    assert share(Y) is Y
+
+    Z = pickle.loads(pickle.dumps(Y))
+    assert Z.path == Y.path
+    np.testing.assert_array_equal(Z, X)
+
+    release(Y.path)
+    assert not Y.path.exists()
+
+
+def test_share_object(tmp_path):
+    with pytest.raises(TypeError):
+        share(np.array(["a", None], dtype=object), root=tmp_path)
+
+
+def test_other_rank_exits_first(tmp_path, X):
+    Y = share(X, "X", tmp_path)
+    rank = start_rank(tmp_path)
+    assert rank.path == str(Y.path)
+
+    stop_rank(rank)
+    assert Y.path.exists()
+
+    release(Y.path)
+    assert not Y.path.exists()
+    assert not Y.path.with_name(f"{Y.path.name}{REFS_SUFFIX}").exists()
+
+
+def test_owner_exits_first(tmp_path, X):
+    rank = start_rank(tmp_path)
+    Y = share(X, "X", tmp_path)
+
+    release(Y.path)
+    assert Y.path.exists()
+
+    stop_rank(rank)
+    assert not Y.path.exists()
+
+
+def test_recreate_after_release(tmp_path, X):
+    Y = share(X, "X", tmp_path)
+    release(Y.path)
+
+    Z = share(X, "X", tmp_path)
+    assert Z.path.exists()
+    np.testing.assert_array_equal(Z, X)
+    release(Z.path)
+
+
+def test_stale_reference(tmp_path, X):
+    Y = share(X, "X", tmp_path)
+    rank = subprocess.run(
+        [sys.executable, "-c", "import os; print(os.getpid())"], capture_output=True
+    )
+    dead_pid = int(rank.stdout)
+    (Y.path.with_name(f"{Y.path.name}{REFS_SUFFIX}") / str(dead_pid)).touch()
+
+    release(Y.path)
+    assert not Y.path.exists()
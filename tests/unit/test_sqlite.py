@@ -0,0 +1,108 @@
+from concurrent.futures import ThreadPoolExecutor
+import pickle
+import sqlite3
+
+import numpy as np
+import pytest
+import torch
+from torch.utils.data import DataLoader
+
+from notorch.databases.sqlite import SQLiteDatabase
+
+
+@pytest.fixture
+def X():
+    return np.random.default_rng(0).random((50, 2, 3)).astype(np.float32)
+
+
+@pytest.fixture
+def ids():
+    return np.arange(0, 100, 2)
+
+
+@pytest.fixture
+def db(tmp_path, ids, X):
+    db = SQLiteDatabase.create(tmp_path / "db.sqlite", (2, 3))
+    db.append(ids, X)
+
+    return db
+
+
+def test_create(tmp_path):
+    db = SQLiteDatabase.create(tmp_path / "db.sqlite", (4,), np.int16, table="fps")
+
+    assert db._conn is None
+    assert db.shape == (4,)
+    assert db.dtype == np.int16
+    assert len(db) == 0
+    assert list(db) == []
+
+    with pytest.raises(sqlite3.OperationalError):
+        SQLiteDatabase.create(tmp_path / "db.sqlite", (4,), table="fps")
+    for table in ["meta", "1fps", "fps; DROP TABLE fps"]:
+        with pytest.raises(ValueError):
+            SQLiteDatabase.create(tmp_path / "db.sqlite", (4,), table=table)
+
+
+def test_sqlite(db, ids, X):
+    assert len(db) == len(ids)
+    assert list(db) == ids.tolist()
+    assert 4 in db
+    assert 5 not in db
+    assert "4" not in db
+    np.testing.assert_array_equal(db[4], X[2])
+    with pytest.raises(KeyError):
+        db[5]
+
+
+def test_get_batch(db, X):
+    torch.testing.assert_close(db.get_batch([98, 0, 4, 0]), torch.from_numpy(X[[49, 0, 2, 0]]))
+    assert db.get_batch([]).shape == (0, 2, 3)
+    with pytest.raises(KeyError):
+        db.get_batch([0, 1])
+
+
+def test_append(db, X):
+    db.append([1, 4], np.stack([X[0] + 1, X[0] - 1]))
+
+    assert len(db) == 51
+    np.testing.assert_array_equal(db[1], X[0] + 1)
+    np.testing.assert_array_equal(db[4], X[0] - 1)
+    with pytest.raises(ValueError):
+        db.append([1, 2], X[:3])
+
+
+def test_reader_sees_other_writer(db, X):
+    assert len(db) == 50
+
+    SQLiteDatabase(db.path).append([1], X[:1])
+    assert len(db) == 51
+    np.testing.assert_array_equal(db[1], X[0])
+
+
+def test_threads(db, ids, X):
+    batches = [ids[i : i + 5] for i in range(0, len(ids), 5)] * 10
+
+    with ThreadPoolExecutor(4) as pool:
+        outputs = list(pool.map(db.get_batch, batches))
+
+    for batch, out in zip(batches, outputs):
+        torch.testing.assert_close(out, torch.from_numpy(X[batch // 2]))
+
+
+def test_pickle(db, X):
+    len(db)
+    db2 = pickle.loads(pickle.dumps(db))
+
+    assert db2._conn is None
+    assert db2._lock is None
+    np.testing.assert_array_equal(db2[6], X[3])
+    db.close()
+    db2.close()
+
+
+def test_workers(db, ids, X):
+    assert db._conn is None
+
+    loader = DataLoader(ids, batch_size=8, num_workers=2, collate_fn=db.get_batch)
+    torch.testing.assert_close(torch.cat(list(loader)), torch.from_numpy(X))